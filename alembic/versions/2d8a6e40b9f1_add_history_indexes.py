@@ -0,0 +1,32 @@
+"""add history indexes on datasets and model_results
+
+Revision ID: 2d8a6e40b9f1
+Revises: 9c3f5a17e6b2
+Create Date: 2026-10-18 01:12:37.558204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8a6e40b9f1'
+down_revision: Union[str, Sequence[str], None] = '9c3f5a17e6b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The history cursor is (uploaded_at, id); it needs every row to have a time
+    op.execute(sa.text("UPDATE datasets SET uploaded_at = CURRENT_TIMESTAMP WHERE uploaded_at IS NULL"))
+    op.create_index('ix_datasets_user_id_uploaded_at', 'datasets', ['user_id', 'uploaded_at'], unique=False)
+    op.create_index(op.f('ix_model_results_dataset_id'), 'model_results', ['dataset_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_model_results_dataset_id'), table_name='model_results')
+    op.drop_index('ix_datasets_user_id_uploaded_at', table_name='datasets')
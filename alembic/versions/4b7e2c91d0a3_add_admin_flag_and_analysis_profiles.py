@@ -0,0 +1,43 @@
+"""add is_admin to users and profile_path to analysis_history
+
+Revision ID: 4b7e2c91d0a3
+Revises: e86c51fe2d38
+Create Date: 2026-10-17 23:41:08.216530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c91d0a3'
+down_revision: Union[str, Sequence[str], None] = 'e86c51fe2d38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('is_admin', sa.Boolean(), server_default=sa.false(), nullable=False))
+    # analysis_history predates the migrations and may not exist yet
+    if not sa.inspect(op.get_bind()).has_table('analysis_history'):
+        op.create_table('analysis_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('dataset_id', sa.Integer(), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['dataset_id'], ['datasets.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_analysis_history_id'), 'analysis_history', ['id'], unique=False)
+    op.add_column('analysis_history', sa.Column('profile_path', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('analysis_history', 'profile_path')
+    op.drop_column('users', 'is_admin')
@@ -0,0 +1,42 @@
+"""add upload hash and profile columns to datasets
+
+Revision ID: 5f0c8d2a61e7
+Revises: 7e1b4d93c5a8
+Create Date: 2026-10-18 03:12:44.905127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f0c8d2a61e7'
+down_revision: Union[str, Sequence[str], None] = '7e1b4d93c5a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('datasets', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('datasets', sa.Column('size_bytes', sa.BigInteger(), nullable=True))
+    op.add_column('datasets', sa.Column('encoding', sa.String(), nullable=True))
+    op.add_column('datasets', sa.Column('delimiter', sa.String(length=1), nullable=True))
+    op.add_column('datasets', sa.Column('row_count', sa.Integer(), nullable=True))
+    op.add_column('datasets', sa.Column('column_count', sa.Integer(), nullable=True))
+    op.add_column('datasets', sa.Column('null_counts', sa.JSON(), nullable=True))
+    op.create_index(op.f('ix_datasets_content_hash'), 'datasets', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_datasets_content_hash'), table_name='datasets')
+    op.drop_column('datasets', 'null_counts')
+    op.drop_column('datasets', 'column_count')
+    op.drop_column('datasets', 'row_count')
+    op.drop_column('datasets', 'delimiter')
+    op.drop_column('datasets', 'encoding')
+    op.drop_column('datasets', 'size_bytes')
+    op.drop_column('datasets', 'content_hash')
@@ -0,0 +1,82 @@
+"""add summary columns and (user_id, created_at) index to analysis_history
+
+Revision ID: 7e1b4d93c5a8
+Revises: 2d8a6e40b9f1
+Create Date: 2026-10-18 01:58:20.731946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e1b4d93c5a8'
+down_revision: Union[str, Sequence[str], None] = '2d8a6e40b9f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH = 500
+
+
+def _summary(payload):
+    # Same rules as services.evaluation_service.summarize_history at the time of writing
+    payload = payload if isinstance(payload, dict) else {}
+    data = payload.get('data') if isinstance(payload.get('data'), dict) else {}
+    results = data.get('results') or payload.get('results') or []
+    task = data.get('task') or payload.get('task')
+    score_key = 'accuracy' if task == 'classification' else 'r2_test'
+    scored = [r for r in results if isinstance(r, dict) and isinstance(r.get(score_key), (int, float))]
+    best = max(scored, key=lambda r: r[score_key]) if scored else None
+    return {
+        'file': payload.get('file'),
+        'goal': payload.get('goal') or payload.get('target_col'),
+        'task': task,
+        'best_model': best.get('model') if best else None,
+        'best_score': best[score_key] if best else None,
+        'model_count': len(results),
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('analysis_history', sa.Column('file', sa.String(), nullable=True))
+    op.add_column('analysis_history', sa.Column('goal', sa.String(), nullable=True))
+    op.add_column('analysis_history', sa.Column('task', sa.String(), nullable=True))
+    op.add_column('analysis_history', sa.Column('best_model', sa.String(), nullable=True))
+    op.add_column('analysis_history', sa.Column('best_score', sa.Float(), nullable=True))
+    op.add_column('analysis_history', sa.Column('model_count', sa.Integer(), nullable=True))
+    op.create_index('ix_analysis_history_user_id_created_at', 'analysis_history',
+                    ['user_id', 'created_at'], unique=False)
+
+    history = sa.table(
+        'analysis_history',
+        sa.column('id', sa.Integer), sa.column('payload', sa.JSON),
+        sa.column('file', sa.String), sa.column('goal', sa.String), sa.column('task', sa.String),
+        sa.column('best_model', sa.String), sa.column('best_score', sa.Float),
+        sa.column('model_count', sa.Integer),
+    )
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(history.c.id, history.c.payload)
+            .where(history.c.id > last_id).order_by(history.c.id).limit(BATCH)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            bind.execute(history.update().where(history.c.id == row.id).values(**_summary(row.payload)))
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_analysis_history_user_id_created_at', table_name='analysis_history')
+    op.drop_column('analysis_history', 'model_count')
+    op.drop_column('analysis_history', 'best_score')
+    op.drop_column('analysis_history', 'best_model')
+    op.drop_column('analysis_history', 'task')
+    op.drop_column('analysis_history', 'goal')
+    op.drop_column('analysis_history', 'file')
@@ -0,0 +1,32 @@
+"""add task, training_time and metrics to model_results
+
+Revision ID: 9c3f5a17e6b2
+Revises: 4b7e2c91d0a3
+Create Date: 2026-10-18 00:27:44.903115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3f5a17e6b2'
+down_revision: Union[str, Sequence[str], None] = '4b7e2c91d0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('model_results', sa.Column('task', sa.String(), nullable=True))
+    op.add_column('model_results', sa.Column('training_time', sa.Float(), nullable=True))
+    op.add_column('model_results', sa.Column('metrics', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('model_results', 'metrics')
+    op.drop_column('model_results', 'training_time')
+    op.drop_column('model_results', 'task')
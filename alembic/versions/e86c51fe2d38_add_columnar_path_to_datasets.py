@@ -0,0 +1,28 @@
+"""add columnar_path to datasets
+
+Revision ID: e86c51fe2d38
+Revises: d653cdb733f2
+Create Date: 2026-10-17 22:50:12.418302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e86c51fe2d38'
+down_revision: Union[str, Sequence[str], None] = 'd653cdb733f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('datasets', sa.Column('columnar_path', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('datasets', 'columnar_path')
@@ -7,55 +7,74 @@ import { Button } from "@/components/ui/button"
 import { Loader, Trash2, Eye } from "lucide-react"
 import Link from "next/link"
 
+// Summary row from GET /results/history; the full payload is at /results/history/{id}
 interface HistoryItem {
+  id: number
   timestamp?: string
   file?: string
   goal?: string
+  task?: string
   status?: string
-  message?: string
-  data?: any
+  best_model?: string
+  best_score?: number
+  model_count?: number
 }
 
+const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"
+
 export default function HistoryPage() {
   const auth = useAuth()
   const [history, setHistory] = useState<HistoryItem[]>([])
+  // All of the user's analyses; history holds only the pages loaded so far
+  const [totalRuns, setTotalRuns] = useState<number | null>(null)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [error, setError] = useState("")
 
+  // Fetch one page of summaries; with a cursor it is appended to the list
+  const fetchHistory = async (cursor?: string) => {
+    try {
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : ""
+      const res = await fetch(`${API_URL}/results/history${query}`, {
+        headers: { Authorization: `Bearer ${auth.token}` },
+      })
+      if (res.status === 401) {
+        auth.handleTokenError()
+        return
+      }
+      if (res.ok) {
+        const data = await res.json()
+        const page: HistoryItem[] = Array.isArray(data.history) ? data.history : []
+        setHistory((prev) => (cursor ? [...prev, ...page] : page))
+        setNextCursor(data.next_cursor ?? null)
+        if (typeof data.total_runs === "number") setTotalRuns(data.total_runs)
+      } else {
+        setError("Failed to fetch history")
+      }
+    } catch (err) {
+      console.error("Failed to fetch history:", err)
+      setError("Error loading history")
+    }
+  }
+
   useEffect(() => {
     // Only fetch after token is available
     if (!auth.token) return
-
-    const fetchHistory = async () => {
-      try {
-        const res = await fetch(`${process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"}/results/history`, {
-          headers: { Authorization: `Bearer ${auth.token}` },
-        })
-        if (res.status === 401) {
-          auth.handleTokenError()
-          return
-        }
-        if (res.ok) {
-          const data = await res.json()
-          if (data.history) {
-            setHistory(Array.isArray(data.history) ? data.history : [])
-          }
-        } else {
-          setError("Failed to fetch history")
-        }
-      } catch (err) {
-        console.error("Failed to fetch history:", err)
-        setError("Error loading history")
-      } finally {
-        setLoading(false)
-      }
-    }
-    fetchHistory()
+    fetchHistory().finally(() => setLoading(false))
   }, [auth.token])
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    await fetchHistory(nextCursor)
+    setLoadingMore(false)
+  }
+
   const handleDelete = async (index: number) => {
     const newHistory = history.filter((_, i) => i !== index)
     setHistory(newHistory)
+    setTotalRuns((total) => (total != null ? Math.max(total - 1, 0) : total))
   }
 
   if (loading) {
@@ -91,7 +110,7 @@ export default function HistoryPage() {
         <div className="space-y-4">
           {history.map((item, idx) => (
             <Card
-              key={idx}
+              key={item.id ?? idx}
               className="border-border/40 bg-card/50 backdrop-blur-sm hover:border-border/60 transition p-6"
             >
               <div className="flex items-start justify-between">
@@ -128,38 +147,21 @@ export default function HistoryPage() {
                   </div>
 
                   {/* Model Stats */}
-                  {item.data?.models && (
-                    <div className="grid md:grid-cols-4 gap-3 text-sm">
+                  {item.best_model && (
+                    <div className="grid md:grid-cols-3 gap-3 text-sm">
                       <div className="bg-background/50 rounded p-3">
-                        <p className="text-foreground/60">Best Accuracy</p>
-                        <p className="text-xl font-bold text-primary">
-                          {(Math.max(...item.data.models.map((m: any) => m.accuracy || 0)) * 100).toFixed(2)}%
-                        </p>
+                        <p className="text-foreground/60">Best Model</p>
+                        <p className="text-xl font-bold text-primary">{item.best_model}</p>
                       </div>
                       <div className="bg-background/50 rounded p-3">
-                        <p className="text-foreground/60">Avg Accuracy</p>
-                        <p className="text-xl font-bold">
-                          {(
-                            (item.data.models.reduce((a: number, m: any) => a + (m.accuracy || 0), 0) /
-                              item.data.models.length) *
-                            100
-                          ).toFixed(2)}
-                          %
+                        <p className="text-foreground/60">
+                          {item.task === "classification" ? "Best Accuracy" : "Best R²"}
                         </p>
+                        <p className="text-xl font-bold">{((item.best_score || 0) * 100).toFixed(2)}%</p>
                       </div>
                       <div className="bg-background/50 rounded p-3">
                         <p className="text-foreground/60">Models Tested</p>
-                        <p className="text-xl font-bold">{item.data.models.length}</p>
-                      </div>
-                      <div className="bg-background/50 rounded p-3">
-                        <p className="text-foreground/60">Avg Time</p>
-                        <p className="text-xl font-bold">
-                          {(
-                            item.data.models.reduce((a: number, m: any) => a + (m.trainingTime || 0), 0) /
-                            item.data.models.length
-                          ).toFixed(2)}
-                          s
-                        </p>
+                        <p className="text-xl font-bold">{item.model_count || 0}</p>
                       </div>
                     </div>
                   )}
@@ -184,6 +186,15 @@ export default function HistoryPage() {
               </div>
             </Card>
           ))}
+
+          {nextCursor && (
+            <div className="flex justify-center">
+              <Button variant="outline" onClick={handleLoadMore} disabled={loadingMore}>
+                {loadingMore && <Loader className="w-4 h-4 mr-2 animate-spin" />}
+                Load more
+              </Button>
+            </div>
+          )}
         </div>
       )}
 
@@ -191,24 +202,24 @@ export default function HistoryPage() {
       {history.length > 0 && (
         <Card className="border-border/40 bg-gradient-to-br from-primary/10 to-accent/10 backdrop-blur-sm p-6">
           <h2 className="text-xl font-semibold mb-4">Overall Statistics</h2>
+          {nextCursor && (
+            <p className="text-sm text-foreground/60 -mt-2 mb-4">
+              Scores, models and datasets cover the {history.length} analyses loaded so far.
+            </p>
+          )}
           <div className="grid md:grid-cols-4 gap-4">
             <div>
               <p className="text-sm text-foreground/60">Total Analyses</p>
-              <p className="text-3xl font-bold text-primary">{history.length}</p>
+              <p className="text-3xl font-bold text-primary">{totalRuns ?? history.length}</p>
             </div>
             <div>
-              <p className="text-sm text-foreground/60">Avg Best Accuracy</p>
+              <p className="text-sm text-foreground/60">Avg Best Score</p>
               <p className="text-3xl font-bold">
                 {(
-                  history.length > 0
-                    ? (
-                        history
-                          .filter((h) => h.data?.models && h.data.models.length > 0)
-                          .reduce(
-                            (acc, h) => acc + Math.max(...h.data!.models.map((m: any) => m.accuracy || 0)),
-                            0
-                          ) / history.filter((h) => h.data?.models && h.data.models.length > 0).length
-                      ) * 100
+                  history.filter((h) => h.best_score != null).length > 0
+                    ? (history.reduce((acc, h) => acc + (h.best_score || 0), 0) /
+                        history.filter((h) => h.best_score != null).length) *
+                      100
                     : 0
                 ).toFixed(2)}
                 %
@@ -217,7 +228,7 @@ export default function HistoryPage() {
             <div>
               <p className="text-sm text-foreground/60">Total Models Tested</p>
               <p className="text-3xl font-bold">
-                {history.reduce((acc, h) => acc + (h.data?.models?.length || 0), 0)}
+                {history.reduce((acc, h) => acc + (h.model_count || 0), 0)}
               </p>
             </div>
             <div>
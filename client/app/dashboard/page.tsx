@@ -113,7 +113,24 @@ export default function Dashboard() {
         throw new Error(text || "Evaluation failed")
       }
 
-      const data: EvaluationResult = await res.json()
+      // Evaluation runs as a background job: poll it until it finishes
+      const job = await res.json()
+      let data: EvaluationResult = job
+      if (job.job_id) {
+        while (true) {
+          await new Promise((resolve) => setTimeout(resolve, 1000))
+          const jobRes = await fetch(`${process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"}/model/jobs/${job.job_id}`, {
+            headers: { Authorization: `Bearer ${auth.token}` },
+          })
+          if (!jobRes.ok) throw new Error("Failed to fetch evaluation status")
+          const status = await jobRes.json()
+          if (status.status === "failed") throw new Error(status.error || "Evaluation failed")
+          if (status.status === "completed") {
+            data = { ...status, status: "success", dataset_id: status.dataset_id }
+            break
+          }
+        }
+      }
       setResults(data)
 
       // Parse model results from response (use live data only)
@@ -130,19 +147,7 @@ export default function Dashboard() {
       })
       setModelResults(mapped)
 
-      // Save result to history
-      try {
-        await fetch(`${process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"}/results/save`, {
-          method: "POST",
-          headers: { 
-            "Content-Type": "application/json",
-            Authorization: `Bearer ${auth.token}`,
-          },
-          body: JSON.stringify({ file: file.name, goal, ...data }),
-        })
-      } catch (e) {
-        // ignore save errors
-      }
+      // The server stores the history entry together with the results
     } catch (err: any) {
       setError(err?.message || "Evaluation failed")
     } finally {
@@ -0,0 +1,144 @@
+"""In-memory registry of asynchronous evaluation jobs.
+
+``POST /model/evaluate`` creates a ``Job`` and returns its id immediately; the
+evaluation itself runs on the worker pool and reports back through the job:
+``start`` once the task type and model list are known, ``add_result`` as each
+model's future finishes, then ``complete`` or ``fail``.
+
+Every state change is also published as an event. SSE subscribers get an
+``asyncio.Queue`` that is replayed with past events and then fed live ones
+from the worker threads via ``call_soon_threadsafe``.
+"""
+import asyncio
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+# Finished jobs are forgotten after this many seconds
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+TERMINAL_STATES = ("completed", "failed")
+
+
+class Job:
+    def __init__(self, user_id: Optional[int], **meta):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.meta = meta
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[str] = None
+        self.total_models: Optional[int] = None
+        self.results: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._subscribers: List[tuple] = []
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+    def start(self, task: str, model_names: List[str]):
+        self.status = "running"
+        self.task = task
+        self.total_models = len(model_names)
+        self._publish({"event": "started", "task": task, "models": model_names})
+
+    def add_result(self, result: Dict[str, Any]):
+        self.results.append(result)
+        self._publish({"event": "result", "result": result, "progress": self.progress()})
+
+    def complete(self, result: Dict[str, Any]):
+        self.result = result
+        self.status = "completed"
+        self.finished_at = time.time()
+        self._publish({"event": "completed", "data": result})
+
+    def fail(self, error: str):
+        self.error = error
+        self.status = "failed"
+        self.finished_at = time.time()
+        self._publish({"event": "failed", "error": error})
+
+    def progress(self) -> Dict[str, Any]:
+        completed = len(self.results)
+        fraction = completed / self.total_models if self.total_models else 0.0
+        if self.status == "completed":
+            fraction = 1.0
+        return {"completed": completed, "total": self.total_models, "fraction": round(fraction, 3)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "task": self.task,
+            "progress": self.progress(),
+            "results": list(self.results),
+            "data": self.result,
+            "error": self.error,
+            **self.meta,
+        }
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue of events for the calling event loop, starting with a replay."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            for event in self._events:
+                queue.put_nowait(event)
+            if not self.done:
+                self._subscribers.append((loop, queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = [(l, q) for l, q in self._subscribers if q is not queue]
+
+    def _publish(self, event: Dict[str, Any]):
+        with self._lock:
+            self._events.append(event)
+            subscribers = list(self._subscribers)
+            if self.done:
+                self._subscribers = []
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Subscriber's loop has already closed
+                pass
+
+
+class JobStore:
+    def __init__(self, ttl_seconds: int = JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def create(self, user_id: Optional[int], **meta) -> Job:
+        job = Job(user_id, **meta)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_store = JobStore()
@@ -0,0 +1,27 @@
+"""Metrics of the web app, on the ML engine's registry.
+
+The registry, the metric types and the engine's own metrics live in
+``ml_engine.metrics`` and are re-exported here, so the app keeps importing
+everything from ``core.metrics`` and ``GET /metrics`` renders both.
+"""
+from ml_engine.metrics import (  # noqa: F401
+    ACTIVE_FITS,
+    MODEL_FIT_SECONDS,
+    MODEL_FITS,
+    MODEL_PREDICT_SECONDS,
+    STAGE_SECONDS,
+    Counter,
+    Family,
+    Gauge,
+    Histogram,
+    Registry,
+    counter_family,
+    gauge_family,
+    registry,
+    span,
+)
+
+EVALUATIONS = registry.counter("evaluations_total", "Finished evaluations by outcome", ["status"])
+BYTES_INGESTED = registry.counter(
+    "bytes_ingested_total", "Bytes of uploaded datasets written to disk", ["source"]
+)
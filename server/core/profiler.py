@@ -0,0 +1,106 @@
+"""Sampling profiler for single evaluation runs.
+
+``SamplingProfiler`` is a context manager. While it is active, a background
+thread reads ``sys._current_frames()`` every ``PROFILE_INTERVAL_SECONDS``
+and counts the stacks of:
+
+- the thread that entered the context (the evaluation runner), and
+- the threads of the profiler's own fit executor (see ``executor``).
+
+Nothing is traced, so the overhead stays at a few percent whatever the
+estimators do. The counts are written in the "folded" format (one
+``frame;frame;... count`` line per distinct stack). flamegraph.pl,
+speedscope and most other flame-graph viewers read it directly.
+
+Fits that run in other processes are invisible to the sampler, which is why
+profiled runs fit on the profiler's executor threads.
+"""
+import concurrent.futures
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, Optional
+
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.005"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "server/profiles")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.seconds = 0.0
+        self._prefix = f"profiled-fit-{uuid.uuid4().hex[:8]}"
+        self._target: Optional[int] = None
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def executor(self, max_workers: int = None) -> concurrent.futures.ThreadPoolExecutor:
+        """A thread executor for this run's fits; its threads are sampled too."""
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers or os.cpu_count() or 1, thread_name_prefix=self._prefix
+            )
+        return self._executor
+
+    def __enter__(self):
+        self._target = threading.get_ident()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self._started
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self._target:
+                    root = "evaluation"
+                elif names.get(ident, "").startswith(self._prefix):
+                    root = "fit"
+                else:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(root)
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def save(self, name: str) -> str:
+        """Write the folded stacks to ``PROFILE_DIR/<name>.folded``; returns the path."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{name}.folded")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(self.folded())
+        return path
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "seconds": round(self.seconds, 3),
+            "interval": self.interval,
+            "format": "folded",
+        }
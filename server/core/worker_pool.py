@@ -0,0 +1,141 @@
+"""Server-wide worker pool for model evaluations.
+
+One pool is created when the app starts (see ``main.py``) and shared by every
+request, instead of each ``/model/evaluate`` call building and tearing down its
+own executor inside the event loop. It has two parts:
+
+- an evaluation runner with ``EVAL_MAX_CONCURRENT`` threads that loads the
+  dataset and orchestrates one evaluation each, and
+- a fit executor (threads or processes, per ``MODEL_EXECUTOR``) shared by all
+  running evaluations for the per-model fits.
+
+Starting the pool also starts the fork server that budgeted fits run in
+(``ml_engine.budget.warm_up``).
+
+At most ``EVAL_MAX_QUEUE`` evaluations may wait for a runner slot; beyond that
+``submit`` raises ``PoolSaturated`` so the API can answer 503 right away.
+"""
+import asyncio
+import concurrent.futures
+import os
+import threading
+from typing import Optional
+
+from core.metrics import gauge_family, registry
+from ml_engine.budget import warm_up
+from ml_engine.model_runner import MODEL_EXECUTOR, MODEL_MAX_WORKERS
+
+EVAL_MAX_CONCURRENT = int(os.getenv("EVAL_MAX_CONCURRENT", "4"))
+EVAL_MAX_QUEUE = int(os.getenv("EVAL_MAX_QUEUE", "50"))
+
+
+class PoolSaturated(Exception):
+    """Raised when the evaluation queue is already at its configured depth."""
+
+
+class EvaluationPool:
+    def __init__(
+        self,
+        max_concurrent: int = EVAL_MAX_CONCURRENT,
+        max_queue: int = EVAL_MAX_QUEUE,
+        backend: str = MODEL_EXECUTOR,
+        fit_workers: Optional[int] = MODEL_MAX_WORKERS,
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.backend = backend
+        fit_workers = fit_workers or os.cpu_count() or 1
+
+        self._runner = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_concurrent, thread_name_prefix="evaluation"
+        )
+        if backend == "process":
+            self.fit_executor = concurrent.futures.ProcessPoolExecutor(max_workers=fit_workers)
+        elif backend == "thread":
+            self.fit_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=fit_workers, thread_name_prefix="model-fit"
+            )
+        else:
+            self.fit_executor = None
+
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Evaluations currently running or waiting for a slot."""
+        return self._pending
+
+    def submit(self, fn, *args, **kwargs) -> concurrent.futures.Future:
+        """Queue ``fn(*args, executor=<fit executor>, **kwargs)`` on the runner."""
+        with self._lock:
+            if self._pending >= self.max_concurrent + self.max_queue:
+                raise PoolSaturated(
+                    f"Evaluation queue is full ({self.max_queue} waiting); try again shortly."
+                )
+            self._pending += 1
+
+        if self.fit_executor is not None:
+            kwargs.setdefault("executor", self.fit_executor)
+        else:
+            kwargs.setdefault("backend", "sequential")
+        try:
+            future = self._runner.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """Awaitable ``submit`` for use inside async handlers."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self):
+        self._runner.shutdown(wait=True, cancel_futures=True)
+        if self.fit_executor is not None:
+            self.fit_executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool: Optional[EvaluationPool] = None
+
+
+def start_pool() -> EvaluationPool:
+    global _pool
+    if _pool is None:
+        _pool = EvaluationPool()
+        # Budgeted fits fork from here; start it now, not in the first fit
+        warm_up()
+    return _pool
+
+
+def get_pool() -> EvaluationPool:
+    """Return the running pool, starting it lazily (e.g. for scripts)."""
+    return _pool or start_pool()
+
+
+def stop_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+def _pool_metrics():
+    pool = _pool
+    if pool is None:
+        return []
+    return [
+        gauge_family("evaluation_pending", "Evaluations running or waiting for a runner slot", pool.pending),
+        gauge_family("evaluation_queue_depth", "Evaluations waiting for a runner slot",
+                     max(0, pool.pending - pool.max_concurrent)),
+        gauge_family("evaluation_capacity", "Evaluations that may be pending before submit is refused",
+                     pool.max_concurrent + pool.max_queue),
+    ]
+
+
+registry.register_collector(_pool_metrics)
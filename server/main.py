@@ -1,9 +1,22 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from core import worker_pool
+from core.metrics import registry
 from routers import auth_router, dataset_router, model_router, result_router, history_router
 from routers import chat_router
 
-app = FastAPI(title="Model Vadivamaipu Backend")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One evaluation pool for the whole server, shared by all requests
+    worker_pool.start_pool()
+    yield
+    worker_pool.stop_pool()
+
+
+app = FastAPI(title="Model Vadivamaipu Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,6 +30,11 @@ app.add_middleware(
 def root():
     return {"message": "🚀 Model Vadivamaipu backend is running"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of the server's counters, gauges and histograms."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # include routers
 app.include_router(auth_router.router, prefix="/auth", tags=["Auth"])
 app.include_router(dataset_router.router, prefix="/dataset", tags=["Dataset"])
@@ -0,0 +1,189 @@
+# server/ml_engine/budget.py
+"""Run a model fit in its own process under a wall-clock and memory budget.
+
+A fit inside a thread cannot be interrupted, and one that runs away (linear
+SVR on a few hundred thousand rows, say) holds its worker until it ends.
+`run_isolated` starts a child process per fit instead. The parent waits for
+the result at most until the time budget runs out and then kills the child.
+The child caps its own address space with RLIMIT_AS, so an oversized
+allocation fails in the child instead of growing the server.
+
+The budget covers the fit, not the child's start-up. Starting the fork
+server and importing scikit-learn takes seconds, so ``warm_up`` does it
+once when the worker pool starts. Each child then reports "ready" once it
+is set up, and only from then on does the parent count the fit's time.
+
+Either way the fit is reported as
+``{"model": name, "error": "budget_exceeded", "budget": {...}}``.
+"""
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows; memory budgets are then not enforced
+    resource = None
+
+# Per-request wall-clock budget across all of a run's fits (0 = unlimited)
+REQUEST_TIME_BUDGET_SECONDS = float(os.getenv("REQUEST_TIME_BUDGET_SECONDS", "0"))
+# The server is multithreaded (request handlers, pool runners, BLAS and
+# Arrow thread pools), and a child forked from it can deadlock on a lock
+# another thread held at fork time. "forkserver" forks children from a
+# single-threaded server process instead; "fork" is faster but only safe
+# from a single-threaded caller such as a script
+BUDGET_START_METHOD = os.getenv(
+    "BUDGET_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+# Imported once by the fork server, so children start with them loaded
+FORKSERVER_PRELOAD = ["ml_engine.model_runner"]
+# How long a child may take to get ready before the fit counts as failed;
+# not part of the fit's time budget
+BUDGET_STARTUP_SECONDS = float(os.getenv("BUDGET_STARTUP_SECONDS", "60"))
+# The fork server is started with a fresh interpreter that only sees
+# PYTHONPATH, not this process's sys.path, and it skips preload modules it
+# cannot import
+SERVER_DIR = str(Path(__file__).resolve().parents[1])
+
+_context = None
+
+
+def budget_exceeded(name: str, kind: str, limit: Optional[float]) -> Dict[str, Any]:
+    """The result reported for a fit stopped by a budget.
+
+    ``kind`` is "time", "memory" or "request" (the request's overall
+    deadline passed before or during the fit).
+    """
+    return {"model": name, "error": "budget_exceeded", "budget": {"kind": kind, "limit": limit}}
+
+
+def deadline_for(request_budget: Optional[float]) -> Optional[float]:
+    """Absolute ``time.monotonic()`` deadline for a request budget (None = none)."""
+    request_budget = REQUEST_TIME_BUDGET_SECONDS if request_budget is None else request_budget
+    return time.monotonic() + request_budget if request_budget else None
+
+
+def _get_context():
+    global _context
+    if _context is None:
+        ctx = multiprocessing.get_context(BUDGET_START_METHOD)
+        if BUDGET_START_METHOD == "forkserver":
+            paths = os.environ.get("PYTHONPATH", "").split(os.pathsep)
+            if SERVER_DIR not in paths:
+                os.environ["PYTHONPATH"] = os.pathsep.join(p for p in [SERVER_DIR] + paths if p)
+            ctx.set_forkserver_preload(FORKSERVER_PRELOAD)
+        _context = ctx
+    return _context
+
+
+def _preloaded() -> bool:
+    return all(name in sys.modules for name in FORKSERVER_PRELOAD)
+
+
+def warm_up() -> bool:
+    """Start the fork server and wait until it has imported ``FORKSERVER_PRELOAD``.
+
+    Call once at start-up (``core.worker_pool.start_pool``) so the first
+    budgeted fit does not pay for it. Returns whether a child starts with
+    the preload modules loaded; it never does with "spawn" or "fork".
+    """
+    ctx = _get_context()
+    if BUDGET_START_METHOD != "forkserver":
+        return False
+    start = time.monotonic()
+    with ctx.Pool(1) as pool:
+        # The first child is forked once the server has finished preloading
+        ok = pool.apply(_preloaded)
+    if not ok:
+        print(f"Budget fork server could not import {FORKSERVER_PRELOAD}; budgeted fits will import them per fit")
+    print(f"Budget fork server ready in {time.monotonic() - start:.1f}s")
+    return ok
+
+
+def _address_space_bytes() -> int:
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmSize:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def _child(conn, memory_mb: Optional[float], fn: Callable, args: Tuple):
+    if memory_mb and resource is not None:
+        # The limit is on total address space, which already includes the
+        # interpreter, its libraries and (after fork) the parent's mappings,
+        # so the budget is added on top of what is mapped now
+        limit = _address_space_bytes() + int(memory_mb * 1024 ** 2)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    # fn and args are unpickled (and their modules imported) by now
+    conn.send(("ready", None))
+    try:
+        conn.send(("ok", fn(*args)))
+    except MemoryError:
+        conn.send(("memory", None))
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+
+def run_isolated(name: str, fn: Callable, args: Tuple,
+                 time_budget: Optional[float] = None, memory_mb: Optional[float] = None,
+                 deadline: Optional[float] = None) -> Dict[str, Any]:
+    """Return ``fn(*args)`` computed in a child process, or a budget error.
+
+    ``time_budget`` (seconds) and ``memory_mb`` bound this fit; ``deadline``
+    (a ``time.monotonic()`` value) bounds the whole request, so the fit
+    gets whichever runs out first. Both are counted from the moment the
+    child is ready to call ``fn``. ``fn`` must return the result dict and
+    let ``MemoryError`` propagate.
+    """
+    if deadline is not None and deadline <= time.monotonic():
+        return budget_exceeded(name, "request", None)
+
+    ctx = _get_context()
+    receiver, sender = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(sender, memory_mb, fn, args), daemon=True)
+    proc.start()
+    sender.close()
+
+    def receive(timeout):
+        if not receiver.poll(timeout):
+            return "timeout", None
+        try:
+            return receiver.recv()
+        except EOFError:
+            return "crashed", None
+
+    try:
+        status, value = receive(BUDGET_STARTUP_SECONDS)
+        if status == "timeout":
+            status, value = "error", f"fit process did not start within {BUDGET_STARTUP_SECONDS:g}s"
+        elif status == "ready":
+            timeout, kind, limit = time_budget or None, "time", time_budget
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+                if timeout is None or remaining < timeout:
+                    timeout, kind, limit = remaining, "request", None
+            status, value = receive(timeout)
+    finally:
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        receiver.close()
+
+    if status == "ok":
+        return value
+    if status == "timeout":
+        return budget_exceeded(name, kind, limit)
+    if status == "memory" or (status == "crashed" and memory_mb):
+        # A child that died without reporting under a memory cap almost
+        # always failed an allocation outside Python (e.g. in BLAS)
+        return budget_exceeded(name, "memory", memory_mb)
+    if status == "crashed":
+        return {"model": name, "error": f"fit process exited with code {proc.exitcode}"}
+    return {"model": name, "error": value}
@@ -0,0 +1,166 @@
+# server/ml_engine/columnar.py
+"""Typed columnar (Parquet) copies of uploaded datasets.
+
+Every evaluation, preview or re-run of a CSV/XLSX upload used to re-parse the
+text. At upload time we now also write a Parquet copy next to the original
+(``<file>.parquet``) and record it on the ``Dataset`` row. Readers can then
+load only the columns they need, and only the row groups that hold the rows
+they sampled.
+
+pyarrow is optional: without it ``write_columnar`` returns None and callers
+keep using the original file.
+"""
+import json
+import os
+import uuid
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pa_csv = pq = None
+
+# Rows per Parquet row group; also the unit of memory when sampling
+ROW_GROUP_ROWS = int(os.getenv("PARQUET_ROW_GROUP_ROWS", "65536"))
+# Schema metadata key holding ``write_frame``'s JSON metadata
+FRAME_METADATA_KEY = b"model_vadivamaipu"
+
+
+def columnar_available() -> bool:
+    return pq is not None
+
+
+def columnar_path_for(file_path: str) -> str:
+    return file_path + ".parquet"
+
+
+def write_columnar(file_path: str, delimiter: Optional[str] = None, encoding: Optional[str] = None,
+                   reuse_existing: bool = False) -> Optional[str]:
+    """Write a Parquet copy of a CSV/XLSX upload; return its path or None.
+
+    CSVs are converted block by block with Arrow's streaming reader, so memory
+    stays bounded. ``delimiter`` and ``encoding`` are the ones sniffed at
+    upload (default: comma, UTF-8). With ``reuse_existing`` an existing copy
+    is returned as is; this is only safe for content-addressed uploads,
+    whose path changes whenever the bytes do. Any failure (no pyarrow, a
+    column whose type changes partway through the file, ...) leaves no copy
+    behind and returns None.
+    """
+    if not columnar_available():
+        return None
+    out_path = columnar_path_for(file_path)
+    if reuse_existing and os.path.exists(out_path):
+        return out_path
+    # Unique, so concurrent uploads of the same bytes don't write to one temp file
+    tmp_path = f"{out_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        if file_path.endswith(".csv"):
+            read_options = pa_csv.ReadOptions(block_size=16 << 20)
+            if encoding and encoding not in ("utf-8", "utf-8-sig"):
+                read_options.encoding = encoding
+            reader = pa_csv.open_csv(
+                file_path, read_options=read_options,
+                parse_options=pa_csv.ParseOptions(delimiter=delimiter or ",")
+            )
+            with pq.ParquetWriter(tmp_path, reader.schema) as writer:
+                for batch in reader:
+                    writer.write_batch(batch, row_group_size=ROW_GROUP_ROWS)
+        elif file_path.endswith(".xlsx"):
+            import pandas as pd
+            table = pa.Table.from_pandas(pd.read_excel(file_path), preserve_index=False)
+            pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_ROWS)
+        else:
+            return None
+        os.replace(tmp_path, out_path)
+        return out_path
+    except Exception as e:
+        print(f"Columnar copy of {file_path} failed: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+
+def parquet_shape(path: str):
+    """(rows, column names) from the Parquet footer, without reading data."""
+    pf = pq.ParquetFile(path)
+    return pf.metadata.num_rows, pf.schema_arrow.names
+
+
+def iter_parquet_column(path: str, column: str, batch_rows: int = ROW_GROUP_ROWS):
+    """Yield one column as pandas Series, a batch at a time."""
+    pf = pq.ParquetFile(path)
+    for batch in pf.iter_batches(batch_size=batch_rows, columns=[column]):
+        yield batch.column(0).to_pandas()
+
+
+def iter_parquet_batches(path: str, columns: Optional[List[str]] = None, batch_rows: int = ROW_GROUP_ROWS):
+    """Yield the file (optionally only `columns`) as DataFrames of `batch_rows` rows."""
+    pf = pq.ParquetFile(path)
+    for batch in pf.iter_batches(batch_size=batch_rows, columns=columns):
+        yield batch.to_pandas()
+
+
+def read_parquet_head(path: str, n: int, columns: Optional[List[str]] = None):
+    """First `n` rows (optionally only `columns`), touching as few row groups as needed."""
+    pf = pq.ParquetFile(path)
+    batches = []
+    remaining = n
+    for batch in pf.iter_batches(batch_size=max(n, 1), columns=columns):
+        batches.append(batch.slice(0, remaining))
+        remaining -= batches[-1].num_rows
+        if remaining <= 0:
+            break
+    if not batches:
+        return pf.schema_arrow.empty_table().to_pandas()
+    return pa.Table.from_batches(batches).to_pandas()
+
+
+def read_parquet_rows(path: str, rows: np.ndarray, columns: Optional[List[str]] = None):
+    """Read the given row positions, one row group at a time."""
+    pf = pq.ParquetFile(path)
+    sizes = [pf.metadata.row_group(i).num_rows for i in range(pf.num_row_groups)]
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    rows = np.sort(np.asarray(rows, dtype=np.int64))
+    groups = np.searchsorted(starts, rows, side="right") - 1
+
+    parts = []
+    for group in np.unique(groups):
+        local = rows[groups == group] - starts[group]
+        parts.append(pf.read_row_group(int(group), columns=columns).take(pa.array(local)))
+    if not parts:
+        return pf.schema_arrow.empty_table().select(columns or pf.schema_arrow.names).to_pandas()
+    return pa.concat_tables(parts).to_pandas()
+
+
+def write_frame(df, path: str, metadata: Optional[dict] = None) -> bool:
+    """Store a DataFrame as Parquet, with JSON ``metadata`` in the schema.
+
+    The file is written under a temporary name and renamed into place.
+    Returns False (leaving nothing behind) without pyarrow or on failure.
+    """
+    if not columnar_available():
+        return False
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        schema_metadata = dict(table.schema.metadata or {})
+        schema_metadata[FRAME_METADATA_KEY] = json.dumps(metadata or {}, default=str).encode()
+        pq.write_table(table.replace_schema_metadata(schema_metadata), tmp_path, row_group_size=ROW_GROUP_ROWS)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        print(f"Storing {path} failed: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def read_frame(path: str):
+    """(DataFrame, metadata) of a file written by ``write_frame``."""
+    table = pq.read_table(path)
+    metadata = json.loads((table.schema.metadata or {}).get(FRAME_METADATA_KEY, b"{}"))
+    return table.to_pandas(), metadata
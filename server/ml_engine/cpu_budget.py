@@ -0,0 +1,185 @@
+# server/ml_engine/cpu_budget.py
+"""Share the machine's cores between concurrently running model fits.
+
+Several fits run at once within one evaluation and several evaluations may
+run at once, so an estimator cannot simply use ``n_jobs=-1``. Each
+evaluation asks `allocate_shares` to split the cores between its models in
+proportion to their estimated cost; models without ``n_jobs`` get one core.
+Each fit then leases its share from the process-wide `cpu_budget` for as
+long as it runs. A lease grants at most the cores that are free at that
+moment, and never less than one. Concurrent evaluations therefore shrink
+each other's grants instead of oversubscribing the machine.
+
+Where a fit runs in its own process, `limit_native_threads` also caps the
+BLAS/OpenMP thread pools to the grant, using the optional `threadpoolctl`
+package (installed with scikit-learn). It also switches joblib to threads
+there: its default process backend refuses to start inside the daemonic
+processes fits run in and falls back to one job.
+
+Fits on threads share the server's BLAS/OpenMP pools, which are global
+and can't be sized per fit. While any of them runs, `shared_native_threads`
+caps those pools to the budget divided by the number of fits running. The
+cap is recomputed as fits start and finish, and the original limits come
+back when the last one ends.
+"""
+import contextlib
+import os
+import threading
+from typing import Dict
+
+from ml_engine.metrics import gauge_family, registry
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:  # pragma: no cover - optional
+    threadpool_limits = None
+
+try:
+    from joblib import parallel_config
+except ImportError:  # pragma: no cover - optional
+    parallel_config = None
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects CPU affinity / container limits)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Cores model fits may use in total (default: all available)
+CPU_BUDGET_CORES = int(os.getenv("CPU_BUDGET_CORES", "0")) or available_cores()
+
+
+class CpuBudget:
+    def __init__(self, total: int = CPU_BUDGET_CORES):
+        self.total = max(1, total)
+        self.in_use = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, want: int) -> int:
+        """Take up to ``want`` free cores (at least one); returns the grant."""
+        with self._lock:
+            granted = max(1, min(want, self.total - self.in_use))
+            self.in_use += granted
+            return granted
+
+    def release(self, cores: int):
+        with self._lock:
+            self.in_use = max(0, self.in_use - cores)
+
+    @contextlib.contextmanager
+    def lease(self, want: int):
+        cores = self.acquire(want)
+        try:
+            yield cores
+        finally:
+            self.release(cores)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"total": self.total, "in_use": self.in_use}
+
+
+cpu_budget = CpuBudget()
+
+
+def _cpu_metrics():
+    stats = cpu_budget.stats()
+    return [
+        gauge_family("cpu_budget_cores", "Cores model fits may use in total", stats["total"]),
+        gauge_family("cpu_budget_cores_in_use", "Cores leased to running fits", stats["in_use"]),
+    ]
+
+
+registry.register_collector(_cpu_metrics)
+
+
+def allocate_shares(costs: Dict[str, float], parallel: Dict[str, bool], cores: int = None) -> Dict[str, int]:
+    """Split ``cores`` between models by estimated cost.
+
+    Models with ``parallel[name]`` false always get one core. The remaining
+    cores go to the parallel ones in proportion to ``costs`` (largest
+    remainder rounding), at least one each.
+    """
+    cores = cores or cpu_budget.total
+    shares = {name: 1 for name in costs}
+    scalable = [name for name in costs if parallel.get(name)]
+    spare = cores - len(costs)
+    total_cost = sum(costs[name] for name in scalable)
+    if not scalable or spare <= 0 or total_cost <= 0:
+        return shares
+
+    exact = {name: spare * costs[name] / total_cost for name in scalable}
+    for name in scalable:
+        shares[name] += int(exact[name])
+    leftover = spare - sum(int(v) for v in exact.values())
+    for name in sorted(scalable, key=lambda n: exact[n] - int(exact[n]), reverse=True)[:leftover]:
+        shares[name] += 1
+    return shares
+
+
+def set_n_jobs(model, cores: int):
+    """Give ``model`` ``cores`` workers if it takes ``n_jobs``; returns the model.
+
+    A single core leaves an unset ``n_jobs`` alone (it already means one),
+    so estimators that deprecate the parameter are not touched.
+    """
+    params = model.get_params()
+    if "n_jobs" in params and (cores > 1 or params["n_jobs"] not in (None, 1)):
+        model.set_params(n_jobs=cores)
+    return model
+
+
+class _SharedNativeThreads:
+    def __init__(self):
+        self.running = 0
+        self._limiter = None
+        self._lock = threading.Lock()
+
+    def _apply(self):
+        if self.running:
+            limiter = threadpool_limits(limits=max(1, cpu_budget.total // self.running))
+            # The first limiter remembers the limits to go back to
+            self._limiter = self._limiter or limiter
+        elif self._limiter is not None:
+            self._limiter.restore_original_limits()
+            self._limiter = None
+
+    @contextlib.contextmanager
+    def hold(self):
+        if threadpool_limits is None:
+            yield
+            return
+        with self._lock:
+            self.running += 1
+            self._apply()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.running -= 1
+                self._apply()
+
+
+_shared_native_threads = _SharedNativeThreads()
+
+
+def shared_native_threads():
+    """Context for a fit on a thread of this process: keeps its share of the global BLAS/OpenMP pools."""
+    return _shared_native_threads.hold()
+
+
+@contextlib.contextmanager
+def limit_native_threads(cores: int):
+    """Cap BLAS/OpenMP threads in this process and run joblib on threads."""
+    if not cores:
+        yield
+        return
+    with contextlib.ExitStack() as stack:
+        if threadpool_limits is not None:
+            stack.enter_context(threadpool_limits(limits=cores))
+        if parallel_config is not None:
+            stack.enter_context(parallel_config(backend="threading", n_jobs=cores))
+        yield
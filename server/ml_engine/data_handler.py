@@ -1,77 +1,403 @@
 # server/ml_engine/data_handler.py
 import pandas as pd
 import numpy as np
-import json
+import hashlib
 import os
-import requests  # to call Gemini API
 
-# You can store your Gemini API key in .env or environment variable
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "your_gemini_api_key_here")
+from ml_engine.sampling_policy import DatasetStats, SampleSizePolicy, get_policy
+from ml_engine.sampling import (
+    MIN_PER_STRATUM, SAMPLING_BINS, SAMPLING_SEED, SAMPLING_STRATEGY,
+    BottomK, Strata, allocate, resolve_strategy, sampling_seed, strata_report,
+)
+from ml_engine.sketches import TDigest
+from ml_engine import columnar
+from ml_engine.metrics import span
 
-def ask_gemini_for_sample_size(row_count: int, column_count: int) -> int:
+# Datasets up to this many rows are used in full; larger ones are sampled
+FULL_DATASET_MAX_ROWS = 1000
+
+# Rows per chunk when streaming a CSV for sampling
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "100000"))
+
+# Above this many distinct values a numeric target is treated as continuous
+# (mirrors the task heuristic in model_runner)
+MAX_CLASS_LABELS = 20
+# Stop tracking label counts past this many (e.g. an ID-like text column)
+MAX_TRACKED_LABELS = 10000
+# Strata listed in the sampling record; more are summarised by the count only
+MAX_REPORTED_STRATA = 50
+
+
+def label_strings(values: pd.Series) -> pd.Series:
+    """Class labels (no missing values) as text, the same for every chunk.
+
+    A chunk with missing values parses an integer column as float, which
+    would turn label 1 into "1.0" in that chunk only.
     """
-    Uses Gemini API to determine how many samples to take from the dataset
-    based on its size and complexity.
+    if pd.api.types.is_float_dtype(values) and len(values) and np.all(np.mod(values, 1) == 0):
+        values = values.astype("int64")
+    return values.astype(str)
+
+
+def target_stats(values: pd.Series, stats: DatasetStats = None) -> DatasetStats:
+    """Fold one chunk of the target column into `stats` (class counts or moments)."""
+    stats = stats or DatasetStats(rows=0, cols=0)
+    values = values.dropna()
+    counts = stats.extra.setdefault("class_counts", pd.Series(dtype="int64"))
+    if counts is not None:
+        counts = counts.add(label_strings(values).value_counts(), fill_value=0)
+        if len(counts) > MAX_TRACKED_LABELS or (
+            len(counts) > MAX_CLASS_LABELS and pd.api.types.is_numeric_dtype(values)
+        ):
+            counts = None
+        stats.extra["class_counts"] = counts
+    if pd.api.types.is_numeric_dtype(values) and len(values):
+        moments = stats.extra.setdefault("moments", [0, 0.0, 0.0])
+        v = values.to_numpy(dtype=float)
+        moments[0] += len(v)
+        moments[1] += v.sum()
+        moments[2] += np.square(v).sum()
+        stats.extra.setdefault("digest", TDigest()).update(v)
+    return stats
+
+
+def _finish_stats(stats: DatasetStats) -> DatasetStats:
+    counts = stats.extra.pop("class_counts", None)
+    moments = stats.extra.pop("moments", None)
+    digest = stats.extra.pop("digest", None)
+    if counts is not None and len(counts):
+        stats.class_counts = {k: int(v) for k, v in counts.items()}
+    elif moments and moments[0]:
+        n, total, total_sq = moments
+        stats.target_mean = total / n
+        stats.target_variance = max(total_sq / n - stats.target_mean ** 2, 0.0)
+        stats.target_count = int(n)
+        stats.target_quantiles = digest.quantiles(np.linspace(0, 1, SAMPLING_BINS + 1))
+    return stats
+
+
+def scan_csv(file_path: str, target_col: str = None, chunksize: int = CSV_CHUNK_ROWS) -> DatasetStats:
+    """Shape of a CSV plus target summary, without holding more than one chunk.
+
+    Without a target only the raw bytes are scanned for newlines; with one,
+    just that column is parsed chunk by chunk.
     """
-    prompt = f"""
-    You are an AI data strategist. 
-    A dataset has {row_count} rows and {column_count} columns.
-    Suggest an optimal number of rows to sample for a quick model performance preview
-    (not full training). 
-    Rules:
-    - If rows < 1000: return {row_count} (use all)
-    - If rows between 1000–10,000: return a small representative sample (maybe 200–500)
-    - If rows > 10,000: return a manageable subset (around 1% of rows)
-    Respond with only a number (integer, no text).
+    columns = pd.read_csv(file_path, nrows=0).columns
+    if target_col is None or target_col not in columns:
+        return DatasetStats(rows=count_csv_rows(file_path), cols=len(columns))
+
+    stats = DatasetStats(rows=0, cols=len(columns))
+    for chunk in pd.read_csv(file_path, usecols=[target_col], chunksize=chunksize):
+        stats.rows += len(chunk)
+        target_stats(chunk[target_col], stats)
+    return _finish_stats(stats)
+
+
+def scan_parquet(file_path: str, target_col: str = None) -> DatasetStats:
+    """Like `scan_csv` for a Parquet copy: shape from the footer, target column only."""
+    rows, columns = columnar.parquet_shape(file_path)
+    stats = DatasetStats(rows=rows, cols=len(columns))
+    if target_col is None or target_col not in columns:
+        return stats
+    for values in columnar.iter_parquet_column(file_path, target_col):
+        target_stats(values, stats)
+    return _finish_stats(stats)
+
+
+def scan_dataset(file_path: str, target_col: str = None) -> DatasetStats:
+    """`scan_parquet` / `scan_csv` by extension; XLSX files are read whole."""
+    if file_path.endswith(".parquet"):
+        return scan_parquet(file_path, target_col)
+    if file_path.endswith(".csv"):
+        return scan_csv(file_path, target_col)
+    if file_path.endswith(".xlsx"):
+        df = pd.read_excel(file_path)
+        stats = DatasetStats(rows=df.shape[0], cols=df.shape[1])
+        if target_col in df.columns:
+            stats = _finish_stats(target_stats(df[target_col], stats))
+        return stats
+    raise ValueError("Unsupported file format. Upload CSV or XLSX only.")
+
+
+def dataset_columns(file_path: str) -> list:
+    if file_path.endswith(".parquet"):
+        return list(columnar.parquet_shape(file_path)[1])
+    if file_path.endswith(".csv"):
+        return list(pd.read_csv(file_path, nrows=0).columns)
+    if file_path.endswith(".xlsx"):
+        return list(pd.read_excel(file_path, nrows=0).columns)
+    raise ValueError("Unsupported file format. Upload CSV or XLSX only.")
+
+
+def iter_dataset_chunks(file_path: str, chunksize: int = CSV_CHUNK_ROWS, columns: list = None):
+    """Yield the whole dataset as DataFrames of at most `chunksize` rows.
+
+    Parquet and CSV are streamed, so only one chunk is in memory at a time;
+    XLSX has no chunked reader and is read whole, then sliced. The chunk
+    boundaries depend only on the file and `chunksize`, so two passes over
+    the same file see the same chunks.
     """
+    if file_path.endswith(".parquet"):
+        yield from columnar.iter_parquet_batches(file_path, columns, batch_rows=chunksize)
+    elif file_path.endswith(".csv"):
+        yield from pd.read_csv(file_path, usecols=columns, chunksize=chunksize)
+    elif file_path.endswith(".xlsx"):
+        df = pd.read_excel(file_path, usecols=columns)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        raise ValueError("Unsupported file format. Upload CSV or XLSX only.")
 
-    headers = {"Authorization": f"Bearer {GEMINI_API_KEY}"}
-    data = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
-    response = requests.post(
-        "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent",
-        headers=headers,
-        json=data
-    )
-    
-    if response.status_code != 200:
-        print("Gemini API Error:", response.text)
-        return 100  # fallback default
-    
-    try:
-        gemini_text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
-        suggested_rows = int("".join([c for c in gemini_text if c.isdigit()]))
-        return max(25, suggested_rows)
-    except Exception as e:
-        print("Gemini parsing error:", e)
-        return 100
-
-
-def load_random_dataset(file_path: str):
+
+def count_strata(file_path: str, target_col: str, strata: Strata, df: pd.DataFrame = None) -> np.ndarray:
+    """Rows per stratum of ``strata``, from one pass over the target column only.
+
+    ``df`` is the dataset when it is already in memory (XLSX).
+    """
+    if df is not None:
+        chunks = [df[target_col]]
+    elif file_path.endswith(".parquet"):
+        chunks = columnar.iter_parquet_column(file_path, target_col)
+    else:
+        chunks = (c[target_col] for c in pd.read_csv(file_path, usecols=[target_col], chunksize=CSV_CHUNK_ROWS))
+    counts = np.zeros(strata.n, dtype=np.int64)
+    for values in chunks:
+        counts += np.bincount(strata.assign(values, len(values)), minlength=strata.n)
+    return counts
+
+
+def count_csv_rows(file_path: str) -> int:
+    """Count data rows in a CSV without parsing it (record ends minus the header).
+
+    A newline inside a quoted field does not end a record. Every quote
+    toggles whether we are inside a field (an escaped ``""`` toggles twice),
+    so a newline ends a record when an even number of quotes precede it.
+    Blocks without quotes outside a field are counted with ``bytes.count``.
+    """
+    records = 0
+    quoted = False
+    last = b""
+    with open(file_path, "rb") as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b""):
+            last = block
+            if not quoted and b'"' not in block:
+                records += block.count(b"\n")
+                continue
+            data = np.frombuffer(block, dtype=np.uint8)
+            quotes = np.flatnonzero(data == ord('"'))
+            newlines = np.flatnonzero(data == ord("\n"))
+            # Quotes before each newline, plus one if the block starts inside a field
+            inside = (np.searchsorted(quotes, newlines) + quoted) % 2
+            records += int(np.count_nonzero(inside == 0))
+            quoted = bool((len(quotes) + quoted) % 2)
+    if last and not last.endswith(b"\n") and not quoted:
+        records += 1
+    return max(records - 1, 0)
+
+
+def reservoir_sample_csv(file_path: str, sample_size: int, chunksize: int = CSV_CHUNK_ROWS, rng=None,
+                         columns: list = None):
+    """Uniformly sample `sample_size` rows from a CSV while streaming it in chunks.
+
+    Vectorised reservoir sampling (Algorithm R): row i (0-based) is kept with
+    probability k/(i+1) and replaces a random reservoir slot. The reservoir is
+    indexed by slot, so peak memory is one chunk plus `sample_size` rows no
+    matter how large the file is.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    reservoir = None
+    seen = 0
+
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, usecols=columns):
+        positions = np.arange(seen, seen + len(chunk))
+        seen += len(chunk)
+
+        slots = positions.copy()
+        filled = positions >= sample_size
+        slots[filled] = rng.integers(0, positions[filled] + 1)
+        rows = np.flatnonzero(slots < sample_size)
+        if not len(rows):
+            continue
+        slots = slots[rows]
+
+        # When several rows in a chunk hit the same slot, the last one wins
+        _, last = np.unique(slots[::-1], return_index=True)
+        rows, slots = rows[::-1][last], slots[::-1][last]
+
+        incoming = chunk.iloc[rows].set_axis(slots)
+        if reservoir is None:
+            reservoir = incoming
+        else:
+            reservoir = pd.concat([reservoir[~reservoir.index.isin(slots)], incoming])
+
+    if reservoir is None:
+        return pd.read_csv(file_path, nrows=0, usecols=columns)
+    return reservoir.reset_index(drop=True)
+
+
+def load_random_dataset(file_path: str, target_col: str = None, policy: SampleSizePolicy = None,
+                        columns: list = None):
     """
     Load dataset and dynamically decide sampling based on its size.
-    Uses Gemini API to calculate ideal sample size if > 1000 rows.
+    Datasets over 1000 rows are sampled; the sample size comes from `policy`
+    (the `SAMPLE_SIZE_POLICY` default when omitted), which sees the shape and,
+    if `target_col` is given, the class balance or spread of the target.
+
+    Rows are chosen by the `sampling` engine: stratified by class for
+    categorical targets, by target quantile bin for numeric ones. Every
+    class or bin is represented, and a seed derived from the dataset makes
+    the sample the same on every run. Quantile bins have their rows counted
+    in one more pass over the target column, since tied values can leave
+    them far from equal.
+
+    Large files are never loaded whole. A Parquet copy (see `columnar`)
+    is preferred: its shape comes from the footer, the rows are chosen from
+    the target column alone, and only the sampled rows' row groups and the
+    requested `columns` are read. CSVs are scanned chunk by chunk and
+    sampled in one more streaming pass. XLSX files have no chunked reader
+    and are still read in full.
+
+    The decision, including strategy, seed and per-stratum counts, is
+    recorded in `df.attrs["sampling"]`.
     """
-    if file_path.endswith(".csv"):
-        df = pd.read_csv(file_path)
+    with span("sampling"):
+        return _load_random_dataset(file_path, target_col, policy, columns)
+
+
+def _load_random_dataset(file_path, target_col, policy, columns):
+    policy = policy or get_policy()
+    if file_path.endswith(".parquet"):
+        with span("scan"):
+            stats = scan_parquet(file_path, target_col)
+        df = None
+    elif file_path.endswith(".csv"):
+        with span("scan"):
+            stats = scan_csv(file_path, target_col)
+        df = None
     elif file_path.endswith(".xlsx"):
-        df = pd.read_excel(file_path)
+        with span("read_excel"):
+            df = pd.read_excel(file_path, usecols=columns)
+        stats = DatasetStats(rows=df.shape[0], cols=df.shape[1])
+        if target_col in df.columns:
+            stats = _finish_stats(target_stats(df[target_col], stats))
     else:
         raise ValueError("Unsupported file format. Upload CSV or XLSX only.")
 
-    total_rows, total_cols = df.shape
-    print(f"Dataset size: {total_rows} rows x {total_cols} columns")
+    total_rows = stats.rows
+    print(f"Dataset size: {total_rows} rows x {stats.cols} columns")
 
     # If dataset is small (<1000), use all
-    if total_rows <= 1000:
+    if total_rows <= FULL_DATASET_MAX_ROWS:
         print("Using full dataset (less than 1000 rows)")
-        return df.fillna(0)
-    
-    # Ask Gemini to decide sampling size
-    sample_size = ask_gemini_for_sample_size(total_rows, total_cols)
+        if df is None and file_path.endswith(".parquet"):
+            with span("read_parquet"):
+                df = columnar.read_parquet_head(file_path, total_rows, columns)
+        elif df is None:
+            with span("read_csv"):
+                df = pd.read_csv(file_path, usecols=columns)
+        df = df.fillna(0)
+        df.attrs["sampling"] = {
+            "policy": None, "strategy": None, "seed": None, "total_rows": total_rows, "sample_size": len(df)
+        }
+        return df
+
+    has_target = target_col is not None and (columns is None or target_col in columns)
+    strategy = resolve_strategy(stats) if has_target else "uniform"
+    stats.stratified = strategy == "stratified"
+    sample_size = policy.sample_size(stats)
     sample_size = min(sample_size, total_rows)  # cap at total length
 
-    print(f"Sampling {sample_size} rows (suggested by Gemini)")
-    df = df.sample(n=sample_size, random_state=np.random.randint(total_rows))
+    seed = sampling_seed(file_path, target_col)
+    rng = np.random.default_rng(seed)
+    strata = Strata(strategy, stats)
+    counts = None
+    if strategy == "binned":
+        with span("scan"):
+            counts = count_strata(file_path, target_col, strata, df)
+    populations = strata.populations(stats, counts)
+    quotas = allocate(populations, sample_size, getattr(policy, "min_per_class", MIN_PER_STRATUM))
+    sampler = BottomK(quotas, rng)
+
+    print(f"Sampling {int(quotas.sum())} rows (policy: {policy.name}, strategy: {strategy}, seed: {seed})")
+    if file_path.endswith(".parquet") and strategy == "uniform":
+        rows = np.sort(rng.choice(total_rows, size=int(quotas.sum()), replace=False))
+        with span("read_parquet"):
+            df = columnar.read_parquet_rows(file_path, rows, columns)
+        sampled = np.array([len(df)])
+    elif file_path.endswith(".parquet"):
+        # Choose rows from the target column alone, then read just those rows
+        start = 0
+        for values in columnar.iter_parquet_column(file_path, target_col):
+            sampler.offer(strata.assign(values, len(values)), np.arange(start, start + len(values)))
+            start += len(values)
+        rows, _ = sampler.result()
+        with span("read_parquet"):
+            df = columnar.read_parquet_rows(file_path, rows, columns)
+        sampled = sampler.counts()
+    else:
+        chunks = [df] if df is not None else pd.read_csv(file_path, chunksize=CSV_CHUNK_ROWS, usecols=columns)
+        with span("read_csv" if df is None else "read_excel"):
+            start = 0
+            for chunk in chunks:
+                values = chunk[target_col] if has_target and target_col in chunk else None
+                sampler.offer(strata.assign(values, len(chunk)), np.arange(start, start + len(chunk)), chunk)
+                start += len(chunk)
+        _, df = sampler.result()
+        if df is None:
+            df = pd.read_csv(file_path, nrows=0, usecols=columns)
+        sampled = sampler.counts()
     df = df.fillna(0)
+    df.attrs["sampling"] = {
+        "policy": policy.name, "strategy": strategy, "seed": seed,
+        "total_rows": total_rows, "sample_size": len(df),
+    }
+    if strategy != "uniform":
+        report = strata_report(strata, populations, sampled)
+        df.attrs["sampling"]["strata_count"] = len(report)
+        if len(report) <= MAX_REPORTED_STRATA:
+            df.attrs["sampling"]["strata"] = report
+
+    return df
+
+
+def sampling_signature(policy: SampleSizePolicy = None) -> str:
+    """Describe the sampling decision `load_random_dataset` makes, for cache keys."""
+    policy = policy or get_policy()
+    return (
+        f"full<={FULL_DATASET_MAX_ROWS};sample={policy.signature()};strategy={SAMPLING_STRATEGY};"
+        f"seed={SAMPLING_SEED if SAMPLING_SEED is not None else 'dataset'};bins={SAMPLING_BINS}"
+    )
+
+
+def sample_path_for(file_path: str, target_col: str = None, policy: SampleSizePolicy = None) -> str:
+    """Where `load_cached_sample` keeps a sample; a Parquet copy shares its upload's."""
+    source = file_path[:-len(".parquet")] if file_path.endswith(".parquet") else file_path
+    st = os.stat(file_path)
+    key = f"{target_col}|{sampling_signature(policy)}|{st.st_size}|{st.st_mtime_ns}"
+    return f"{source}.sample-{hashlib.sha256(key.encode()).hexdigest()[:16]}.parquet"
+
+
+def load_cached_sample(file_path: str, target_col: str = None, policy: SampleSizePolicy = None):
+    """`load_random_dataset`, stored as Parquet next to the upload and read back on later runs.
+
+    The sample is seeded, so it is the same on every run anyway; storing
+    it skips the scan and the sampling pass. Without pyarrow nothing is
+    stored and every call samples again.
+    """
+    path = sample_path_for(file_path, target_col, policy)
+    if os.path.exists(path):
+        try:
+            df, metadata = columnar.read_frame(path)
+            df.attrs["sampling"] = metadata.get("sampling")
+            return df
+        except Exception as e:
+            print(f"Reading cached sample {path} failed: {e}")
 
+    df = load_random_dataset(file_path, target_col, policy)
+    sampling = df.attrs.get("sampling")
+    # Missing text values were filled with 0; Parquet needs one type per
+    # column, and models match categories on their string form anyway
+    df = df.astype({c: str for c in df.columns if df[c].dtype == object})
+    df.attrs["sampling"] = sampling
+    columnar.write_frame(df, path, {"sampling": sampling})
     return df
@@ -0,0 +1,227 @@
+# server/ml_engine/dataset_profile.py
+"""Per-dataset profile, computed once and cached next to the file.
+
+The profile holds the shape and the first ``PROFILE_HEAD_ROWS`` rows. For
+every column it records:
+
+- the dtype and null count/fraction;
+- the number of distinct values: exact up to ``PROFILE_MAX_DISTINCT``, a
+  HyperLogLog estimate above that;
+- for numeric columns, min, max and t-digest quantiles.
+
+Each column therefore costs bounded memory however many rows the file
+has. The sketches (``ml_engine.sketches``) are stored with the profile,
+so they can be merged later without re-reading the data.
+
+It is computed in one streaming pass (the Parquet copy when there is one)
+and written to ``<upload>.profile.json``. Uploads are content-addressed,
+so the profile is shared by every dataset with the same bytes. It is
+checked against the file's size and mtime when read back.
+
+Previews and ``GET /dataset/{id}/profile`` are served from it. Task
+detection in ``run_models_parallel`` uses the target's full-data
+cardinality from it instead of calling ``nunique`` on the sample.
+"""
+import json
+import os
+import uuid
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from ml_engine.data_handler import MAX_CLASS_LABELS, iter_dataset_chunks
+from ml_engine.sketches import HyperLogLog, TDigest
+
+PROFILE_HEAD_ROWS = int(os.getenv("PROFILE_HEAD_ROWS", "20"))
+PROFILE_MAX_DISTINCT = int(os.getenv("PROFILE_MAX_DISTINCT", "10000"))
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+# Bump when the profile's layout changes so old sidecars are recomputed
+PROFILE_VERSION = 2
+
+
+def profile_path_for(file_path: str) -> str:
+    """Sidecar path; a Parquet copy shares the profile of the upload it was made from."""
+    if file_path.endswith(".parquet"):
+        file_path = file_path[:-len(".parquet")]
+    return file_path + ".profile.json"
+
+
+def _source_of(file_path: str) -> str:
+    source = file_path[:-len(".parquet")] if file_path.endswith(".parquet") else file_path
+    return source if os.path.exists(source) else file_path
+
+
+def _fingerprint(file_path: str) -> Dict[str, int]:
+    st = os.stat(_source_of(file_path))
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _json_value(value):
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        return _json_value(value.item())
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    return value
+
+
+def _is_numeric(dtype_name: Optional[str]) -> bool:
+    try:
+        dtype = pd.api.types.pandas_dtype(dtype_name)
+    except TypeError:
+        return False
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _merge_dtype(current: Optional[str], dtype) -> str:
+    """Dtype of a column seen as several chunks (an int chunk and a float chunk make float)."""
+    name = str(dtype)
+    if current is None or current == name:
+        return name
+    if _is_numeric(current) and _is_numeric(name):
+        return "float64"
+    return "object"
+
+
+class _ColumnProfile:
+    def __init__(self):
+        self.dtype: Optional[str] = None
+        self.count = 0
+        self.nulls = 0
+        # Exact while small; the HyperLogLog answers once this is dropped
+        self.distinct: Optional[set] = set()
+        self.hll = HyperLogLog()
+        self.digest = TDigest()
+
+    def update(self, values: pd.Series):
+        self.dtype = _merge_dtype(self.dtype, values.dtype)
+        self.count += len(values)
+        present = values.dropna()
+        self.nulls += len(values) - len(present)
+
+        self.hll.update(present)
+        if self.distinct is not None:
+            self.distinct.update(present.unique().tolist())
+            if len(self.distinct) > PROFILE_MAX_DISTINCT:
+                self.distinct = None
+
+        if pd.api.types.is_numeric_dtype(present) and not pd.api.types.is_bool_dtype(present):
+            self.digest.update(present.to_numpy(dtype=float))
+
+    def finish(self) -> Dict[str, Any]:
+        numeric = _is_numeric(self.dtype) and self.digest.min is not None
+        out = {
+            "dtype": self.dtype,
+            "numeric": numeric,
+            "nulls": self.nulls,
+            "null_fraction": self.nulls / self.count if self.count else 0.0,
+            "distinct": len(self.distinct) if self.distinct is not None else self.hll.count(),
+            "distinct_exact": self.distinct is not None,
+        }
+        if numeric:
+            out["min"] = self.digest.min
+            out["max"] = self.digest.max
+            out["quantiles"] = {str(q): x for q, x in zip(QUANTILES, self.digest.quantiles(QUANTILES))}
+        return out
+
+    def sketches(self) -> Dict[str, Any]:
+        out = {"hll": self.hll.to_dict()}
+        if self.digest.min is not None:
+            out["tdigest"] = self.digest.to_dict()
+        return out
+
+
+def compute_profile(file_path: str, head_rows: int = PROFILE_HEAD_ROWS) -> Dict[str, Any]:
+    """Profile a dataset (Parquet, CSV or XLSX) in one pass over its chunks."""
+    columns: Dict[str, _ColumnProfile] = {}
+    head = None
+    rows = 0
+    for chunk in iter_dataset_chunks(file_path):
+        if head is None:
+            head = chunk.head(head_rows)
+            columns = {str(c): _ColumnProfile() for c in chunk.columns}
+        elif len(head) < head_rows:
+            head = pd.concat([head, chunk.head(head_rows - len(head))])
+        rows += len(chunk)
+        for name, values in chunk.items():
+            columns[str(name)].update(values)
+
+    head_records = []
+    if head is not None:
+        head_records = [
+            {str(k): _json_value(v) for k, v in record.items()}
+            for record in head.astype(object).to_dict(orient="records")
+        ]
+    return {
+        "version": PROFILE_VERSION,
+        "rows": rows,
+        "cols": len(columns),
+        "columns": {name: col.finish() for name, col in columns.items()},
+        "head": head_records,
+        "sketches": {name: col.sketches() for name, col in columns.items()},
+    }
+
+
+def column_sketches(profile: Dict[str, Any], column: str):
+    """(HyperLogLog, TDigest or None) stored for ``column``, e.g. to merge with another file's."""
+    stored = profile["sketches"][column]
+    digest = TDigest.from_dict(stored["tdigest"]) if "tdigest" in stored else None
+    return HyperLogLog.from_dict(stored["hll"]), digest
+
+
+def cached_profile(file_path: str) -> Optional[Dict[str, Any]]:
+    """The stored profile for ``file_path`` (or its Parquet copy), if current; never computes."""
+    path = profile_path_for(file_path)
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            stored = json.load(fh)
+        if stored.get("version") != PROFILE_VERSION or stored.get("source") != _fingerprint(file_path):
+            return None
+        return stored
+    except (OSError, ValueError):
+        return None
+
+
+def get_profile(file_path: str, columnar_path: Optional[str] = None) -> Dict[str, Any]:
+    """The profile of an upload, computed and stored on first use.
+
+    Reads ``columnar_path`` (the Parquet copy) when it exists, otherwise the
+    upload itself.
+    """
+    profile = cached_profile(file_path)
+    if profile is not None:
+        return profile
+    source = columnar_path if columnar_path and os.path.exists(columnar_path) else file_path
+    profile = compute_profile(source)
+    profile["source"] = _fingerprint(file_path)
+
+    path = profile_path_for(file_path)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(profile, fh, default=str)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Storing profile of {file_path} failed: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return profile
+
+
+def infer_task(profile: Dict[str, Any], target_col: str) -> Optional[str]:
+    """"classification" or "regression" for ``target_col``, or None if the profile can't tell.
+
+    Same rule as the sample-based heuristic in ``run_models_parallel``:
+    non-numeric targets, and numeric ones with at most ``MAX_CLASS_LABELS``
+    distinct values, are classification. Here the count covers every row.
+    """
+    column = profile.get("columns", {}).get(target_col)
+    if column is None or column.get("dtype") is None:
+        return None
+    if not column["numeric"]:
+        return "classification"
+    if column["distinct_exact"] and column["distinct"] <= MAX_CLASS_LABELS:
+        return "classification"
+    return "regression"
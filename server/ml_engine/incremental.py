@@ -0,0 +1,255 @@
+# server/ml_engine/incremental.py
+"""Out-of-core evaluation: stream the whole dataset through partial_fit models.
+
+Sampling keeps `run_models_parallel` fast but throws most of a very large
+file away. This mode instead reads the stored dataset chunk by chunk (see
+`data_handler.iter_dataset_chunks`) and trains the registry's
+`supports_partial_fit` models on every training row. Memory is bounded by
+one chunk, independent of the file size.
+
+Each row is assigned to the training or held-out stream by a seeded random
+draw per chunk, so the assignment is reproducible. The file is read twice:
+- the first pass trains on the training stream;
+- the second pass scores the final models on the held-out stream with
+  running metrics.
+
+The feature transform is fitted on the training rows of the first chunk.
+"""
+import os
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ml_engine.data_handler import (
+    CSV_CHUNK_ROWS, dataset_columns, iter_dataset_chunks, label_strings, scan_dataset
+)
+from ml_engine.model_registry import build_models
+from ml_engine.preprocessing import Preprocessor
+
+INCREMENTAL_HOLDOUT_FRACTION = float(os.getenv("INCREMENTAL_HOLDOUT_FRACTION", "0.2"))
+INCREMENTAL_SEED = 42
+
+
+def incremental_signature(chunksize: int = None, holdout: float = None) -> str:
+    return "incremental:chunk={};holdout={};seed={}".format(
+        chunksize or CSV_CHUNK_ROWS, holdout or INCREMENTAL_HOLDOUT_FRACTION, INCREMENTAL_SEED
+    )
+
+
+def _safe(value) -> Optional[float]:
+    value = float(value)
+    return None if not np.isfinite(value) else round(value, 5)
+
+
+class StreamingRegressionMetrics:
+    """R², MSE, MAE, RMSE and MAPE accumulated batch by batch."""
+
+    def __init__(self):
+        self.n = 0
+        self.sum_sq_error = 0.0
+        self.sum_abs_error = 0.0
+        self.sum_abs_pct_error = 0.0
+        self.has_zero_target = False
+        # Running mean and sum of squared deviations of y (Chan et al.)
+        self.y_mean = 0.0
+        self.y_m2 = 0.0
+
+    def update(self, y: np.ndarray, preds: np.ndarray):
+        if not len(y):
+            return
+        error = y - preds
+        self.sum_sq_error += float(np.dot(error, error))
+        self.sum_abs_error += float(np.abs(error).sum())
+        if np.any(y == 0):
+            self.has_zero_target = True
+        else:
+            self.sum_abs_pct_error += float(np.abs(error / y).sum())
+
+        n, batch_mean = len(y), float(y.mean())
+        batch_m2 = float(np.square(y - batch_mean).sum())
+        total = self.n + n
+        delta = batch_mean - self.y_mean
+        self.y_m2 += batch_m2 + delta * delta * self.n * n / total
+        self.y_mean += delta * n / total
+        self.n = total
+
+    def result(self) -> Dict[str, Any]:
+        if not self.n:
+            return {}
+        mse = self.sum_sq_error / self.n
+        return {
+            "r2_test": _safe(1 - self.sum_sq_error / self.y_m2) if self.n > 1 and self.y_m2 > 0 else None,
+            "mse": _safe(mse),
+            "mae": _safe(self.sum_abs_error / self.n),
+            "rmse": _safe(np.sqrt(mse)),
+            "mape": None if self.has_zero_target else _safe(self.sum_abs_pct_error / self.n * 100),
+        }
+
+
+class StreamingClassificationMetrics:
+    """Confusion-matrix counts, reported like `evaluate_classification`."""
+
+    def __init__(self, n_classes: int):
+        self.n_classes = n_classes
+        self.confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+
+    def update(self, y: np.ndarray, preds: np.ndarray):
+        k = self.n_classes
+        self.confusion += np.bincount(
+            y.astype(np.int64) * k + preds.astype(np.int64), minlength=k * k
+        ).reshape(k, k)
+
+    def result(self) -> Dict[str, Any]:
+        total = self.confusion.sum()
+        if not total:
+            return {}
+        tp = np.diag(self.confusion).astype(float)
+        support = self.confusion.sum(axis=1)
+        predicted = self.confusion.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.where(predicted > 0, tp / predicted, 0.0)
+            recall = np.where(support > 0, tp / support, 0.0)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        weights = support / total
+        return {
+            "accuracy": _safe(tp.sum() / total),
+            "f1_weighted": _safe(np.dot(f1, weights)),
+            "precision_weighted": _safe(np.dot(precision, weights)),
+            "recall_weighted": _safe(np.dot(recall, weights)),
+        }
+
+
+def _holdout_mask(chunk_index: int, n: int, fraction: float) -> np.ndarray:
+    return np.random.default_rng([INCREMENTAL_SEED, chunk_index]).random(n) < fraction
+
+
+def run_incremental(file_path: str, target_col: str, on_start=None, on_result=None,
+                    chunksize: int = None, holdout: float = None) -> Dict[str, Any]:
+    """Evaluate the partial_fit models on every row of ``file_path``.
+
+    Returns a payload shaped like `run_models_parallel`'s, with
+    ``"mode": "incremental"`` and row counts under ``"incremental"``.
+    """
+    chunksize = chunksize or CSV_CHUNK_ROWS
+    holdout = holdout or INCREMENTAL_HOLDOUT_FRACTION
+
+    columns = dataset_columns(file_path)
+    if target_col not in columns:
+        raise ValueError(f"Target column '{target_col}' not found. Columns: {columns}")
+
+    # One pass over the target column decides the task and, for
+    # classification, the full label set partial_fit needs up front
+    stats = scan_dataset(file_path, target_col)
+    if stats.class_counts is not None:
+        task = "classification"
+        labels = sorted(stats.class_counts)
+        if len(labels) < 2:
+            raise ValueError(f"Target column '{target_col}' must have at least 2 classes for classification.")
+        label_index = {label: i for i, label in enumerate(labels)}
+        classes = np.arange(len(labels))
+    elif stats.target_mean is not None:
+        task = "regression"
+        classes = None
+    else:
+        raise ValueError(f"Target column '{target_col}' has too many distinct non-numeric values to model.")
+
+    models = build_models(task, incremental=True)
+    errors: Dict[str, str] = {}
+    train_time = {name: 0.0 for name in models}
+    if on_start:
+        on_start(task, list(models))
+
+    def split(chunk, index):
+        chunk = chunk[chunk[target_col].notna()]
+        if task == "classification":
+            y = label_strings(chunk[target_col]).map(label_index).to_numpy()
+        else:
+            y = chunk[target_col].to_numpy(dtype=np.float64)
+        mask = _holdout_mask(index, len(chunk), holdout)
+        return chunk.drop(columns=[target_col]), y, mask
+
+    print(f"Incremental evaluation of {stats.rows} rows in chunks of {chunksize}")
+    preprocessor = None
+    train_rows = n_chunks = 0
+    for index, chunk in enumerate(iter_dataset_chunks(file_path, chunksize)):
+        X, y, mask = split(chunk, index)
+        if not (~mask).any():
+            continue
+        if preprocessor is None:
+            preprocessor = Preprocessor().fit(X[~mask])
+        X_train = preprocessor.transform(X[~mask])
+        y_train = y[~mask]
+        for name, model in models.items():
+            if name in errors:
+                continue
+            start = time.perf_counter()
+            try:
+                if classes is not None:
+                    model.partial_fit(X_train, y_train, classes=classes)
+                else:
+                    model.partial_fit(X_train, y_train)
+            except Exception as e:
+                errors[name] = str(e)
+            train_time[name] += time.perf_counter() - start
+        train_rows += len(y_train)
+        n_chunks += 1
+
+    if preprocessor is None:
+        raise ValueError("No training rows found in the dataset.")
+
+    metrics = {
+        name: StreamingRegressionMetrics() if task == "regression" else StreamingClassificationMetrics(len(classes))
+        for name in models
+    }
+    holdout_rows = 0
+    for index, chunk in enumerate(iter_dataset_chunks(file_path, chunksize)):
+        X, y, mask = split(chunk, index)
+        if not mask.any():
+            continue
+        X_test = preprocessor.transform(X[mask])
+        y_test = y[mask]
+        for name, model in models.items():
+            if name in errors:
+                continue
+            try:
+                metrics[name].update(y_test, model.predict(X_test))
+            except Exception as e:
+                errors[name] = str(e)
+        holdout_rows += len(y_test)
+
+    results = []
+    for name in models:
+        result = {"model": name}
+        if name in errors:
+            result["error"] = errors[name]
+        else:
+            result.update(metrics[name].result())
+            result["training_time"] = _safe(train_time[name])
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    if task == "regression":
+        results.sort(key=lambda x: (x.get("r2_test") is not None, x.get("r2_test") or 0), reverse=True)
+    else:
+        results.sort(key=lambda x: x.get("accuracy") or 0, reverse=True)
+
+    return {
+        "rows_used": train_rows + holdout_rows,
+        "columns": columns,
+        "task": task,
+        "sampling": {"policy": "incremental", "total_rows": stats.rows, "sample_size": train_rows + holdout_rows},
+        "features": {
+            "numeric": preprocessor.numeric_features,
+            "categorical": preprocessor.categorical_features
+        },
+        "mode": "incremental",
+        "incremental": {
+            "chunk_rows": chunksize,
+            "chunks": n_chunks,
+            "train_rows": train_rows,
+            "holdout_rows": holdout_rows,
+        },
+        "results": results
+    }
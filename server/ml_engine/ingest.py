@@ -0,0 +1,287 @@
+# server/ml_engine/ingest.py
+"""Single-pass ingestion of uploaded datasets.
+
+`UploadWriter` takes the upload as a stream of byte chunks. For each
+chunk it:
+
+- updates a SHA-256 of the content,
+- appends the bytes to a temporary file in the upload directory, and
+- for CSV, feeds the decoded text to `CsvProfiler`.
+
+The encoding and delimiter are sniffed from the first chunk. The profiler
+then counts rows, columns and per-column missing values with the C csv
+parser, holding back only an unfinished trailing record (up to
+``MAX_OPEN_RECORD_CHARS``).
+
+`finish` moves the file to a content-addressed path
+(``<upload dir>/<hash[:2]>/<hash><ext>``) with an atomic rename. Readers
+never see a partial file, and a re-upload of the same bytes reuses the
+existing copy instead of overwriting another dataset's file.
+"""
+import codecs
+import csv
+import hashlib
+import os
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+# Bytes used to sniff the encoding and delimiter
+SNIFF_BYTES = 64 * 1024
+DELIMITERS = ",;\t|"
+# The strings pandas reads as missing by default
+NULL_TOKENS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+TEXT_EXTENSIONS = (".csv",)
+# Longest record (in characters) held back while waiting for a closing quote
+MAX_OPEN_RECORD_CHARS = int(os.getenv("MAX_OPEN_RECORD_CHARS", str(1024 * 1024)))
+
+
+@dataclass
+class UploadProfile:
+    sha256: str
+    size_bytes: int
+    encoding: Optional[str] = None
+    delimiter: Optional[str] = None
+    rows: Optional[int] = None
+    cols: Optional[int] = None
+    columns: Optional[List[str]] = None
+    null_counts: Optional[Dict[str, int]] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def sniff_encoding(sample: bytes) -> str:
+    """Encoding of a file from its first bytes: BOM, else UTF-8 if it decodes, else Latin-1."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # final=False tolerates a character cut off at the end of the sample
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def sniff_delimiter(text: str, default: str = ",") -> str:
+    """The delimiter of a CSV sample (complete lines only), else ``default``."""
+    sample = text[:text.rfind("\n") + 1] or text
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        return default
+
+
+class _Records:
+    """Iterator the csv reader pulls complete records from; refilled between chunks."""
+
+    def __init__(self):
+        self.pending = iter(())
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        return next(self.pending)
+
+
+class CsvProfiler:
+    """Rows, columns and missing values per column of CSV text fed in pieces.
+
+    The csv module is stricter than pandas: a stray quote inside an
+    unquoted field (``bob,5"``) makes it read the following lines as one
+    record, and then fail. So does a quoted record longer than
+    ``MAX_OPEN_RECORD_CHARS``. In either case the profiler gives up
+    (``failed``) instead of failing the upload; the file itself is still
+    stored and read by pandas later.
+    """
+
+    def __init__(self, delimiter: str):
+        self.delimiter = delimiter
+        self.columns: Optional[List[str]] = None
+        self.rows = 0
+        self.null_counts: List[int] = []
+        self._carry = ""
+        self._open = []        # lines of a record whose quoted field spans newlines
+        self._quotes = 0       # quote characters seen in ``_open``
+        self._open_chars = 0
+        self.failed = False
+        self._records = _Records()
+        self._reader = csv.reader(self._records, delimiter=delimiter)
+
+    def feed(self, text: str):
+        if self.failed:
+            return
+        text = self._carry + text
+        cut = text.rfind("\n") + 1
+        self._carry = text[cut:]
+        if cut:
+            complete = text[:cut - 1]
+            if '"' not in complete and not self._open:
+                # No quotes: every line is a record
+                self._records.pending = iter(complete.split("\n"))
+                self._drain()
+            else:
+                self._consume(complete.split("\n"))
+
+    def finish(self):
+        if self.failed:
+            return
+        if self._carry:
+            self._consume([self._carry])
+            self._carry = ""
+        if self._open and not self.failed:
+            # Unterminated quote at end of file: count what is there
+            self._records.pending = iter(["\n".join(self._open)])
+            self._open = []
+            self._drain()
+
+    def _consume(self, lines: List[str]):
+        records = []
+        for line in lines:
+            # A newline ends a record only outside quotes; escaped quotes ("")
+            # come in pairs, so the running count's parity tells which it is
+            self._quotes += line.count('"')
+            if self._quotes % 2:
+                self._open.append(line)
+                self._open_chars += len(line) + 1
+                if self._open_chars > MAX_OPEN_RECORD_CHARS:
+                    break
+                continue
+            if self._open:
+                self._open.append(line)
+                line = "\n".join(self._open)
+                self._open = []
+                self._open_chars = 0
+            self._quotes = 0
+            records.append(line)
+        self._records.pending = iter(records)
+        self._drain()
+        if self._open_chars > MAX_OPEN_RECORD_CHARS:
+            self._fail()
+
+    def _fail(self):
+        self.failed = True
+        self._carry = ""
+        self._open = []
+        self._records.pending = iter(())
+
+    def _drain(self):
+        try:
+            self._count(self._reader)
+        except csv.Error:
+            self._fail()
+
+    def _count(self, rows):
+        nulls = self.null_counts
+        for row in rows:
+            if not row:
+                continue  # blank line
+            if self.columns is None:
+                self.columns = row
+                self.null_counts = nulls = [0] * len(row)
+                continue
+            self.rows += 1
+            if not NULL_TOKENS.isdisjoint(row):
+                for i, value in enumerate(row[:len(nulls)]):
+                    if value in NULL_TOKENS:
+                        nulls[i] += 1
+            if len(row) < len(nulls):
+                # Short rows are padded with missing values
+                for i in range(len(row), len(nulls)):
+                    nulls[i] += 1
+
+
+class UploadWriter:
+    """Hash, write and profile an upload chunk by chunk (see module docstring)."""
+
+    def __init__(self, upload_dir: str, filename: str):
+        self.upload_dir = upload_dir
+        self.filename = filename
+        self.extension = os.path.splitext(filename)[1].lower()
+        os.makedirs(upload_dir, exist_ok=True)
+        self.tmp_path = os.path.join(upload_dir, f".upload-{uuid.uuid4().hex}.part")
+        self._fh = open(self.tmp_path, "wb")
+        self._hash = hashlib.sha256()
+        self._size = 0
+        self._head = b""
+        self._decoder = None
+        self._profiler: Optional[CsvProfiler] = None
+        self.encoding: Optional[str] = None
+        self.delimiter: Optional[str] = None
+
+    def write(self, chunk: bytes):
+        self._hash.update(chunk)
+        self._fh.write(chunk)
+        self._size += len(chunk)
+        if self.extension not in TEXT_EXTENSIONS:
+            return
+        if self._decoder is None:
+            # Hold the first bytes back until there are enough to sniff
+            self._head += chunk
+            if len(self._head) >= SNIFF_BYTES:
+                self._start_profile()
+        else:
+            self._feed(chunk)
+
+    def _start_profile(self, final: bool = False):
+        self.encoding = sniff_encoding(self._head)
+        self._decoder = codecs.getincrementaldecoder(self.encoding)()
+        text = self._decode(self._head, final)
+        self.delimiter = sniff_delimiter(text)
+        self._profiler = CsvProfiler(self.delimiter)
+        self._profiler.feed(text)
+        self._head = b""
+
+    def _decode(self, chunk: bytes, final: bool = False) -> str:
+        try:
+            return self._decoder.decode(chunk, final)
+        except UnicodeDecodeError:
+            # Not UTF-8 after all; Latin-1 decodes any byte, so readers told
+            # to use it will not fail either
+            self.encoding = "latin-1"
+            self._decoder = codecs.getincrementaldecoder("latin-1")()
+            return self._decoder.decode(chunk, final)
+
+    def _feed(self, chunk: bytes, final: bool = False):
+        self._profiler.feed(self._decode(chunk, final))
+
+    def finish(self) -> Tuple[str, UploadProfile]:
+        """Close the file, move it to its content-addressed path; returns (path, profile)."""
+        self._fh.close()
+        profile = UploadProfile(sha256=self._hash.hexdigest(), size_bytes=self._size)
+        if self.extension in TEXT_EXTENSIONS:
+            if self._decoder is None:
+                self._start_profile(final=True)
+            else:
+                self._feed(b"", final=True)
+            self._profiler.finish()
+            columns = self._profiler.columns or []
+            profile.encoding = self.encoding
+            profile.delimiter = self.delimiter
+            profile.cols = len(columns)
+            profile.columns = columns
+            if not self._profiler.failed:
+                profile.rows = self._profiler.rows
+                profile.null_counts = dict(zip(columns, self._profiler.null_counts))
+
+        final_dir = os.path.join(self.upload_dir, profile.sha256[:2])
+        os.makedirs(final_dir, exist_ok=True)
+        path = os.path.join(final_dir, profile.sha256 + self.extension)
+        if os.path.exists(path):
+            # Same bytes already stored; keep the existing file
+            os.remove(self.tmp_path)
+        else:
+            os.replace(self.tmp_path, path)
+        return path, profile
+
+    def abort(self):
+        self._fh.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
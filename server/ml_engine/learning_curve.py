@@ -0,0 +1,159 @@
+# server/ml_engine/learning_curve.py
+"""Learning curves: how a model's score grows with its training rows.
+
+The "learning_curve" selection mode trains every model on growing subsets
+of the data (``LEARNING_CURVE_FRACTIONS`` of the dataset's rows, 1% to 25%
+by default). It records each model's score at every step. A model stops
+once its score has gained less than ``LEARNING_CURVE_TOLERANCE`` for
+``LEARNING_CURVE_PATIENCE`` steps in a row. The point where its score
+levelled off is reported as the rows worth paying for. The run ends early
+when every model has levelled off.
+
+The curve is measured on the sample and split a "full" run trains on, and
+its last step is the whole training split, i.e. the full run's fit. The
+subsets are prefixes of that split, like the rounds of the tournament, so
+each one contains the previous one. The sample, the split and the
+prefixes are the same on every run. Both are cached:
+
+- the sample as Parquet next to the upload
+  (``data_handler.load_cached_sample``);
+- each (model, training rows) fit in the result cache
+  (``result_cache.FitCache``), under keys shared with the other modes.
+
+A follow-up full run therefore reuses the fits of every model that
+reached the last step, and only trains the ones that stopped early. A
+learning curve after a full run starts with its last step already done.
+
+The sample is capped by the sampling policy. When the largest fraction
+would need more training rows than the sample has, the steps keep their
+ratios (1:2:5:10:25) and are scaled down to end at the whole split. A
+large file therefore still gets every step. A small sample, whose
+smallest steps would be too small to fit, gets its steps spread
+geometrically from ``LEARNING_CURVE_MIN_ROWS`` instead.
+"""
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+LEARNING_CURVE_FRACTIONS = tuple(
+    float(f) for f in os.getenv("LEARNING_CURVE_FRACTIONS", "0.01,0.02,0.05,0.1,0.25").split(",")
+)
+# A step gaining less than this (accuracy or R²) counts towards a plateau
+LEARNING_CURVE_TOLERANCE = float(os.getenv("LEARNING_CURVE_TOLERANCE", "0.005"))
+# Consecutive flat steps before a model stops
+LEARNING_CURVE_PATIENCE = int(os.getenv("LEARNING_CURVE_PATIENCE", "2"))
+# Smallest step; smaller samples spread their steps from here up
+LEARNING_CURVE_MIN_ROWS = int(os.getenv("LEARNING_CURVE_MIN_ROWS", "50"))
+
+
+def learning_curve_signature() -> str:
+    return "learning_curve:fractions={};tol={};patience={};min={}".format(
+        ",".join(str(f) for f in sorted(LEARNING_CURVE_FRACTIONS)), LEARNING_CURVE_TOLERANCE,
+        LEARNING_CURVE_PATIENCE, LEARNING_CURVE_MIN_ROWS,
+    )
+
+
+def curve_points(total_rows: int, sample_rows: int, n_train: int, fractions=None,
+                 min_rows: int = None) -> List[Tuple[float, int]]:
+    """(fraction of the dataset, training rows) for each step, smallest first.
+
+    A fraction f of the dataset is f of its training share: ``n_train`` out
+    of ``sample_rows`` sampled rows are for training. If the largest
+    fraction needs more than ``n_train`` rows, all steps are scaled by the
+    same factor so that it fits. The whole split always ends the curve.
+    If the smallest step then has fewer than ``min_rows`` rows (a small
+    sample), the same number of steps is spread geometrically from
+    ``min_rows`` to the whole split instead. Steps that come out the same
+    are merged.
+    """
+    fractions = sorted(set(fractions or LEARNING_CURVE_FRACTIONS))
+    min_rows = min(LEARNING_CURVE_MIN_ROWS if min_rows is None else min_rows, n_train)
+    train_total = total_rows * n_train / max(sample_rows, 1)
+    scale = min(1.0, n_train / (fractions[-1] * train_total)) if train_total else 1.0
+    steps = [min(int(f * scale * train_total), n_train) for f in fractions] + [n_train]
+    if steps[0] < min_rows < n_train:
+        steps = [int(min_rows * (n_train / min_rows) ** (i / (len(steps) - 1))) for i in range(len(steps))]
+        steps[-1] = n_train
+    points: List[Tuple[float, int]] = []
+    for rows in steps:
+        if rows < min_rows or (points and rows <= points[-1][1]):
+            continue
+        points.append((round(rows / train_total, 6), rows))
+    return points
+
+
+def learning_curve(fit: Callable[[Dict[str, Any], Optional[int]], List[Dict[str, Any]]],
+                   models: Dict[str, Any], n_train: int, points: List[Tuple[float, int]],
+                   metric: Callable[[Dict[str, Any]], Optional[float]], tolerance: float = None,
+                   patience: int = None, on_result=None):
+    """Train ``models`` on each of ``points`` until their ``metric`` stops improving.
+
+    ``fit(models, train_rows)`` is the same callback ``successive_halving``
+    takes. ``metric`` reads a result's score (higher is better, None for
+    errors).
+
+    Each model's result is its last step's, with ``"curve"`` (fraction,
+    train_rows, score and training time per step) and ``"plateau"`` added.
+    ``"plateau"`` is the step its score levelled off at, or None if it was
+    still improving at the last step. ``on_result`` is called with each
+    model once it stops. Returns ``(results, summary)``.
+    """
+    tolerance = LEARNING_CURVE_TOLERANCE if tolerance is None else tolerance
+    patience = max(1, patience or LEARNING_CURVE_PATIENCE)
+
+    alive = dict(models)
+    curves: Dict[str, List[Dict[str, Any]]] = {name: [] for name in models}
+    flat = {name: 0 for name in models}
+    latest: Dict[str, Dict[str, Any]] = {}
+    finished: List[Dict[str, Any]] = []
+    steps = []
+
+    def finish(name: str, plateau: Optional[Dict[str, Any]]):
+        result = dict(latest[name], curve=curves[name], plateau=plateau)
+        finished.append(result)
+        if on_result:
+            on_result(result)
+
+    for fraction, train_rows in points:
+        if not alive:
+            break
+        results = fit(alive, None if train_rows >= n_train else train_rows)
+        steps.append({
+            "fraction": fraction, "train_rows": train_rows,
+            "models": [r["model"] for r in results], "cached": [r["model"] for r in results if r.get("cached")],
+        })
+
+        for r in results:
+            name = r["model"]
+            score = metric(r)
+            curve = curves[name]
+            previous = next((p["score"] for p in reversed(curve) if p["score"] is not None), None)
+            curve.append({
+                "fraction": fraction, "train_rows": train_rows, "score": score,
+                "training_time": r.get("training_time"),
+            })
+            latest[name] = r
+            if score is None or previous is None:
+                continue
+            flat[name] = flat[name] + 1 if score - previous < tolerance else 0
+            if flat[name] >= patience:
+                # The score was already there before the flat steps began
+                level = curve[-1 - patience]
+                del alive[name]
+                finish(name, {"fraction": level["fraction"], "train_rows": level["train_rows"]})
+
+    for name in alive:
+        if name in latest:
+            finish(name, None)
+
+    def best(result):
+        score = metric(result)
+        return (score is not None, score if score is not None else -math.inf)
+
+    finished.sort(key=best, reverse=True)
+    summary = {"steps": steps, "recommended": None}
+    if finished and metric(finished[0]) is not None:
+        top = finished[0]
+        level = top["plateau"] or {"fraction": top["curve"][-1]["fraction"], "train_rows": top["curve"][-1]["train_rows"]}
+        summary["recommended"] = {"model": top["model"], "plateaued": top["plateau"] is not None, **level}
+    return finished, summary
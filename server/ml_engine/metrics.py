@@ -0,0 +1,232 @@
+# server/ml_engine/metrics.py
+"""In-process metrics with a Prometheus text exposition.
+
+Counters, gauges and histograms live in one registry and are rendered by
+``GET /metrics`` (see ``main.py``) in the Prometheus text format, so any
+Prometheus-compatible scraper can collect them without an extra client
+library. Values that already live elsewhere (queue depth, cache hit
+counts, cores in use) are read at scrape time through collectors instead
+of being mirrored.
+
+The registry lives in the ML engine so that the engine can record its own
+metrics without importing the web app. ``core.metrics`` re-exports it and
+adds the app's metrics (evaluations, ingested bytes) to the same registry.
+
+Timing of the evaluation hot path goes through ``span``:
+
+    with span("read_csv"):
+        ...
+
+which observes the block's duration in ``evaluation_stage_seconds`` under
+the given stage label.
+"""
+import contextlib
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+# (metric name, type, help, [(suffix, labels, value), ...])
+Family = Tuple[str, str, str, List[Tuple[str, Dict[str, str], float]]]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> Family:
+        with self._lock:
+            samples = [("", self._labels(k), v) for k, v in self._values.items()]
+        return self.name, self.kind, self.help, samples
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    @contextlib.contextmanager
+    def track(self, **labels):
+        """Count the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def collect(self) -> Family:
+        with self._lock:
+            samples = [("", self._labels(k), v) for k, v in self._values.items()]
+        return self.name, self.kind, self.help, samples
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # [cumulative bucket counts, sum, count]
+            entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self) -> Family:
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                labels = self._labels(key)
+                for bound, n in zip(self.buckets, counts):
+                    samples.append(("_bucket", {**labels, "le": _format_value(bound)}, n))
+                samples.append(("_bucket", {**labels, "le": "+Inf"}, count))
+                samples.append(("_sum", labels, total))
+                samples.append(("_count", labels, count))
+        return self.name, self.kind, self.help, samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        """Add a callable returning metric families computed at scrape time."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            families = [m.collect() for m in self._metrics.values()]
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:  # a broken collector must not break the scrape
+                print(f"Metrics collector {collector!r} failed: {e}")
+
+        lines = []
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "evaluation_stage_seconds", "Time spent in each stage of the evaluation hot path", ["stage"]
+)
+MODEL_FIT_SECONDS = registry.histogram(
+    "model_fit_seconds", "Estimator fit time", ["model", "task"]
+)
+MODEL_PREDICT_SECONDS = registry.histogram(
+    "model_predict_seconds", "Estimator predict time on the test split", ["model", "task"]
+)
+MODEL_FITS = registry.counter("model_fits_total", "Model fits by outcome", ["model", "outcome"])
+ACTIVE_FITS = registry.gauge("active_fits", "Model fits currently running")
+
+
+def span(stage: str):
+    """Time a block as one stage of the evaluation (``evaluation_stage_seconds``)."""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def gauge_family(name: str, help: str, value: Optional[float], labels: Dict[str, str] = None) -> Family:
+    """A one-sample gauge family for collectors."""
+    samples = [] if value is None else [("", labels or {}, value)]
+    return name, "gauge", help, samples
+
+
+def counter_family(name: str, help: str, value: float, labels: Dict[str, str] = None) -> Family:
+    """A one-sample counter family for collectors (``name`` ends in ``_total``)."""
+    return name, "counter", help, [("", labels or {}, value)]
@@ -0,0 +1,220 @@
+# server/ml_engine/model_registry.py
+"""Registry of the candidate estimators, per task, with resource hints.
+
+Every estimator is described by a `ModelSpec`: the task it solves, a
+factory returning a fresh unfitted instance, and rough cost/memory models
+as functions of the training shape. `plan_models` uses those to order a
+run longest-first (so the slowest fit starts immediately and the short
+ones fill in around it) and to leave out models predicted to exceed the
+time or memory budget for that shape.
+
+Cost is in abstract work units (roughly the number of inner-loop
+operations of the fit); `MODEL_COST_UNITS_PER_SECOND` converts them to an
+estimated wall time. The estimates only need to be right to within a
+small factor to rank and screen models.
+
+Models with `batch=False` are only offered to the out-of-core evaluation
+(`ml_engine.incremental`), which needs `supports_partial_fit`.
+
+New models are added with `register_model`.
+"""
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import LinearRegression, LogisticRegression, SGDClassifier, SGDRegressor
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neural_network import MLPClassifier, MLPRegressor
+from sklearn.svm import SVC, SVR
+from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+
+TASKS = ("regression", "classification")
+MODEL_COST_UNITS_PER_SECOND = float(os.getenv("MODEL_COST_UNITS_PER_SECOND", "1e8"))
+# Budgets a single model's predicted fit must stay within (0 = unlimited)
+MODEL_TIME_BUDGET_SECONDS = float(os.getenv("MODEL_TIME_BUDGET_SECONDS", "0"))
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+
+
+@dataclass
+class ModelSpec:
+    name: str
+    task: str
+    factory: Callable[[], Any]
+    # (rows, cols) -> work units
+    cost: Callable[[int, int], float]
+    # (rows, cols) -> peak extra bytes of the fit, beyond the shared inputs
+    memory: Callable[[int, int], float]
+    supports_n_jobs: bool = False
+    supports_partial_fit: bool = False
+    # Part of the regular in-memory evaluation
+    batch: bool = True
+
+    def build(self):
+        return self.factory()
+
+    def estimate_seconds(self, rows: int, cols: int) -> float:
+        return self.cost(rows, cols) / MODEL_COST_UNITS_PER_SECOND
+
+    def estimate_memory_mb(self, rows: int, cols: int) -> float:
+        return self.memory(rows, cols) / 1024 ** 2
+
+
+def _log2(rows: int) -> float:
+    return math.log2(max(rows, 2))
+
+
+# Cost models. Linear least squares is one QR of the design matrix; libsvm's
+# linear-kernel SMO is quadratic in rows; a tree sorts every candidate
+# feature once per level; lbfgs touches the whole matrix per iteration.
+# Constants are calibrated against sklearn fits on 32000 x 21 float32.
+def _lstsq_cost(rows, cols):
+    return rows * cols * cols
+
+
+def _svm_cost(rows, cols):
+    return rows * rows * cols
+
+
+def _tree_cost(rows, cols):
+    return 10 * rows * cols * _log2(rows)
+
+
+def _forest_cost(n_estimators, features=lambda cols: cols):
+    # ``features``: how many columns each split considers; each tree fits a
+    # bootstrap sample with ~63% unique rows
+    return lambda rows, cols: n_estimators * _tree_cost(int(rows * 0.63), max(1, features(cols)))
+
+
+def _lbfgs_cost(iterations):
+    return lambda rows, cols: iterations * rows * cols
+
+
+def _sgd_cost(rows, cols):
+    return rows * cols
+
+
+def _mlp_cost(hidden):
+    # Forward and backward pass through one hidden layer
+    return lambda rows, cols: 3 * rows * cols * hidden
+
+
+# Memory models. Trees keep ~2 nodes per training row when fully grown,
+# each node ~64 bytes plus its value; libsvm adds its kernel cache.
+_NODE_BYTES = 80
+_SVM_CACHE_BYTES = 200 * 1024 ** 2
+
+
+def _copy_memory(rows, cols):
+    return rows * cols * 8
+
+
+def _weights_memory(rows, cols):
+    # Streaming models hold only their weights (here at most cols x 64)
+    return cols * 8 * 64
+
+
+def _svm_memory(rows, cols):
+    return _SVM_CACHE_BYTES + rows * cols * 8
+
+
+def _tree_memory(rows, cols):
+    return 2 * rows * _NODE_BYTES + rows * 8
+
+
+def _forest_memory(n_estimators):
+    # Each tree sees a bootstrap sample, ~63% unique rows
+    return lambda rows, cols: n_estimators * _tree_memory(int(rows * 0.63), cols)
+
+
+_REGISTRY: Dict[str, Dict[str, ModelSpec]] = {task: {} for task in TASKS}
+
+
+def register_model(spec: ModelSpec):
+    """Add (or replace) a candidate model for ``spec.task``."""
+    if spec.task not in _REGISTRY:
+        raise ValueError(f"Unknown task '{spec.task}'. Expected one of {TASKS}.")
+    _REGISTRY[spec.task][spec.name] = spec
+
+
+def get_specs(task: str, incremental: bool = False) -> Dict[str, ModelSpec]:
+    """The batch catalog for ``task``, or with ``incremental`` the partial_fit one."""
+    if task not in _REGISTRY:
+        raise ValueError(f"Unknown task '{task}'. Expected one of {TASKS}.")
+    return {
+        name: spec for name, spec in _REGISTRY[task].items()
+        if (spec.supports_partial_fit if incremental else spec.batch)
+    }
+
+
+def build_models(task: str, incremental: bool = False) -> Dict[str, Any]:
+    """Fresh estimators for ``task``, in registration order."""
+    return {name: spec.build() for name, spec in get_specs(task, incremental).items()}
+
+
+def plan_models(task: str, rows: int, cols: int,
+                time_budget: Optional[float] = None,
+                memory_budget_mb: Optional[float] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Choose and order the models to fit on a ``rows`` x ``cols`` training set.
+
+    Returns ``(models, skipped)``: fresh estimators ordered by estimated cost,
+    longest first, and one entry per model left out because its estimate
+    exceeds ``time_budget`` seconds or ``memory_budget_mb`` (defaults:
+    ``MODEL_TIME_BUDGET_SECONDS`` / ``MODEL_MEMORY_BUDGET_MB``; 0 = no limit).
+    """
+    time_budget = MODEL_TIME_BUDGET_SECONDS if time_budget is None else time_budget
+    memory_budget_mb = MODEL_MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb
+
+    scheduled, skipped = [], []
+    for spec in get_specs(task).values():
+        seconds = spec.estimate_seconds(rows, cols)
+        memory_mb = spec.estimate_memory_mb(rows, cols)
+        reason = None
+        if time_budget and seconds > time_budget:
+            reason = f"estimated fit time {seconds:.0f}s exceeds the {time_budget:.0f}s budget"
+        elif memory_budget_mb and memory_mb > memory_budget_mb:
+            reason = f"estimated memory {memory_mb:.0f} MB exceeds the {memory_budget_mb:.0f} MB budget"
+        if reason:
+            skipped.append({
+                "model": spec.name,
+                "reason": reason,
+                "estimated_seconds": round(seconds, 2),
+                "estimated_memory_mb": round(memory_mb, 1),
+            })
+        else:
+            scheduled.append((seconds, spec))
+
+    scheduled.sort(key=lambda item: item[0], reverse=True)
+    return {spec.name: spec.build() for _, spec in scheduled}, skipped
+
+
+for _spec in (
+    ModelSpec("Linear Regression", "regression", LinearRegression, _lstsq_cost, _copy_memory),
+    ModelSpec("Support Vector Machine", "regression", lambda: SVR(kernel="linear"), _svm_cost, _svm_memory),
+    ModelSpec("Decision Tree", "regression", lambda: DecisionTreeRegressor(random_state=42),
+              _tree_cost, _tree_memory),
+    ModelSpec("Random Forest", "regression", lambda: RandomForestRegressor(random_state=42),
+              _forest_cost(100), _forest_memory(100), supports_n_jobs=True),
+    ModelSpec("Logistic Regression", "classification", lambda: LogisticRegression(max_iter=200),
+              _lbfgs_cost(20), _copy_memory),
+    ModelSpec("Support Vector Machine", "classification", lambda: SVC(kernel="linear"), _svm_cost, _svm_memory),
+    ModelSpec("Decision Tree", "classification", lambda: DecisionTreeClassifier(random_state=42),
+              _tree_cost, _tree_memory),
+    ModelSpec("Random Forest", "classification", lambda: RandomForestClassifier(random_state=42),
+              _forest_cost(100, features=math.sqrt), _forest_memory(100), supports_n_jobs=True),
+    # Out-of-core candidates, trained chunk by chunk with partial_fit
+    ModelSpec("SGD Regressor", "regression", lambda: SGDRegressor(random_state=42), _sgd_cost, _weights_memory,
+              supports_partial_fit=True, batch=False),
+    ModelSpec("MLP Regressor", "regression",
+              lambda: MLPRegressor(hidden_layer_sizes=(64,), batch_size=256, random_state=42),
+              _mlp_cost(64), _weights_memory, supports_partial_fit=True, batch=False),
+    ModelSpec("SGD Classifier", "classification", lambda: SGDClassifier(loss="log_loss", random_state=42),
+              _sgd_cost, _weights_memory, supports_partial_fit=True, batch=False),
+    ModelSpec("Naive Bayes", "classification", GaussianNB, _sgd_cost, _weights_memory,
+              supports_partial_fit=True, batch=False),
+    ModelSpec("MLP Classifier", "classification",
+              lambda: MLPClassifier(hidden_layer_sizes=(64,), batch_size=256, random_state=42),
+              _mlp_cost(64), _weights_memory, supports_partial_fit=True, batch=False),
+):
+    register_model(_spec)
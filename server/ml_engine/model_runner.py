@@ -1,11 +1,11 @@
 import concurrent.futures
+import contextlib
+import os
 import pandas as pd
 import numpy as np
 import math
 import time
 from sklearn.model_selection import train_test_split, KFold, cross_val_score
-from sklearn.linear_model import LinearRegression
-from sklearn.svm import SVR
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.tree import DecisionTreeRegressor
 from sklearn.metrics import (
@@ -15,10 +15,8 @@ from sklearn.metrics import (
 )
 
 # Classification imports
-from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.svm import SVC
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import (
     accuracy_score,
@@ -27,7 +25,30 @@ from sklearn.metrics import (
     recall_score,
 )
 
-from ml_engine.data_handler import load_random_dataset
+from ml_engine.data_handler import load_cached_sample, load_random_dataset, sampling_signature
+from ml_engine.dataset_profile import cached_profile, infer_task
+from ml_engine.result_cache import FitCache, result_cache, file_digest, models_fingerprint, make_key
+from ml_engine.shared_data import attach_arrays, release
+from ml_engine.prepared import PreparedData, prepare_matrices
+from ml_engine.preprocessing import Preprocessor
+from ml_engine.model_registry import (
+    build_models, plan_models, get_specs, MODEL_TIME_BUDGET_SECONDS, MODEL_MEMORY_BUDGET_MB
+)
+from ml_engine.incremental import run_incremental, incremental_signature
+from ml_engine.learning_curve import curve_points, learning_curve, learning_curve_signature
+from ml_engine.cpu_budget import (
+    cpu_budget, allocate_shares, set_n_jobs, limit_native_threads, shared_native_threads
+)
+from ml_engine.budget import run_isolated, deadline_for, BUDGET_START_METHOD
+from ml_engine.tournament import (
+    SELECTION_MODES, MODEL_SELECTION_MODE, successive_halving, tournament_signature
+)
+from ml_engine.metrics import ACTIVE_FITS, MODEL_FIT_SECONDS, MODEL_FITS, MODEL_PREDICT_SECONDS, span
+
+# Where the per-model fits run: "thread" (default), "process" or "sequential".
+EXECUTOR_BACKENDS = ("thread", "process", "sequential")
+MODEL_EXECUTOR = os.getenv("MODEL_EXECUTOR", "thread")
+MODEL_MAX_WORKERS = int(os.getenv("MODEL_MAX_WORKERS", "0")) or None
 
 
 def safe_float(value):
@@ -55,7 +76,9 @@ def evaluate_model(name, model, X_train, X_test, y_train, y_test):
         train_time = time.time() - start
 
         # Predict
+        start = time.time()
         preds = model.predict(X_test)
+        predict_time = time.time() - start
         preds_train = model.predict(X_train)
 
         # Metrics (regression)
@@ -76,41 +99,401 @@ def evaluate_model(name, model, X_train, X_test, y_train, y_test):
         })
 
         result["training_time"] = safe_float(train_time)
+        result["predict_time"] = safe_float(predict_time)
 
         if r2_test is None:
             result["warning"] = "Dataset too small for reliable R² score"
 
         return result
 
+    except MemoryError:
+        raise
     except Exception as e:
         result["error"] = str(e)
         return result
 
 
-def run_models_parallel(file_path: str, target_col: str):
-    """Load dataset sample and evaluate multiple models in parallel threads.
+def evaluate_classification(name, model, X_train, X_test, y_train, y_test):
+    """Train and evaluate a single classification model."""
+    res = {"model": name}
+    try:
+        start = time.time()
+        model.fit(X_train, y_train)
+        train_time = time.time() - start
+        start = time.time()
+        preds = model.predict(X_test)
+        predict_time = time.time() - start
+
+        acc = accuracy_score(y_test, preds)
+        f1 = f1_score(y_test, preds, average="weighted", zero_division=0)
+        prec = precision_score(y_test, preds, average="weighted", zero_division=0)
+        rec = recall_score(y_test, preds, average="weighted", zero_division=0)
+
+        res.update({
+            "accuracy": safe_float(acc),
+            "f1_weighted": safe_float(f1),
+            "precision_weighted": safe_float(prec),
+            "recall_weighted": safe_float(rec)
+        })
+
+        res["training_time"] = safe_float(train_time)
+        res["predict_time"] = safe_float(predict_time)
+
+        return res
+    except MemoryError:
+        raise
+    except Exception as e:
+        res["error"] = str(e)
+        return res
+
+
+def regression_models():
+    return build_models("regression")
+
+
+def classification_models():
+    return build_models("classification")
+
+
+def models_signature(mode: str, time_budget: float = None, memory_budget_mb: float = None) -> str:
+    """Everything about model choice and settings that changes a run's results."""
+    signature = models_fingerprint(regression_models(), classification_models())
+    signature += f";budget={time_budget}s,{memory_budget_mb}MB"
+    if mode == "tournament":
+        signature += ";" + tournament_signature()
+    elif mode == "learning_curve":
+        signature += ";" + learning_curve_signature()
+    elif mode == "incremental":
+        signature += ";" + incremental_signature() + ";" + models_fingerprint(
+            build_models("regression", incremental=True), build_models("classification", incremental=True)
+        )
+    return signature
+
+
+# Tree models fit on float32 internally; giving them float32 avoids a copy per fit
+FLOAT32_MODELS = (DecisionTreeRegressor, DecisionTreeClassifier, RandomForestRegressor, RandomForestClassifier)
+
+
+def preferred_dtype(model):
+    return np.float32 if isinstance(model, FLOAT32_MODELS) else None
+
+
+def _train_subset(X_train, X_test, y_train, y_test, train_rows=None):
+    # The training split is already shuffled, so its first rows are a random
+    # subsample; slicing keeps them views of the shared buffers
+    if train_rows is None:
+        return X_train, X_test, y_train, y_test
+    return X_train[:train_rows], X_test, y_train[:train_rows], y_test
+
+
+def _evaluate_shared(evaluator, name, model, handles, train_rows=None, cores=None):
+    """Process-pool entry point: map the prepared arrays and run ``evaluator``.
+
+    ``cores`` (if given) caps this process's BLAS/OpenMP threads.
+    """
+    arrays, blocks = attach_arrays(handles)
+    try:
+        with limit_native_threads(cores):
+            return evaluator(name, model, *_train_subset(
+                arrays["X_train"], arrays["X_test"], arrays["y_train"], arrays["y_test"], train_rows
+            ))
+    finally:
+        del arrays
+        release(blocks)
+
+
+def _evaluate_limited(evaluator, name, model, arrays, cores=None):
+    """Forked-child entry point: the arrays are inherited, only cap threads."""
+    with limit_native_threads(cores):
+        return evaluator(name, model, *arrays)
+
+
+def _evaluate_threaded(evaluator, name, model, arrays):
+    """In-process entry point: share the global BLAS/OpenMP pools with the other running fits."""
+    with shared_native_threads():
+        return evaluator(name, model, *arrays)
+
+
+def _leased(share, call):
+    """``call(cores)`` while holding a lease on up to ``share`` cores (None: no lease)."""
+    with ACTIVE_FITS.track():
+        if share is None:
+            return call(None)
+        with cpu_budget.lease(share) as cores:
+            return call(cores)
+
+
+def _recording(task, on_result):
+    """Wrap ``on_result`` so every finished fit is also exported as metrics."""
+    def record(result):
+        name, error = result["model"], result.get("error")
+        outcome = "ok" if not error else "budget_exceeded" if error == "budget_exceeded" else "error"
+        MODEL_FITS.inc(model=name, outcome=outcome)
+        if result.get("training_time") is not None:
+            MODEL_FIT_SECONDS.observe(result["training_time"], model=name, task=task)
+        if result.get("predict_time") is not None:
+            MODEL_PREDICT_SECONDS.observe(result["predict_time"], model=name, task=task)
+        if on_result:
+            on_result(result)
+    return record
+
+
+def _with_cores(model, cores):
+    return set_n_jobs(model, cores) if cores else model
+
+
+def fit_models(evaluator, models, data: PreparedData,
+               backend=None, max_workers=None, executor=None, on_result=None, train_rows=None,
+               time_budget=None, memory_budget_mb=None, deadline=None, shares=None):
+    """Run ``evaluator`` for every model using the chosen executor backend.
+
+    ``data`` is the run's ``PreparedData``; every model reads the same
+    read-only arrays (tree models share one float32 version). ``backend`` is
+    one of ``EXECUTOR_BACKENDS``. With "process", workers receive handles to
+    shared memory or to the memory-mapped files rather than pickled copies.
+    Passing a long-lived ``executor`` reuses it (its type decides the backend)
+    instead of creating one per call. Results are returned in completion
+    order, and ``on_result`` (if given) is called with each one as soon as
+    its fit finishes. ``train_rows`` limits training to the first rows of the
+    (shuffled) training split; the full test split is always scored.
+
+    With a ``time_budget`` (seconds per fit), ``memory_budget_mb`` (per fit)
+    or ``deadline`` (``time.monotonic()`` value for the whole call), each fit
+    runs in its own child process that is killed once its budget runs out
+    and reported as ``{"model", "error": "budget_exceeded", "budget"}``;
+    the executor then only supplies the threads that wait on the children.
+
+    ``shares`` maps model names to the cores each fit should use (see
+    ``cpu_budget.allocate_shares``). Each fit leases its share from the
+    process-wide ``cpu_budget`` and gets the granted count as ``n_jobs``;
+    in its own process it also caps BLAS/OpenMP threads to it. Fits on
+    threads share the process's BLAS/OpenMP pools, which are capped to the
+    budget divided by the fits running (``shared_native_threads``).
+    """
+    if executor is not None:
+        backend = "process" if isinstance(executor, concurrent.futures.ProcessPoolExecutor) else "thread"
+    backend = backend or MODEL_EXECUTOR
+    if backend not in EXECUTOR_BACKENDS:
+        raise ValueError(f"Unknown executor backend '{backend}'. Expected one of {EXECUTOR_BACKENDS}.")
+    max_workers = max_workers or MODEL_MAX_WORKERS or min(len(models), os.cpu_count() or 1)
+    shares = shares or {}
+    on_result = _recording("classification" if evaluator is evaluate_classification else "regression", on_result)
+
+    if time_budget or memory_budget_mb or deadline is not None:
+        # Waiting on a child process needs a thread, not a process worker
+        if not isinstance(executor, concurrent.futures.ThreadPoolExecutor):
+            executor = None
+        pool = contextlib.nullcontext(executor) if executor is not None else \
+            concurrent.futures.ThreadPoolExecutor(max_workers=1 if backend == "sequential" else max_workers)
+
+        def isolated_call(name, model):
+            # A forked child inherits the arrays as they are; re-attaching
+            # shared memory there can deadlock on the resource tracker's
+            # lock if another thread held it at fork time
+            if BUDGET_START_METHOD == "fork":
+                arrays = _train_subset(*data.arrays(preferred_dtype(model)), train_rows)
+                def make_args(cores):
+                    return evaluator, name, _with_cores(model, cores), arrays, cores
+                target = _evaluate_limited
+            else:
+                handles = data.handles(preferred_dtype(model))
+                def make_args(cores):
+                    return evaluator, name, _with_cores(model, cores), handles, train_rows, cores
+                target = _evaluate_shared
+            return _leased, shares.get(name), lambda cores: run_isolated(
+                name, target, make_args(cores), time_budget, memory_budget_mb, deadline
+            )
+
+        with pool as executor:
+            return _collect(executor, models, on_result, isolated_call)
+
+    if backend == "sequential":
+        results = []
+        for name, model in models.items():
+            arrays = _train_subset(*data.arrays(preferred_dtype(model)), train_rows)
+            try:
+                results.append(_leased(shares.get(name), lambda cores: _evaluate_threaded(
+                    evaluator, name, _with_cores(model, cores), arrays
+                )))
+            except Exception as e:
+                results.append({"model": name, "error": str(e) or type(e).__name__})
+            on_result(results[-1])
+        return results
+
+    if executor is not None:
+        pool = contextlib.nullcontext(executor)
+    elif backend == "process":
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    with pool as executor:
+        if backend == "process":
+            # Leased from submission until the parent sees the fit finish
+            held = {}
+
+            def process_call(name, model):
+                cores = held[name] = cpu_budget.acquire(shares[name]) if name in shares else None
+                ACTIVE_FITS.inc()
+                return (_evaluate_shared, evaluator, name, _with_cores(model, cores),
+                        data.handles(preferred_dtype(model)), train_rows, cores)
+
+            def release_cores(name):
+                if name in held:
+                    ACTIVE_FITS.dec()
+                    cores = held.pop(name)
+                    if cores:
+                        cpu_budget.release(cores)
+
+            try:
+                return _collect(executor, models, on_result, process_call, on_done=release_cores)
+            finally:
+                for name in list(held):
+                    release_cores(name)
+
+        def thread_call(name, model):
+            arrays = _train_subset(*data.arrays(preferred_dtype(model)), train_rows)
+            return _leased, shares.get(name), lambda cores: _evaluate_threaded(
+                evaluator, name, _with_cores(model, cores), arrays
+            )
+
+        return _collect(executor, models, on_result, thread_call)
+
+
+def _collect(executor, models, on_result, make_call, on_done=None):
+    futures = {executor.submit(*make_call(name, model)): name for name, model in models.items()}
+    results = []
+    for f in concurrent.futures.as_completed(futures):
+        if on_done:
+            on_done(futures[f])
+        try:
+            results.append(f.result())
+        except Exception as e:
+            # e.g. MemoryError, or a process worker that died mid-fit
+            results.append({"model": futures[f], "error": str(e) or type(e).__name__})
+        on_result(results[-1])
+    return results
+
+
+def _rank_regression(result):
+    # Sort by test R² safely
+    return result.get("r2_test") is not None, result.get("r2_test") or 0
+
+
+def _rank_classification(result):
+    # Sort by accuracy
+    return result.get("accuracy") or 0
+
+
+def run_models_parallel(file_path: str, target_col: str, backend: str = None, max_workers: int = None,
+                        executor=None, on_start=None, on_result=None,
+                        use_cache: bool = True, dataset_hash: str = None, mode: str = None,
+                        time_budget: float = None, memory_budget_mb: float = None,
+                        request_time_budget: float = None):
+    """Load dataset sample and evaluate multiple models in parallel.
 
     This function now supports both regression (numeric target) and
     classification (non-numeric / categorical target). The returned
     payload includes a `task` field set to either "regression" or
     "classification".
+
+    ``backend`` selects how the per-model fits are executed ("thread",
+    "process" or "sequential"); it defaults to the ``MODEL_EXECUTOR``
+    environment variable. ``executor`` lets a caller such as the server-wide
+    evaluation pool supply a long-lived executor for the fits.
+
+    For incremental reporting, ``on_start(task, model_names)`` is called once
+    the task type is known and ``on_result(result)`` as each model finishes.
+
+    With ``use_cache`` the payload is first looked up in the result cache by
+    file content (``dataset_hash`` if the caller already has it), target,
+    sampling decision and model hyperparameters; a hit skips training and is
+    marked ``"cached": True``.
+
+    ``mode`` (one of ``SELECTION_MODES``, default ``MODEL_SELECTION_MODE``)
+    chooses between training every model on the full split and a
+    successive-halving tournament in which only the finalists see all the
+    training rows; pruned models are reported with the round and training
+    size at which they were dropped. "incremental" skips sampling and
+    streams every row through the partial_fit models in constant memory
+    (``ml_engine.incremental.run_incremental``; budgets do not apply).
+    "learning_curve" trains every model on growing fractions of the data
+    until its score levels off, and reports the curve and the rows worth
+    training on (``ml_engine.learning_curve``).
+
+    With ``use_cache`` the sample is also stored next to the upload and
+    each single fit is cached by model and training rows; the sampled
+    modes share both, so a full run after a learning curve only trains
+    the models the curve stopped early.
+
+    ``time_budget`` / ``memory_budget_mb`` bound each model's fit (defaults
+    ``MODEL_TIME_BUDGET_SECONDS`` / ``MODEL_MEMORY_BUDGET_MB``) and
+    ``request_time_budget`` the whole call (``REQUEST_TIME_BUDGET_SECONDS``);
+    0 means unlimited. Models predicted to exceed them are skipped up front,
+    and fits that do exceed them are killed and reported as
+    ``{"model", "error": "budget_exceeded"}`` while the rest still finish.
     """
-    df = load_random_dataset(file_path)
+    deadline = deadline_for(request_time_budget)
+    time_budget = MODEL_TIME_BUDGET_SECONDS if time_budget is None else time_budget
+    memory_budget_mb = MODEL_MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb
+    mode = mode or MODEL_SELECTION_MODE
+    if mode not in SELECTION_MODES:
+        raise ValueError(f"Unknown selection mode '{mode}'. Expected one of {SELECTION_MODES}.")
+
+    cache_key = None
+    if use_cache:
+        dataset_hash = dataset_hash or file_digest(file_path)
+        cache_key = make_key(
+            dataset_hash,
+            target_col,
+            sampling_signature(),
+            models_signature(mode, time_budget, memory_budget_mb),
+        )
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            if on_start:
+                on_start(cached["task"], [r["model"] for r in cached["results"]])
+            if on_result:
+                for r in cached["results"]:
+                    on_result(r)
+            cached["cached"] = True
+            return cached
+
+    if mode == "incremental":
+        payload = run_incremental(file_path, target_col, on_start=on_start, on_result=on_result)
+        if cache_key and not any("error" in r for r in payload["results"]):
+            result_cache.put(cache_key, payload)
+        return payload
+
+    # The sample is stored next to the upload, so a later run (in any mode)
+    # skips the scan and the sampling pass
+    if use_cache:
+        df = load_cached_sample(file_path, target_col)
+    else:
+        df = load_random_dataset(file_path, target_col)
 
     if target_col not in df.columns:
         raise ValueError(f"Target column '{target_col}' not found. Columns: {list(df.columns)}")
 
     X = df.drop(columns=[target_col])
     y = df[target_col]
-
-    # Determine task type
-    n_unique = int(y.nunique(dropna=True))
-    is_numeric = pd.api.types.is_numeric_dtype(y)
-
-    # Heuristic: treat as classification when the column is non-numeric, OR
-    # when it's numeric but has relatively few unique values (likely discrete classes).
-    # This handles cases like 0/1 labels stored as numbers.
-    if (not is_numeric) or (is_numeric and n_unique <= 20):
+    rows_used, columns, sampling = len(df), list(df.columns), df.attrs.get("sampling")
+    del df
+
+    # Determine task type. The dataset profile, when one is stored, has the
+    # target's dtype and distinct count over every row; otherwise look at the sample.
+    profile = cached_profile(file_path)
+    task = infer_task(profile, target_col) if profile else None
+    if task is None:
+        n_unique = int(y.nunique(dropna=True))
+        is_numeric = pd.api.types.is_numeric_dtype(y)
+
+        # Heuristic: treat as classification when the column is non-numeric, OR
+        # when it's numeric but has relatively few unique values (likely discrete classes).
+        # This handles cases like 0/1 labels stored as numbers.
+        task = "classification" if (not is_numeric) or (is_numeric and n_unique <= 20) else "regression"
+
+    if task == "classification":
         # Classification path
         le = LabelEncoder()
         try:
@@ -132,81 +515,105 @@ def run_models_parallel(file_path: str, target_col: str):
     if len(X) < 10:
         test_size = 0.4 if len(X) > 5 else 0.5
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y_model, test_size=test_size, random_state=42)
-
-    results = []
+    # Keep every class in both splits when there are enough rows of each,
+    # so a rare class the sample kept isn't lost to an unlucky split
+    stratify = None
+    if not is_regression:
+        class_sizes = np.bincount(y_model)
+        if class_sizes.min() >= 2 and math.ceil(len(X) * test_size) >= len(class_sizes):
+            stratify = y_model
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y_model, test_size=test_size, random_state=42, stratify=stratify
+    )
+
+    # Fit scaling/encoding on the training split only, then encode both
+    # splits once; every model and metric reads the same buffers
+    with span("preprocess"):
+        preprocessor = Preprocessor().fit(X_train)
+        data = prepare_matrices(X_train, X_test, y_train, y_test, preprocessor=preprocessor)
+    del X, X_train, X_test, y_train, y_test
+
+    # Longest fits first; models predicted to blow the budget are left out
+    models, skipped = plan_models(task, len(data.y_train), data.n_features, time_budget, memory_budget_mb)
+    if not models:
+        data.close()
+        raise ValueError(
+            "Every candidate model is predicted to exceed the time or memory budget: "
+            + "; ".join(f"{s['model']}: {s['reason']}" for s in skipped)
+        )
+    # Cores per fit, by estimated cost; only n_jobs-capable models get more than one
+    specs = get_specs(task)
+    shares = allocate_shares(
+        {name: specs[name].estimate_seconds(len(data.y_train), data.n_features) for name in models},
+        {name: specs[name].supports_n_jobs for name in models},
+    )
 
     if is_regression:
-        models = {
-            "Linear Regression": LinearRegression(),
-            "Support Vector Machine": SVR(kernel="linear"),
-            "Decision Tree": DecisionTreeRegressor(random_state=42),
-            "Random Forest": RandomForestRegressor(random_state=42)
-        }
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = [
-                executor.submit(evaluate_model, name, model, X_train, X_test, y_train, y_test)
-                for name, model in models.items()
-            ]
-            results.extend(f.result() for f in concurrent.futures.as_completed(futures))
-
-        # Sort by test R² safely
-        results = sorted(
-            results,
-            key=lambda x: (x.get("r2_test") is not None, x.get("r2_test") or 0),
-            reverse=True
+        evaluator = evaluate_model
+        rank = _rank_regression
+    else:
+        evaluator = evaluate_classification
+        rank = _rank_classification
+
+    n_train = len(data.y_train)
+    # Every mode trains on this sample and split, so single fits are
+    # cached under keys the modes share (a full run reuses a learning
+    # curve's last step, and the other way round)
+    fit_cache = None
+    if use_cache:
+        fit_cache = FitCache(
+            dataset_hash, target_col, sampling_signature(), f"budget={time_budget}s,{memory_budget_mb}MB"
         )
 
-    else:
-        # Classification evaluator
-        def evaluate_classification(name, model, X_train, X_test, y_train, y_test):
-            res = {"model": name}
-            try:
-                start = time.time()
-                model.fit(X_train, y_train)
-                train_time = time.time() - start
-                preds = model.predict(X_test)
-
-                acc = accuracy_score(y_test, preds)
-                f1 = f1_score(y_test, preds, average="weighted", zero_division=0)
-                prec = precision_score(y_test, preds, average="weighted", zero_division=0)
-                rec = recall_score(y_test, preds, average="weighted", zero_division=0)
-
-                res.update({
-                    "accuracy": safe_float(acc),
-                    "f1_weighted": safe_float(f1),
-                    "precision_weighted": safe_float(prec),
-                    "recall_weighted": safe_float(rec)
-                })
-
-                res["training_time"] = safe_float(train_time)
-
-                return res
-            except Exception as e:
-                res["error"] = str(e)
-                return res
-
-        models = {
-            "Logistic Regression": LogisticRegression(max_iter=200),
-            "Support Vector Machine": SVC(kernel="linear"),
-            "Decision Tree": DecisionTreeClassifier(random_state=42),
-            "Random Forest": RandomForestClassifier(random_state=42)
-        }
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = [
-                executor.submit(evaluate_classification, name, model, X_train, X_test, y_train, y_test)
-                for name, model in models.items()
-            ]
-            results.extend(f.result() for f in concurrent.futures.as_completed(futures))
-
-        # Sort by accuracy
-        results = sorted(results, key=lambda x: x.get("accuracy") or 0, reverse=True)
-
-    return {
-        "rows_used": len(df),
-        "columns": list(df.columns),
-        "task": "regression" if is_regression else "classification",
+    def fit(alive, train_rows=None, on_fit=None):
+        def run(todo):
+            return fit_models(
+                evaluator, todo, data, backend=backend, max_workers=max_workers, executor=executor,
+                on_result=on_fit, train_rows=train_rows, time_budget=time_budget,
+                memory_budget_mb=memory_budget_mb, deadline=deadline, shares=shares
+            )
+        if fit_cache is None:
+            return run(alive)
+        return fit_cache.fit(run, alive, train_rows or n_train, on_result=on_fit)
+
+    rounds = curve = None
+    with data:
+        if on_start:
+            on_start(task, list(models))
+        if mode == "tournament":
+            results, rounds = successive_halving(fit, models, n_train, rank, on_result=on_result)
+        elif mode == "learning_curve":
+            metric_name = "r2_test" if is_regression else "accuracy"
+            total_rows = (sampling or {}).get("total_rows") or rows_used
+            results, curve = learning_curve(
+                fit, models, n_train, curve_points(total_rows, rows_used, n_train),
+                lambda r: r.get(metric_name), on_result=on_result
+            )
+            curve["metric"] = metric_name
+            if curve["recommended"]:
+                curve["recommended"]["rows"] = math.ceil(curve["recommended"]["fraction"] * total_rows)
+        else:
+            results = sorted(fit(models, on_fit=on_result), key=rank, reverse=True)
+
+    payload = {
+        "rows_used": rows_used,
+        "columns": columns,
+        "task": task,
+        "sampling": sampling,
+        "features": {
+            "numeric": preprocessor.numeric_features,
+            "categorical": preprocessor.categorical_features
+        },
+        "mode": mode,
         "results": results
     }
+    if skipped:
+        payload["skipped"] = skipped
+    if rounds is not None:
+        payload["tournament"] = rounds
+    if curve is not None:
+        payload["learning_curve"] = curve
+    if cache_key and not any("error" in r for r in results):
+        result_cache.put(cache_key, payload)
+    return payload
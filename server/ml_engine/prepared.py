@@ -0,0 +1,177 @@
+"""Prepared feature matrices shared by every estimator in a run.
+
+Given pandas train/test splits, each sklearn estimator would run its own
+``check_array`` and make its own contiguous float copy of the same data.
+``prepare_matrices`` does that conversion once. It produces read-only,
+C-contiguous arrays that every model and metric computation reads directly.
+
+- Small inputs live in RAM.
+- Once the feature matrices reach ``PREPARED_MMAP_BYTES`` they are written
+  block by block to ``.npy`` files in a temp directory and memory-mapped, so
+  the OS can page them and worker processes can map the same file.
+
+Tree ensembles work in float32 internally and would copy float64 input on
+every fit, so ``arrays(np.float32)`` derives one float32 version, built once
+and shared by all tree models.
+"""
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ml_engine.shared_data import Handle, SharedArrays
+
+PREPARED_MMAP_BYTES = int(os.getenv("PREPARED_MMAP_BYTES", str(256 * 1024 * 1024)))
+
+# Rows converted per block when filling a memory-mapped matrix
+_BLOCK_ROWS = 65536
+
+_KEYS = ("X_train", "X_test", "y_train", "y_test")
+
+
+class PreparedData:
+    """Read-only train/test arrays, optionally backed by memory-mapped files.
+
+    Use as a context manager (or call ``close``) to drop temp files and
+    shared-memory blocks once all fits are done.
+    """
+
+    def __init__(self, X_train, X_test, y_train, y_test, tmpdir: Optional[str] = None):
+        self.tmpdir = tmpdir
+        self.y_train = y_train
+        self.y_test = y_test
+        self._features: Dict[np.dtype, Tuple[np.ndarray, np.ndarray]] = {
+            X_train.dtype: (X_train, X_test)
+        }
+        self._shared: Dict[np.dtype, SharedArrays] = {}
+        self.dtype = X_train.dtype
+
+    @property
+    def memory_mapped(self) -> bool:
+        return self.tmpdir is not None
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.y_train) + len(self.y_test)
+
+    @property
+    def n_features(self) -> int:
+        return self._features[self.dtype][0].shape[1]
+
+    def arrays(self, dtype=None):
+        """``(X_train, X_test, y_train, y_test)`` with features in ``dtype``."""
+        dtype = np.dtype(dtype or self.dtype)
+        if dtype not in self._features:
+            X_train, X_test = self._features[self.dtype]
+            self._features[dtype] = (
+                _store(X_train, dtype, self.tmpdir, f"X_train_{dtype}"),
+                _store(X_test, dtype, self.tmpdir, f"X_test_{dtype}"),
+            )
+        X_train, X_test = self._features[dtype]
+        return X_train, X_test, self.y_train, self.y_test
+
+    def handles(self, dtype=None) -> Dict[str, Handle]:
+        """Handles a worker process can pass to ``shared_data.attach_arrays``."""
+        arrays = dict(zip(_KEYS, self.arrays(dtype)))
+        if self.memory_mapped:
+            return {
+                key: ("mmap", arr.filename, arr.shape, arr.dtype.str)
+                for key, arr in arrays.items()
+            }
+        dtype = np.dtype(dtype or self.dtype)
+        if dtype not in self._shared:
+            self._shared[dtype] = SharedArrays(**arrays)
+        return self._shared[dtype].handles
+
+    def close(self):
+        for shared in self._shared.values():
+            shared.close()
+        self._shared = {}
+        self._features = {}
+        if self.tmpdir:
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _store(values, dtype, tmpdir: Optional[str], name: str, preprocessor=None) -> np.ndarray:
+    """Convert ``values`` to a read-only contiguous array, in RAM or on disk.
+
+    With a fitted ``preprocessor`` the rows are encoded by it, directly into
+    the destination buffer.
+    """
+    dtype = np.dtype(dtype)
+    if tmpdir is None:
+        if preprocessor is not None:
+            arr = preprocessor.transform(values, dtype=dtype)
+        else:
+            arr = np.ascontiguousarray(_to_numpy(values, dtype))
+        arr.flags.writeable = False
+        return arr
+
+    path = os.path.join(tmpdir, f"{name}.npy")
+    if preprocessor is not None:
+        shape = (len(values), preprocessor.n_features)
+    else:
+        shape = (len(values),) + tuple(np.shape(values)[1:])
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+    for start in range(0, shape[0], _BLOCK_ROWS):
+        stop = start + _BLOCK_ROWS
+        block = values.iloc[start:stop] if hasattr(values, "iloc") else values[start:stop]
+        if preprocessor is not None:
+            preprocessor.transform(block, out=out[start:stop])
+        else:
+            out[start:stop] = _to_numpy(block, dtype)
+    out.flush()
+    del out
+    return np.load(path, mmap_mode="r")
+
+
+def _to_numpy(values, dtype):
+    if hasattr(values, "to_numpy"):
+        return values.to_numpy(dtype=dtype)
+    return np.asarray(values, dtype=dtype)
+
+
+def prepare_matrices(X_train, X_test, y_train, y_test, dtype=np.float64,
+                     mmap_threshold: int = PREPARED_MMAP_BYTES, preprocessor=None) -> PreparedData:
+    """Convert a train/test split once into shared, read-only arrays.
+
+    If a fitted ``preprocessing.Preprocessor`` is given, feature frames are
+    encoded by it on the way in. Otherwise raises ValueError if a feature
+    column can't be represented as ``dtype``.
+    """
+    dtype = np.dtype(dtype)
+    if preprocessor is not None:
+        n_features = preprocessor.n_features
+    else:
+        n_features = X_train.shape[1] if len(np.shape(X_train)) > 1 else 1
+    nbytes = (len(X_train) + len(X_test)) * n_features * dtype.itemsize
+    tmpdir = tempfile.mkdtemp(prefix="mv-prepared-") if nbytes >= mmap_threshold else None
+
+    try:
+        y_kind = np.asarray(y_train[:1]).dtype
+        y_dtype = y_kind if y_kind.kind in "iu" else dtype
+        return PreparedData(
+            _store(X_train, dtype, tmpdir, "X_train", preprocessor),
+            _store(X_test, dtype, tmpdir, "X_test", preprocessor),
+            _store(y_train, y_dtype, tmpdir, "y_train"),
+            _store(y_test, y_dtype, tmpdir, "y_test"),
+            tmpdir=tmpdir,
+        )
+    except (ValueError, TypeError) as e:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        non_numeric = [
+            c for c, t in getattr(X_train, "dtypes", {}).items()
+            if not (pd.api.types.is_numeric_dtype(t) or pd.api.types.is_bool_dtype(t))
+        ]
+        detail = f" Non-numeric feature columns: {non_numeric}." if non_numeric else ""
+        raise ValueError(f"Features could not be converted to {dtype.name}: {e}.{detail}")
@@ -1,40 +1,147 @@
+import json
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List, Optional
 
 def load_dataset(file_path: str) -> pd.DataFrame:
     """Load and perform initial preprocessing on the dataset."""
     df = pd.read_csv(file_path)
     return df
 
-def preprocess_data(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+
+class Preprocessor:
+    """Fitted, reusable feature transform: numeric scaling + categorical codes.
+
+    `fit` learns per-column means/standard deviations for numeric features and
+    the category list of every other column. `transform` then writes straight
+    into one preallocated float matrix (numeric block first, categorical codes
+    after), one vectorised column operation at a time, so cost is linear in
+    the number of columns. Missing numeric values become 0 after scaling (the
+    training mean); unseen categories encode as -1.
+
+    The fitted state is plain JSON (`to_dict` / `save`), so the exact same
+    transform can be re-applied to new data later without refitting.
+    """
+
+    def __init__(self):
+        self.numeric_features: List[str] = []
+        self.categorical_features: List[str] = []
+        self.means: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self.categories: Dict[str, List[str]] = {}
+        self._indexes: Dict[str, pd.Index] = {}
+
+    @property
+    def n_features(self) -> int:
+        return len(self.numeric_features) + len(self.categorical_features)
+
+    @property
+    def feature_names(self) -> List[str]:
+        return self.numeric_features + self.categorical_features
+
+    def fit(self, df: pd.DataFrame) -> "Preprocessor":
+        self.numeric_features = [
+            c for c in df.columns
+            if pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c])
+        ]
+        numeric = set(self.numeric_features)
+        self.categorical_features = [c for c in df.columns if c not in numeric]
+
+        values = df[self.numeric_features].to_numpy(dtype=np.float64)
+        if len(values):
+            self.means = np.nan_to_num(np.nanmean(values, axis=0))
+            scales = np.nan_to_num(np.nanstd(values, axis=0))
+        else:
+            self.means = np.zeros(len(self.numeric_features))
+            scales = np.ones(len(self.numeric_features))
+        # Constant columns are centred but not scaled
+        scales[scales == 0] = 1.0
+        self.scales = scales
+
+        self.categories = {
+            c: sorted({str(v) for v in df[c].dropna().unique()})
+            for c in self.categorical_features
+        }
+        self._indexes = {}
+        return self
+
+    def _index(self, col: str) -> pd.Index:
+        # Hash index over the fitted categories, built once per column
+        index = self._indexes.get(col)
+        if index is None:
+            index = self._indexes[col] = pd.Index(self.categories[col], dtype=object)
+        return index
+
+    def transform(self, df: pd.DataFrame, dtype=np.float64, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Encode `df` into `out` (allocated if not given) and return it."""
+        if self.means is None:
+            raise ValueError("Preprocessor must be fitted before transform")
+        missing = [c for c in self.feature_names if c not in df.columns]
+        if missing:
+            raise ValueError(f"Columns missing for transform: {missing}")
+
+        if out is None:
+            out = np.empty((len(df), self.n_features), dtype=dtype)
+        n_num = len(self.numeric_features)
+
+        if n_num:
+            block = out[:, :n_num]
+            block[...] = df[self.numeric_features].to_numpy(dtype=np.float64)
+            block -= self.means.astype(out.dtype)
+            block /= self.scales.astype(out.dtype)
+            np.nan_to_num(block, copy=False, nan=0.0)
+
+        for j, col in enumerate(self.categorical_features, start=n_num):
+            # Hash the column once, then look up only its distinct values;
+            # they are matched on their string form, like in `fit`
+            row_codes, uniques = pd.factorize(df[col], use_na_sentinel=True)
+            as_text = [str(v) for v in uniques]
+            lookup = np.append(self._index(col).get_indexer(as_text), -1)
+            # NaN rows carry factorize's -1 sentinel, i.e. the trailing -1
+            out[:, j] = lookup[row_codes]
+        return out
+
+    def fit_transform(self, df: pd.DataFrame, dtype=np.float64) -> np.ndarray:
+        return self.fit(df).transform(df, dtype=dtype)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "numeric_features": self.numeric_features,
+            "categorical_features": self.categorical_features,
+            "means": self.means.tolist() if self.means is not None else None,
+            "scales": self.scales.tolist() if self.scales is not None else None,
+            "categories": self.categories,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "Preprocessor":
+        pre = cls()
+        pre.numeric_features = list(state["numeric_features"])
+        pre.categorical_features = list(state["categorical_features"])
+        pre.means = np.asarray(state["means"], dtype=np.float64) if state["means"] is not None else None
+        pre.scales = np.asarray(state["scales"], dtype=np.float64) if state["scales"] is not None else None
+        pre.categories = {k: list(v) for k, v in state["categories"].items()}
+        return pre
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.to_dict(), fh)
+
+    @classmethod
+    def load(cls, path: str) -> "Preprocessor":
+        with open(path, "r", encoding="utf-8") as fh:
+            return cls.from_dict(json.load(fh))
+
+
+def preprocess_data(df: pd.DataFrame) -> Tuple[np.ndarray, Dict[str, Any]]:
     """Preprocess data for model training."""
-    # Basic preprocessing steps
-    numeric_features = df.select_dtypes(include=[np.number]).columns
-    categorical_features = df.select_dtypes(include=['object']).columns
-    
-    # Handle numeric features
-    scaler = StandardScaler()
-    X_numeric = scaler.fit_transform(df[numeric_features])
-    
-    # Handle categorical features
-    encoders = {}
-    X_categorical = np.zeros((len(df), 0))
-    for feature in categorical_features:
-        le = LabelEncoder()
-        encoded = le.fit_transform(df[feature])
-        X_categorical = np.column_stack((X_categorical, encoded))
-        encoders[feature] = le
-    
-    # Combine features
-    X = np.column_stack((X_numeric, X_categorical))
-    
+    preprocessor = Preprocessor()
+    X = preprocessor.fit_transform(df)
+
     preprocessing_info = {
-        'scaler': scaler,
-        'encoders': encoders,
-        'numeric_features': numeric_features.tolist(),
-        'categorical_features': categorical_features.tolist()
+        'preprocessor': preprocessor,
+        'numeric_features': preprocessor.numeric_features,
+        'categorical_features': preprocessor.categorical_features
     }
-    
-    return X, preprocessing_info
\ No newline at end of file
+
+    return X, preprocessing_info
@@ -0,0 +1,199 @@
+"""Content-addressed cache of evaluation payloads.
+
+Users often re-upload the same file and re-run it against the same target.
+``run_models_parallel`` looks the run up here before loading or training
+anything. The key is a hash of:
+
+- the file bytes (not its name or path),
+- the target column,
+- the sampling decision ``data_handler`` will apply, and
+- the hyperparameters of every candidate estimator,
+
+so a change to any of them is a miss. Single fits are cached too
+(`FitCache`), so runs in different selection modes share the fits they
+have in common. They live in a cache of their own, ``fit_result_cache``,
+so its hits and misses are not mixed into the payload cache's hit rate.
+Entries are evicted least-recently-used
+once the cache exceeds ``RESULT_CACHE_MAX_ENTRIES`` or ``RESULT_CACHE_MAX_BYTES``
+(measured as serialized JSON), and expire after ``RESULT_CACHE_TTL_SECONDS``.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ml_engine.metrics import counter_family, gauge_family, registry
+
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(24 * 3600)))
+# Single-model fits (FitCache); several per evaluation, each small
+FIT_CACHE_MAX_ENTRIES = int(os.getenv("FIT_CACHE_MAX_ENTRIES", "2048"))
+FIT_CACHE_MAX_BYTES = int(os.getenv("FIT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of the file contents, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def models_fingerprint(*catalogs) -> str:
+    """Stable hash of every estimator's class and hyperparameters."""
+    spec = []
+    for catalog in catalogs:
+        for name, model in catalog.items():
+            params = {k: repr(v) for k, v in sorted(model.get_params().items())}
+            spec.append([name, type(model).__name__, params])
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def make_key(dataset_hash: str, target_col: str, sampling: str, models_hash: str) -> str:
+    raw = json.dumps([dataset_hash, target_col, sampling, models_hash])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+        ttl_seconds: int = RESULT_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        # key -> (stored_at, size, payload); ordered oldest-used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl_seconds:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[2])
+
+    def put(self, key: str, payload: Dict[str, Any]):
+        size = len(json.dumps(payload, default=str))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (time.time(), size, copy.deepcopy(payload))
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str):
+        self._bytes -= self._entries.pop(key)[1]
+        self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+result_cache = ResultCache()
+fit_result_cache = ResultCache(max_entries=FIT_CACHE_MAX_ENTRIES, max_bytes=FIT_CACHE_MAX_BYTES)
+
+
+class FitCache:
+    """Single-model results in ``fit_result_cache``, keyed by model and training rows.
+
+    A payload is only reused by a run of the same mode. The fits inside it
+    are shared more widely. Full, tournament and learning-curve runs of
+    one dataset and target train on the same sample and split. So a model
+    fitted on a given number of its training rows gives the same result
+    whichever mode asked for it. ``settings`` holds anything else that
+    changes a fit, e.g. its budgets.
+    """
+
+    def __init__(self, dataset_hash: str, target_col: str, sampling: str, settings: str = ""):
+        self.dataset_hash = dataset_hash
+        self.target_col = target_col
+        self.sampling = sampling
+        self.settings = settings
+
+    def key(self, name: str, model, train_rows: int) -> str:
+        fit = f"{models_fingerprint({name: model})};rows={train_rows};{self.settings}"
+        return make_key(self.dataset_hash, self.target_col, self.sampling, fit)
+
+    def fit(self, fit, models: Dict[str, Any], train_rows: int, on_result=None):
+        """Results of ``models`` on ``train_rows`` rows; ``fit(models)`` runs the ones not cached.
+
+        Cached results are marked ``"cached": True`` (not a metric; see
+        ``evaluation_service.model_result_rows``) and passed to
+        ``on_result``; results with an error are not stored.
+        """
+        # Keyed before fitting: a fit may set n_jobs on its model
+        keys = {name: self.key(name, model, train_rows) for name, model in models.items()}
+        results, todo = [], {}
+        for name, model in models.items():
+            hit = fit_result_cache.get(keys[name])
+            if hit is None:
+                todo[name] = model
+                continue
+            hit["cached"] = True
+            results.append(hit)
+            if on_result:
+                on_result(hit)
+        if todo:
+            for r in fit(todo):
+                if "error" not in r and r.get("model") in todo:
+                    fit_result_cache.put(keys[r["model"]], r)
+                results.append(r)
+        return results
+
+
+def _families(prefix: str, what: str, cache: ResultCache):
+    stats = cache.stats()
+    return [
+        counter_family(f"{prefix}_hits_total", f"{what} lookups that found an entry", stats["hits"]),
+        counter_family(f"{prefix}_misses_total", f"{what} lookups that found nothing", stats["misses"]),
+        counter_family(f"{prefix}_evictions_total", f"{what} entries evicted", stats["evictions"]),
+        gauge_family(f"{prefix}_hit_rate", f"Share of {what.lower()} lookups that hit", stats["hit_rate"]),
+        gauge_family(f"{prefix}_entries", f"Entries in the {what.lower()}", stats["entries"]),
+        gauge_family(f"{prefix}_bytes", f"Approximate size of the {what.lower()}", stats["bytes"]),
+    ]
+
+
+def _cache_metrics():
+    return (_families("result_cache", "Result cache", result_cache)
+            + _families("fit_cache", "Fit cache", fit_result_cache))
+
+
+registry.register_collector(_cache_metrics)
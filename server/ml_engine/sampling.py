@@ -0,0 +1,209 @@
+# server/ml_engine/sampling.py
+"""Target-aware, reproducible row sampling for `load_random_dataset`.
+
+The rows are split into strata:
+
+- "stratified" (classification targets): one stratum per class;
+- "binned" (numeric targets): one per quantile bin of the target, with
+  edges from the t-digest gathered while scanning. Tied values merge
+  edges, so the bins can be very uneven (a target that is 60% zeros puts
+  them all in one bin); their rows are counted against the final edges
+  in one more pass over the target column;
+- "uniform": a single stratum.
+
+"auto" (the default, ``SAMPLING_STRATEGY``) picks stratified when the scan
+found class counts, binned when it found target quantiles, and uniform
+otherwise. Rows with a missing target form a stratum of their own.
+
+The sample size is shared out across strata in proportion to their size.
+Every stratum gets at least ``min_per_stratum`` rows, or all of its rows
+if it has fewer. A rare class can no longer vanish from the sample, and
+the policy can size the sample for the floor instead of for the rarest
+class under uniform sampling.
+
+Within each stratum the rows are a uniform sample without replacement.
+It is chosen in one streaming pass: every row draws a random key, and the
+rows with the smallest keys in their stratum are kept ("bottom-k"). Only
+the kept rows are held, never the file. The keys come from a generator
+seeded by ``SAMPLING_SEED``, or else by a hash of the dataset and target.
+The same file therefore gives the same sample on every run, and the seed
+is recorded with the result.
+"""
+import os
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ml_engine.sampling_policy import DatasetStats
+
+SAMPLING_STRATEGY = os.getenv("SAMPLING_STRATEGY", "auto")
+# Fixed seed for every dataset; unset derives one per dataset and target
+SAMPLING_SEED = os.getenv("SAMPLING_SEED")
+SAMPLING_BINS = int(os.getenv("SAMPLING_BINS", "10"))
+# More classes than this (e.g. an ID-like text target) are sampled uniformly
+SAMPLING_MAX_STRATA = int(os.getenv("SAMPLING_MAX_STRATA", "100"))
+MIN_PER_STRATUM = 30
+STRATEGIES = ("auto", "uniform", "stratified", "binned")
+
+
+def sampling_seed(file_path: str, target_col: Optional[str]) -> int:
+    """``SAMPLING_SEED``, else a stable hash of the file name and target.
+
+    Uploads are stored under their content hash, so the name identifies
+    the bytes.
+    """
+    if SAMPLING_SEED is not None:
+        return int(SAMPLING_SEED)
+    name = os.path.basename(file_path)
+    if name.endswith(".parquet"):
+        name = name[:-len(".parquet")]
+    return zlib.crc32(f"{name}:{target_col}".encode())
+
+
+def resolve_strategy(stats: DatasetStats, strategy: str = None) -> str:
+    strategy = strategy or SAMPLING_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown sampling strategy '{strategy}'. Expected one of {STRATEGIES}.")
+    can_stratify = bool(stats.class_counts) and len(stats.class_counts) <= SAMPLING_MAX_STRATA
+    can_bin = bool(stats.target_quantiles)
+    if strategy == "auto":
+        return "stratified" if can_stratify else "binned" if can_bin else "uniform"
+    if (strategy == "stratified" and not can_stratify) or (strategy == "binned" and not can_bin):
+        return "uniform"
+    return strategy
+
+
+class Strata:
+    """Maps target values to stratum ids 0..n-1 (the last one is "target missing")."""
+
+    def __init__(self, strategy: str, stats: DatasetStats):
+        self.strategy = strategy
+        self.classes: List[str] = []
+        self.edges = np.empty(0)
+        if strategy == "stratified":
+            self.classes = list(stats.class_counts)
+            self._index = {label: i for i, label in enumerate(self.classes)}
+        elif strategy == "binned":
+            self.edges = np.unique(np.asarray(stats.target_quantiles[1:-1], dtype=float))
+        if strategy == "uniform":
+            self.n = 1
+        else:
+            self.n = (len(self.classes) if strategy == "stratified" else len(self.edges) + 1) + 1
+
+    def assign(self, values: Optional[pd.Series], n: int) -> np.ndarray:
+        if self.strategy == "uniform" or values is None:
+            return np.zeros(n, dtype=np.int64)
+        ids = np.full(n, self.n - 1, dtype=np.int64)
+        present = values.notna().to_numpy()
+        if self.strategy == "stratified":
+            from ml_engine.data_handler import label_strings  # data_handler imports this module
+            labels = label_strings(values[present])
+            # A label the scan didn't track joins the "missing" stratum
+            ids[present] = labels.map(self._index).fillna(self.n - 1).to_numpy(dtype=np.int64)
+        else:
+            ids[present] = np.searchsorted(self.edges, values[present].to_numpy(dtype=float), side="right")
+        return ids
+
+    def populations(self, stats: DatasetStats, counts: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows per stratum, from the class counts or, for quantile bins, ``counts``.
+
+        ``counts`` are rows per stratum counted with `assign` (see
+        ``data_handler.count_strata``); the scan's statistics can't tell
+        how many rows share a tied edge.
+        """
+        if self.strategy == "uniform":
+            return np.array([stats.rows])
+        if self.strategy == "binned":
+            if counts is None:
+                raise ValueError("Quantile bins need their rows counted (data_handler.count_strata)")
+            return np.asarray(counts, dtype=float)
+        counts = [stats.class_counts[c] for c in self.classes]
+        present = sum(counts)
+        return np.array(counts + [max(stats.rows - present, 0)], dtype=float)
+
+    def describe(self, i: int):
+        if self.strategy == "uniform":
+            return "all"
+        if i == self.n - 1:
+            return "missing"
+        if self.strategy == "stratified":
+            return self.classes[i]
+        lo = float(self.edges[i - 1]) if i > 0 else None
+        hi = float(self.edges[i]) if i < len(self.edges) else None
+        return [lo, hi]
+
+
+def allocate(populations: np.ndarray, sample_size: int, min_per_stratum: int = MIN_PER_STRATUM) -> np.ndarray:
+    """Rows to sample from each stratum.
+
+    Every stratum gets ``min(population, min_per_stratum)`` rows. The rest
+    of ``sample_size`` is shared in proportion to what each stratum has
+    left, with largest-remainder rounding. The floors win if they alone
+    exceed ``sample_size``.
+    """
+    populations = np.floor(populations).astype(np.int64)
+    floor = np.minimum(populations, min_per_stratum)
+    room = populations - floor
+    remaining = min(max(sample_size - int(floor.sum()), 0), int(room.sum()))
+    if remaining == 0 or not room.sum():
+        return floor
+    share = room * remaining / room.sum()
+    extra = np.floor(share).astype(np.int64)
+    leftover = remaining - int(extra.sum())
+    if leftover:
+        extra[np.argsort(-(share - extra), kind="stable")[:leftover]] += 1
+    return floor + np.minimum(extra, room)
+
+
+class BottomK:
+    """Streaming per-stratum sample: keep the rows with the ``quota`` smallest keys.
+
+    ``offer`` takes each chunk's stratum ids and row positions, plus the
+    rows themselves when the caller needs them back (CSV). Memory is the
+    kept rows only.
+    """
+
+    def __init__(self, quotas: np.ndarray, rng: np.random.Generator):
+        self.quotas = np.asarray(quotas, dtype=np.int64)
+        self.rng = rng
+        self.keys = np.empty(0)
+        self.strata = np.empty(0, dtype=np.int64)
+        self.positions = np.empty(0, dtype=np.int64)
+        self.rows: Optional[pd.DataFrame] = None
+
+    def offer(self, strata: np.ndarray, positions: np.ndarray, rows: pd.DataFrame = None):
+        keys = np.concatenate([self.keys, self.rng.random(len(strata))])
+        all_strata = np.concatenate([self.strata, strata])
+        all_positions = np.concatenate([self.positions, positions])
+
+        # Rank of each row within its stratum by key; keep the ones under quota
+        order = np.lexsort((keys, all_strata))
+        sorted_strata = all_strata[order]
+        starts = np.flatnonzero(np.r_[True, sorted_strata[1:] != sorted_strata[:-1]])
+        first = np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        keep = np.sort(order[np.arange(len(order)) - first < self.quotas[sorted_strata]])
+
+        self.keys, self.strata, self.positions = keys[keep], all_strata[keep], all_positions[keep]
+        if rows is not None:
+            combined = rows if self.rows is None else pd.concat([self.rows, rows], ignore_index=True)
+            self.rows = combined.iloc[keep].reset_index(drop=True)
+
+    def result(self):
+        """(positions, rows or None) in file order."""
+        order = np.argsort(self.positions, kind="stable")
+        rows = self.rows.iloc[order].reset_index(drop=True) if self.rows is not None else None
+        return self.positions[order], rows
+
+    def counts(self) -> np.ndarray:
+        return np.bincount(self.strata, minlength=len(self.quotas))
+
+
+def strata_report(strata: Strata, populations: np.ndarray, sampled: np.ndarray) -> List[Dict]:
+    """Per-stratum population and sample counts for the sampling record (empty strata left out)."""
+    return [
+        {"stratum": strata.describe(i), "rows": int(round(populations[i])), "sampled": int(sampled[i])}
+        for i in range(strata.n)
+        if populations[i] > 0 or sampled[i] > 0
+    ]
@@ -0,0 +1,234 @@
+# server/ml_engine/sampling_policy.py
+"""Pluggable policies deciding how many rows to sample for a quick evaluation.
+
+`load_random_dataset` gathers a `DatasetStats` for the file (shape plus a
+summary of the target column, when it knows the target) and asks the active
+policy for a sample size. Policies are registered by name; the default is
+chosen with the `SAMPLE_SIZE_POLICY` environment variable.
+
+- "heuristic" (default): deterministic, local, no network.
+- "gemini": asks the Gemini API, with a timeout and one memoised answer per
+  (rows, cols) shape, and falls back to the heuristic on any failure.
+"""
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "your_gemini_api_key_here")
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "5"))
+SAMPLE_SIZE_POLICY = os.getenv("SAMPLE_SIZE_POLICY", "heuristic")
+GEMINI_MAX_CACHED_ANSWERS = 1024
+
+
+@dataclass
+class DatasetStats:
+    """What a policy may look at. Target fields are None when unknown."""
+    rows: int
+    cols: int
+    # Label -> row count, for targets that look categorical
+    class_counts: Optional[Dict[str, int]] = None
+    # Mean and variance, for numeric targets
+    target_mean: Optional[float] = None
+    target_variance: Optional[float] = None
+    # Non-missing numeric target values, and their approximate quantiles at
+    # evenly spaced levels from 0 to 1 (bin edges for stratified sampling)
+    target_count: Optional[int] = None
+    target_quantiles: Optional[List[float]] = None
+    # Set when the sample will be stratified by class, so every class is
+    # guaranteed its share instead of showing up by chance
+    stratified: bool = False
+    extra: dict = field(default_factory=dict)
+
+
+class SampleSizePolicy:
+    """Base class: return how many rows of the dataset to evaluate on."""
+    name = "base"
+
+    def sample_size(self, stats: DatasetStats) -> int:
+        raise NotImplementedError
+
+    def signature(self) -> str:
+        """Identifies the policy and its settings, e.g. for cache keys."""
+        return self.name
+
+
+def _quantile(quantiles: List[float], q: float) -> float:
+    """Interpolate the quantile at level ``q`` from quantiles at evenly spaced levels."""
+    position = q * (len(quantiles) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(quantiles) - 1)
+    return quantiles[lower] + (quantiles[upper] - quantiles[lower]) * (position - lower)
+
+
+def _target_spread(quantiles: Optional[List[float]]) -> Optional[float]:
+    """Interquartile range of the target, or its range if that is zero."""
+    if not quantiles or len(quantiles) < 2:
+        return None
+    return (_quantile(quantiles, 0.75) - _quantile(quantiles, 0.25)) or (quantiles[-1] - quantiles[0]) or None
+
+
+class HeuristicSampleSizePolicy(SampleSizePolicy):
+    """Deterministic sample size from shape, class balance and target spread.
+
+    The result is the largest of these requirements, clamped to
+    [min_rows, max_rows] and to the dataset size:
+
+    - `rows_per_feature` rows for every column;
+    - `fraction` of all rows (the old "about 1%" guideline);
+    - for categorical targets, `min_per_class` rows of every class when the
+      sample is stratified, otherwise enough rows that the rarest class is
+      expected to appear `min_per_class` times;
+    - for numeric targets, enough rows to estimate the mean within
+      `relative_error` of the target's interquartile range at ~95%
+      confidence: n = (1.96 * sd / (relative_error * IQR))^2. The ratio
+      sd / IQR is what varies: about 0.74 for a normal target (~840 rows),
+      less for flat or bimodal ones and more for heavy tails, whose mean is
+      pulled around by rare large values. It does not depend on the
+      target's scale or where it is centred; a coefficient of variation
+      would blow up for targets whose mean is near zero. The IQR comes from
+      the target quantiles; if it is zero, the full range is used instead.
+    """
+    name = "heuristic"
+
+    def __init__(
+        self,
+        min_rows: int = 200,
+        max_rows: int = 50_000,
+        rows_per_feature: int = 20,
+        fraction: float = 0.01,
+        min_per_class: int = 30,
+        relative_error: float = 0.05,
+    ):
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.rows_per_feature = rows_per_feature
+        self.fraction = fraction
+        self.min_per_class = min_per_class
+        self.relative_error = relative_error
+
+    def sample_size(self, stats: DatasetStats) -> int:
+        needed = max(self.rows_per_feature * stats.cols, int(stats.rows * self.fraction))
+
+        if stats.class_counts and stats.stratified:
+            # Each class is sampled separately, so min_per_class of each suffices
+            needed = max(needed, self.min_per_class * len(stats.class_counts))
+        elif stats.class_counts:
+            total = sum(stats.class_counts.values())
+            rarest = min(stats.class_counts.values())
+            if total and rarest:
+                needed = max(needed, math.ceil(self.min_per_class * total / rarest))
+
+        spread = _target_spread(stats.target_quantiles)
+        if stats.target_variance and spread:
+            sd = math.sqrt(stats.target_variance)
+            needed = max(needed, math.ceil((1.96 * sd / (self.relative_error * spread)) ** 2))
+
+        return int(min(stats.rows, max(self.min_rows, min(needed, self.max_rows))))
+
+    def signature(self) -> str:
+        return (
+            f"{self.name}:min={self.min_rows},max={self.max_rows},"
+            f"per_feature={self.rows_per_feature},fraction={self.fraction},"
+            f"per_class={self.min_per_class},rel_err_iqr={self.relative_error}"
+        )
+
+
+# (rows, cols) -> Gemini's answer; only successful answers are kept, so a
+# timeout is retried on the next request instead of sticking until restart
+_gemini_answers: Dict[Tuple[int, int], int] = {}
+
+
+def ask_gemini_for_sample_size(row_count: int, column_count: int, timeout: float = GEMINI_TIMEOUT_SECONDS) -> Optional[int]:
+    """
+    Uses Gemini API to determine how many samples to take from the dataset
+    based on its size and complexity. Returns None if the call fails, so the
+    caller can fall back; successful answers are memoised per (rows, cols).
+    """
+    key = (row_count, column_count)
+    if key in _gemini_answers:
+        return _gemini_answers[key]
+    suggested = _ask_gemini(row_count, column_count, timeout)
+    if suggested is not None:
+        if len(_gemini_answers) >= GEMINI_MAX_CACHED_ANSWERS:
+            # Forget the oldest answer (dicts keep insertion order)
+            _gemini_answers.pop(next(iter(_gemini_answers)), None)
+        _gemini_answers[key] = suggested
+    return suggested
+
+
+def _ask_gemini(row_count: int, column_count: int, timeout: float) -> Optional[int]:
+    prompt = f"""
+    You are an AI data strategist.
+    A dataset has {row_count} rows and {column_count} columns.
+    Suggest an optimal number of rows to sample for a quick model performance preview
+    (not full training).
+    Rules:
+    - If rows < 1000: return {row_count} (use all)
+    - If rows between 1000–10,000: return a small representative sample (maybe 200–500)
+    - If rows > 10,000: return a manageable subset (around 1% of rows)
+    Respond with only a number (integer, no text).
+    """
+
+    headers = {"Authorization": f"Bearer {GEMINI_API_KEY}"}
+    data = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+    try:
+        response = requests.post(
+            "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent",
+            headers=headers,
+            json=data,
+            timeout=timeout
+        )
+    except requests.RequestException as e:
+        print("Gemini API Error:", e)
+        return None
+
+    if response.status_code != 200:
+        print("Gemini API Error:", response.text)
+        return None
+
+    try:
+        gemini_text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
+        suggested_rows = int("".join([c for c in gemini_text if c.isdigit()]))
+        return max(25, suggested_rows)
+    except Exception as e:
+        print("Gemini parsing error:", e)
+        return None
+
+
+class GeminiSampleSizePolicy(SampleSizePolicy):
+    """Optional LLM-backed policy; falls back to `fallback` on any failure."""
+    name = "gemini"
+
+    def __init__(self, timeout: float = GEMINI_TIMEOUT_SECONDS, fallback: SampleSizePolicy = None):
+        self.timeout = timeout
+        self.fallback = fallback or HeuristicSampleSizePolicy()
+
+    def sample_size(self, stats: DatasetStats) -> int:
+        suggested = ask_gemini_for_sample_size(stats.rows, stats.cols, self.timeout)
+        if suggested is None:
+            return self.fallback.sample_size(stats)
+        return min(suggested, stats.rows)
+
+    def signature(self) -> str:
+        return f"{self.name}|{self.fallback.signature()}"
+
+
+_POLICIES: Dict[str, Callable[[], SampleSizePolicy]] = {
+    "heuristic": HeuristicSampleSizePolicy,
+    "gemini": GeminiSampleSizePolicy,
+}
+
+
+def register_policy(name: str, factory: Callable[[], SampleSizePolicy]):
+    """Make a policy selectable by name (e.g. via SAMPLE_SIZE_POLICY)."""
+    _POLICIES[name] = factory
+
+
+def get_policy(name: Optional[str] = None) -> SampleSizePolicy:
+    name = name or SAMPLE_SIZE_POLICY
+    if name not in _POLICIES:
+        raise ValueError(f"Unknown sample size policy '{name}'. Available: {sorted(_POLICIES)}")
+    return _POLICIES[name]()
@@ -0,0 +1,83 @@
+"""Shared-memory handoff of train/test arrays to worker processes.
+
+A process-pool worker would normally receive a pickled copy of the feature
+matrices with every submitted fit. Instead, the parent copies each array once
+into a ``multiprocessing.shared_memory`` block and only ships a small handle
+to the workers, which map the same pages. Arrays that already live in a
+``.npy`` memory-mapped file are shared by path instead, with no copy at all.
+
+A handle is ``(kind, location, shape, dtype)`` where kind is "shm" (location
+is the block name) or "mmap" (location is the file path).
+"""
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+Handle = Tuple[str, str, Tuple[int, ...], str]
+
+
+class SharedArrays:
+    """Owns shared-memory copies of a set of named NumPy arrays.
+
+    Use as a context manager; the blocks are unlinked on exit, so every
+    worker must be done with them by then.
+    """
+
+    def __init__(self, **arrays: np.ndarray):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.handles: Dict[str, Handle] = {}
+        try:
+            for key, arr in arrays.items():
+                arr = np.ascontiguousarray(arr)
+                block = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(arr.shape, dtype=arr.dtype, buffer=block.buf)[...] = arr
+                self.handles[key] = ("shm", block.name, arr.shape, arr.dtype.str)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_arrays(handles: Dict[str, Handle]):
+    """Map the arrays described by ``handles`` in the current process.
+
+    Returns ``(arrays, blocks)``; pass ``blocks`` to ``release`` once the
+    arrays are no longer needed.
+    """
+    arrays = {}
+    blocks = []
+    for key, (kind, location, shape, dtype) in handles.items():
+        if kind == "mmap":
+            arrays[key] = np.load(location, mmap_mode="r")
+            continue
+        block = shared_memory.SharedMemory(name=location)
+        blocks.append(block)
+        arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        arrays[key].flags.writeable = False
+    return arrays, blocks
+
+
+def release(blocks):
+    """Close attached blocks, tolerating views an estimator still holds."""
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError:
+            pass
+
@@ -0,0 +1,167 @@
+# server/ml_engine/sketches.py
+"""Mergeable summaries of a column, in bounded memory however long it is.
+
+- `HyperLogLog` estimates the number of distinct values. It has 2**p
+  one-byte registers, with a relative error of about 1.04 / sqrt(2**p):
+  1.6% at the default p=12, in 4 KiB.
+- `TDigest` estimates quantiles. It keeps about ``compression / 2``
+  weighted centroids, which are smaller near the tails, so extreme
+  quantiles stay accurate.
+
+Both take whole chunks as numpy/pandas input and update with vectorised
+operations, with no per-value Python loop. Both can be merged, so
+summaries of parts (chunks, files, workers) combine into the summary of
+the whole. Both serialise to JSON-safe dicts for storage in the dataset
+profile.
+"""
+import base64
+import math
+import os
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+HLL_PRECISION = int(os.getenv("HLL_PRECISION", "12"))
+TDIGEST_COMPRESSION = float(os.getenv("TDIGEST_COMPRESSION", "200"))
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """64-bit hashes of the non-missing values.
+
+    Numbers are hashed as float64, so 1 and 1.0 (an integer column parsed
+    as float in a chunk with missing values) are the same value.
+    """
+    values = values.dropna()
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        values = values.astype("float64")
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+class HyperLogLog:
+    """Distinct-count estimate (Flajolet et al., with linear counting for small counts)."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        if not 11 <= precision <= 18:
+            # >= 11 keeps the rank bits below 2**53, where float64 is exact
+            raise ValueError("HyperLogLog precision must be between 11 and 18")
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values: pd.Series) -> "HyperLogLog":
+        return self.update_hashes(hash_values(values))
+
+    def update_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        if not len(hashes):
+            return self
+        bits = 64 - self.p
+        index = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = (hashes & np.uint64((1 << bits) - 1)).astype(np.float64)
+        # Position of the leftmost 1 in the remaining bits (bits + 1 if none)
+        _, bit_length = np.frexp(rest)
+        rank = (bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self) -> Dict:
+        return {"p": self.p, "registers": base64.b64encode(self.registers.tobytes()).decode()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HyperLogLog":
+        hll = cls(data["p"])
+        hll.registers = np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8).copy()
+        return hll
+
+
+class TDigest:
+    """Quantile estimate (Dunning's merging t-digest, k1 scale function).
+
+    Incoming values and existing centroids are sorted together. Each one is
+    then assigned to the unit interval of the scale function its
+    cumulative weight falls in, and each interval is collapsed to one
+    centroid. That is a sort plus ``np.add.reduceat``, with no loop over
+    values.
+    """
+
+    def __init__(self, compression: float = TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    @property
+    def total(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values) -> "TDigest":
+        v = np.asarray(values, dtype=np.float64)
+        v = v[~np.isnan(v)]
+        if len(v):
+            self._absorb(v, np.ones(len(v)))
+        return self
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        if len(other.means):
+            self._absorb(other.means, other.weights, other.min, other.max)
+        return self
+
+    def _absorb(self, means: np.ndarray, weights: np.ndarray, lo: float = None, hi: float = None):
+        lo = float(means.min()) if lo is None else lo
+        hi = float(means.max()) if hi is None else hi
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        cluster = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Sequence[float]) -> list:
+        if not len(self.means):
+            return [None] * len(qs)
+        cum = np.cumsum(self.weights) - self.weights / 2
+        xs = np.concatenate([[0.0], cum, [self.total]])
+        ys = np.concatenate([[self.min], self.means, [self.max]])
+        return [float(x) for x in np.interp(np.asarray(qs) * self.total, xs, ys)]
+
+    def to_dict(self) -> Dict:
+        return {
+            "compression": self.compression, "min": self.min, "max": self.max,
+            "means": self.means.tolist(), "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TDigest":
+        digest = cls(data["compression"])
+        digest.means = np.asarray(data["means"], dtype=np.float64)
+        digest.weights = np.asarray(data["weights"], dtype=np.float64)
+        digest.min, digest.max = data["min"], data["max"]
+        return digest
@@ -0,0 +1,101 @@
+# server/ml_engine/tournament.py
+"""Successive halving: a tournament that trains only the promising models fully.
+
+The "tournament" selection mode trains every candidate on a small prefix
+of the training split, keeps the best 1/``TOURNAMENT_ETA`` of them, and
+retrains the survivors on ``TOURNAMENT_ETA`` times as many rows. It
+repeats until ``TOURNAMENT_FINALISTS`` models are left, which are trained
+on the whole split. No round trains on fewer than ``TOURNAMENT_MIN_ROWS``
+rows. Each round's subset is a prefix of the next one, so the rounds are
+comparable, and the final round is the same fit a "full" run does.
+
+Models dropped early keep the metrics of the round they were dropped in.
+Slow models that would lose anyway are therefore never fitted on the whole
+split.
+"""
+import math
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+# How evaluation picks its winner: "full" trains every model on the whole
+# training split, "tournament" runs successive halving first, and
+# "incremental" streams the whole file through partial_fit models instead
+# of sampling it (see ml_engine.incremental), and "learning_curve" trains
+# on growing subsets until the scores level off (see ml_engine.learning_curve).
+SELECTION_MODES = ("full", "tournament", "incremental", "learning_curve")
+MODEL_SELECTION_MODE = os.getenv("MODEL_SELECTION_MODE", "full")
+# Fraction of candidates dropped per round is 1 - 1/eta
+TOURNAMENT_ETA = int(os.getenv("TOURNAMENT_ETA", "2"))
+# Smallest training subsample a round may use
+TOURNAMENT_MIN_ROWS = int(os.getenv("TOURNAMENT_MIN_ROWS", "200"))
+# How many models are trained on the full training split
+TOURNAMENT_FINALISTS = int(os.getenv("TOURNAMENT_FINALISTS", "1"))
+
+
+def tournament_signature(eta: int = None, min_rows: int = None, finalists: int = None) -> str:
+    return "tournament:eta={};min={};final={}".format(
+        eta or TOURNAMENT_ETA, min_rows or TOURNAMENT_MIN_ROWS, finalists or TOURNAMENT_FINALISTS
+    )
+
+
+def round_budgets(n_train: int, n_models: int, eta: int, min_rows: int, finalists: int) -> List[int]:
+    """Training-set size of each round, ending with the full split.
+
+    Every round keeps 1/eta of the field, so reaching ``finalists`` models
+    takes ceil(log_eta(n_models / finalists)) pruning rounds; budgets grow by
+    eta per round. Rounds whose budget would fall under ``min_rows`` are
+    merged into the first one that does not.
+    """
+    n_rounds = max(0, math.ceil(math.log(max(n_models / finalists, 1), eta)))
+    budgets = [int(n_train / eta ** (n_rounds - k)) for k in range(n_rounds + 1)]
+    budgets = [b for b in budgets[:-1] if b >= min(min_rows, n_train)] + [n_train]
+    return budgets
+
+
+def successive_halving(fit: Callable[[Dict[str, Any], Optional[int]], List[Dict[str, Any]]],
+                       models: Dict[str, Any], n_train: int, score: Callable[[Dict[str, Any]], float],
+                       eta: int = None, min_rows: int = None, finalists: int = None,
+                       on_result=None):
+    """Train ``models`` on growing subsamples, keeping the best 1/eta each round.
+
+    ``fit(models, train_rows)`` trains and scores the given models on the
+    first ``train_rows`` training rows (``None`` = all of them) and returns
+    their results; ``score`` ranks a result, higher is better (errors should
+    score lowest). Models dropped in a round keep that round's metrics, with
+    ``"pruned": {"round", "train_rows"}`` added; ``on_result`` is called with
+    each one as it is dropped and with the finalists at the end.
+
+    Returns ``(results, rounds)``: finalists first (best first), then pruned
+    models from the latest round back, and a per-round summary.
+    """
+    eta = max(2, eta or TOURNAMENT_ETA)
+    min_rows = min_rows or TOURNAMENT_MIN_ROWS
+    finalists = max(1, finalists or TOURNAMENT_FINALISTS)
+    budgets = round_budgets(n_train, len(models), eta, min_rows, finalists)
+
+    alive = dict(models)
+    pruned: List[Dict[str, Any]] = []
+    rounds = []
+    for k, budget in enumerate(budgets):
+        last = k == len(budgets) - 1
+        results = sorted(fit(alive, None if budget >= n_train else budget), key=score, reverse=True)
+        keep = len(results) if last else max(finalists, math.ceil(len(results) / eta))
+        rounds.append({
+            "round": k,
+            "train_rows": budget,
+            "models": [r["model"] for r in results],
+            "kept": [r["model"] for r in results[:keep]],
+        })
+        if last:
+            break
+        for r in results[keep:]:
+            r["pruned"] = {"round": k, "train_rows": budget}
+            if on_result:
+                on_result(r)
+        pruned = results[keep:] + pruned
+        alive = {r["model"]: alive[r["model"]] for r in results[:keep]}
+
+    if on_result:
+        for r in results:
+            on_result(r)
+    return results + pruned, rounds
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON
+from sqlalchemy import BigInteger, Column, Integer, String, Float, ForeignKey, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from core.database import Base
@@ -10,20 +10,37 @@ class Dataset(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     filename = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
+    # Parquet copy written at upload time; None if it couldn't be produced
+    columnar_path = Column(String, nullable=True)
+    # Recorded in the single pass that stores the upload (see ml_engine.ingest)
+    content_hash = Column(String(64), nullable=True, index=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    encoding = Column(String, nullable=True)
+    delimiter = Column(String(1), nullable=True)
+    row_count = Column(Integer, nullable=True)
+    column_count = Column(Integer, nullable=True)
+    null_counts = Column(JSON, nullable=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="datasets")
     results = relationship("ModelResult", back_populates="dataset", cascade="all, delete-orphan")
 
+    # Backs the keyset-paginated history listing
+    __table_args__ = (Index("ix_datasets_user_id_uploaded_at", "user_id", "uploaded_at"),)
+
 class ModelResult(Base):
     __tablename__ = "model_results"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    dataset_id = Column(Integer, ForeignKey("datasets.id"))
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), index=True)
     model_name = Column(String, nullable=False)
+    task = Column(String, nullable=True)
     r2_score = Column(Float)
     mse = Column(Float)
+    training_time = Column(Float, nullable=True)
+    # Every metric the evaluation reported for this model
+    metrics = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="results")
@@ -37,8 +54,20 @@ class AnalysisHistory(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=True)
     payload = Column(JSON, nullable=False)
+    # Summary of the payload (see evaluation_service.summarize_history), so
+    # listings never have to load the JSON
+    file = Column(String, nullable=True)
+    goal = Column(String, nullable=True)
+    task = Column(String, nullable=True)
+    best_model = Column(String, nullable=True)
+    best_score = Column(Float, nullable=True)
+    model_count = Column(Integer, nullable=True)
+    # Folded-stack profile of the run, for profiled (admin) evaluations
+    profile_path = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # relationships are optional for quick reads
-    user = relationship("User", back_populates="results", foreign_keys=[user_id])
+    user = relationship("User", foreign_keys=[user_id])
     dataset = relationship("Dataset", foreign_keys=[dataset_id])
+
+    __table_args__ = (Index("ix_analysis_history_user_id_created_at", "user_id", "created_at"),)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, DateTime
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from core.database import Base
@@ -10,6 +10,8 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Grants admin-only features such as profiled evaluations
+    is_admin = Column(Boolean, default=False, nullable=False)
 
     datasets = relationship("Dataset", back_populates="user", cascade="all, delete-orphan")
     results = relationship("ModelResult", back_populates="user", cascade="all, delete-orphan")
@@ -45,6 +45,11 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     else:
         raise HTTPException(status_code=404, detail="User not found")
 
+def get_current_admin(current_user: User = Depends(get_current_user)):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return current_user
+
 @router.get("/me", response_model=UserResponse)
 def read_users_me(current_user: User = Depends(get_current_user)):
     return current_user
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, UploadFile, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import os, shutil
+from typing import Optional
+import os
+import shutil
+import tempfile
 from datetime import datetime
 from core.database import get_db
 from models.data_models import Dataset
 from models.user_model import User
 from routers.auth_router import get_current_user
-import io
+from ml_engine import columnar
+from ml_engine.dataset_profile import get_profile
+from services.upload_service import dataset_fields, ingest_upload, prepare_dataset
 import pandas as pd
 
 router = APIRouter()
@@ -19,20 +25,24 @@ async def upload_dataset(
     current_user: User = Depends(get_current_user)
 ):
     """
-    Uploads a dataset file, stores it in /uploads, 
-    and creates a record in PostgreSQL (datasets table).
+    Uploads a dataset file, stores it in /uploads under its content hash,
+    and creates a record in PostgreSQL (datasets table) with the hash and
+    the profile (rows, columns, missing values, delimiter, encoding) taken
+    while the file streamed in.
+    A typed Parquet copy is written alongside for fast later reads, and the
+    dataset profile is computed for `GET /dataset/{id}/profile`.
     """
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
+    file_path, upload = await ingest_upload(file, UPLOAD_DIR, source="dataset_upload")
 
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    columnar_path, _ = await run_in_threadpool(prepare_dataset, file_path, upload)
 
     dataset = Dataset(
         user_id=current_user.id,
         filename=file.filename,
         file_path=file_path,
-        uploaded_at=datetime.utcnow()
+        columnar_path=columnar_path,
+        uploaded_at=datetime.utcnow(),
+        **dataset_fields(upload)
     )
     db.add(dataset)
     db.commit()
@@ -41,6 +51,7 @@ async def upload_dataset(
     return {
         "status": "success",
         "dataset_id": dataset.id,
+        "profile": upload.to_dict(),
         "message": f"Dataset '{file.filename}' uploaded successfully ✅"
     }
 
@@ -50,15 +61,92 @@ async def preview_dataset_columns(file: UploadFile):
     """Return columns, dtypes, and a small preview for an uploaded CSV file.
 
     Useful for frontend column selection before running evaluations.
+    The file is streamed and profiled like an upload (one pass, bounded
+    memory), but in a temporary directory that is removed afterwards: the
+    endpoint needs no login, so nothing it receives is kept.
     """
+    preview_dir = await run_in_threadpool(tempfile.mkdtemp, prefix="preview-")
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
+        file_path, _ = await ingest_upload(file, preview_dir, source="preview")
+        profile = await run_in_threadpool(get_profile, file_path)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Failed to parse CSV")
+    finally:
+        await run_in_threadpool(shutil.rmtree, preview_dir, True)
+
+    return {
+        "columns": list(profile["columns"]),
+        "dtypes": {col: p["dtype"] for col, p in profile["columns"].items()},
+        "preview": profile["head"][:5],
+        "profile": profile["columns"],
+    }
+
+
+@router.get("/{dataset_id}/profile")
+async def get_dataset_profile(
+    dataset_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Shape, first rows and per-column profile (dtype, nulls, cardinality,
+    min/max, approximate quantiles) of a stored dataset.
+
+    Served from the profile cached at upload; computed and cached on first
+    request for datasets uploaded before profiles existed.
+    """
+    dataset = db.query(Dataset).filter_by(id=dataset_id, user_id=current_user.id).first()
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    if not os.path.exists(dataset.file_path):
+        raise HTTPException(status_code=404, detail="Dataset file not found")
+    try:
+        profile = await run_in_threadpool(get_profile, dataset.file_path, dataset.columnar_path)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to profile dataset: {e}")
+
+    return {
+        "dataset_id": dataset.id,
+        "filename": dataset.filename,
+        "rows": profile["rows"],
+        "cols": profile["cols"],
+        "columns": profile["columns"],
+        "head": profile["head"],
+    }
+
+
+@router.get("/datasets/{dataset_id}/preview")
+def preview_stored_dataset(
+    dataset_id: int,
+    rows: int = Query(5, ge=1, le=1000),
+    columns: Optional[str] = Query(None, description="Comma-separated column names"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Columns, dtypes and the first rows of a stored dataset.
+
+    Reads the Parquet copy when there is one, so only the requested columns
+    and the first row group(s) are touched.
+    """
+    dataset = db.query(Dataset).filter_by(id=dataset_id, user_id=current_user.id).first()
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    wanted = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    try:
+        if dataset.columnar_path and os.path.exists(dataset.columnar_path):
+            df = columnar.read_parquet_head(dataset.columnar_path, rows, wanted)
+        elif dataset.file_path.endswith(".xlsx"):
+            df = pd.read_excel(dataset.file_path, nrows=rows, usecols=wanted)
+        else:
+            df = pd.read_csv(dataset.file_path, nrows=rows, usecols=wanted)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse CSV: {e}")
+        raise HTTPException(status_code=400, detail=f"Failed to read dataset: {e}")
+
+    if wanted and (missing := [c for c in wanted if c not in df.columns]):
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {missing}")
 
     return {
         "columns": list(df.columns),
         "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
-        "preview": df.head(5).to_dict(orient="records")
+        "preview": df.astype(object).where(df.notna(), None).to_dict(orient="records")
     }
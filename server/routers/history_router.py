@@ -1,40 +1,45 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from core.database import get_db
 from routers.auth_router import get_current_user
-from models.data_models import Dataset, ModelResult
 from models.user_model import User
+from services.history_service import (
+    HISTORY_PAGE_DEFAULT, HISTORY_PAGE_MAX, history_page
+)
 
 router = APIRouter()
 
 @router.get("/")
 def get_user_history(
+    limit: int = Query(HISTORY_PAGE_DEFAULT, ge=1, le=HISTORY_PAGE_MAX),
+    cursor: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    model: Optional[str] = None,
+    task: Optional[str] = None,
+    min_r2: Optional[float] = None,
+    max_mse: Optional[float] = None,
+    sort: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Fetch all datasets & model results for logged-in user."""
-    datasets = db.query(Dataset).filter_by(user_id=current_user.id).all()
-    history = []
+    """Fetch one page of the logged-in user's datasets & model results.
 
-    for ds in datasets:
-        results = db.query(ModelResult).filter_by(dataset_id=ds.id).all()
-        history.append({
-            "dataset": {
-                "id": ds.id,
-                "filename": ds.filename,
-                "uploaded_at": ds.uploaded_at
-            },
-            "results": [
-                {
-                    "model": r.model_name,
-                    "r2_score": r.r2_score,
-                    "mse": r.mse,
-                    "created_at": r.created_at
-                } for r in results
-            ]
-        })
+    Datasets come newest first (``order=asc`` for oldest first). Pass the
+    returned ``next_cursor`` as ``cursor`` for the next page. ``model``,
+    ``task``, ``min_r2`` and ``max_mse`` filter the results, and ``sort``
+    orders each dataset's results (see ``history_service.RESULT_SORT_FIELDS``).
+    """
+    try:
+        page = history_page(
+            db, current_user.id, limit=limit, cursor=cursor, newest_first=order == "desc",
+            model=model, task=task, min_r2=min_r2, max_mse=max_mse, sort=sort
+        )
+    except ValueError as e:  # includes InvalidCursor
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
         "status": "success",
-        "history": history
+        **page
     }
@@ -1,75 +1,245 @@
-from fastapi import APIRouter, UploadFile, Form, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, Form, Depends, Header, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-import os, shutil
-from datetime import datetime
-from core.database import get_db
+import asyncio
+import json
+import os
+import uuid
+from core.database import get_db, SessionLocal
+from core.jobs import job_store
+from core.worker_pool import get_pool, PoolSaturated
 from ml_engine.model_runner import run_models_parallel
-from models.data_models import Dataset, ModelResult
+from ml_engine.tournament import SELECTION_MODES
+from ml_engine.result_cache import fit_result_cache, result_cache, file_digest
+from ml_engine.columnar import write_columnar
+from ml_engine.ingest import UploadProfile
+from core.metrics import EVALUATIONS, span
+from core.profiler import SamplingProfiler
+from core.security import decode_token
+from models.data_models import AnalysisHistory
 from models.user_model import User
-from routers.auth_router import get_current_user
+from routers.auth_router import get_current_admin, get_current_user
+from services.evaluation_service import add_history, history_payload, persist_evaluation
+from services.upload_service import dataset_fields, ingest_upload, prepare_dataset
 import pandas as pd
 from pathlib import Path
+from typing import Optional
 
 router = APIRouter()
 UPLOAD_DIR = "server/uploads"
 
-@router.post("/evaluate")
+def _run_profiled(file_path: str, target_col: str, executor=None, backend=None, **kwargs):
+    """``run_models_parallel`` under the sampling profiler; returns (result, profiler).
+
+    The fits run on the profiler's own threads rather than the shared fit
+    executor, so every sample belongs to this run, and the result cache is
+    bypassed so the profile shows real work.
+    """
+    with SamplingProfiler() as profiler:
+        result = run_models_parallel(
+            file_path, target_col, executor=profiler.executor(), use_cache=False, **kwargs
+        )
+    return result, profiler
+
+
+def _profile_summary(profiler: SamplingProfiler, history_id: int) -> dict:
+    return {**profiler.summary(), "history_id": history_id, "download_url": f"/model/profiles/{history_id}"}
+
+
+def _run_evaluation_job(job, file_path: str, filename: str, target_col: str, user_id: int,
+                        user_email: Optional[str] = None, mode: Optional[str] = None,
+                        profile: bool = False, upload: Optional[UploadProfile] = None, **pool_kwargs):
+    """Worker-pool body of an evaluation job: fit, store results, report.
+
+    The upload is first converted to a Parquet copy, which the evaluation
+    (and any later re-run) reads instead of re-parsing the original text,
+    and profiled; task detection reads the target's cardinality from the
+    profile.
+    ``upload`` is the profile taken while the file was received. Its hash
+    keys the result cache, and its fields are stored on the Dataset row.
+    The dataset, its model results and the history entry are then stored
+    in one transaction (see ``evaluation_service.persist_evaluation``).
+    With ``profile`` the run is sampled (see ``_run_profiled``) and the
+    profile is stored with the history entry.
+    """
+    if upload is not None:
+        columnar_path, _ = prepare_dataset(file_path, upload)
+    else:
+        with span("columnar_write"):
+            columnar_path = write_columnar(file_path)
+    profiler = None
+    try:
+        kwargs = dict(on_start=job.start, on_result=job.add_result,
+                      dataset_hash=upload.sha256 if upload else file_digest(file_path), mode=mode, **pool_kwargs)
+        if profile:
+            result, profiler = _run_profiled(columnar_path or file_path, target_col, **kwargs)
+        else:
+            result = run_models_parallel(columnar_path or file_path, target_col, **kwargs)
+    except ValueError as e:
+        EVALUATIONS.inc(status="rejected")
+        job.fail(str(e))
+        return
+    except Exception as e:
+        EVALUATIONS.inc(status="failed")
+        job.fail(f"Evaluation failed: {e}")
+        return
+
+    profile_path = None
+    if profiler is not None:
+        profile_path = profiler.save(job.id)
+        result["profile"] = profiler.summary()
+
+    db = SessionLocal()
+    try:
+        dataset, history = persist_evaluation(
+            db, user_id, filename, file_path, target_col, result,
+            columnar_path=columnar_path, user_email=user_email,
+            profile_path=profile_path, dataset_fields=dataset_fields(upload) if upload else None,
+            job_id=job.id
+        )
+        dataset_id, history_id = dataset.id, history.id
+    except Exception as e:
+        EVALUATIONS.inc(status="failed")
+        job.fail(f"Failed to store results: {e}")
+        return
+    finally:
+        db.close()
+
+    if profiler is not None:
+        result["profile"] = _profile_summary(profiler, history_id)
+    job.meta["dataset_id"] = dataset_id
+    job.meta["history_id"] = history_id
+    EVALUATIONS.inc(status="completed")
+    job.complete(result)
+
+
+def _get_user_job(job_id: str, current_user: User):
+    job = job_store.get(job_id)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/evaluate", status_code=202)
 async def evaluate_models(
     file: UploadFile,
     target_col: str = Form(...),
-    db: Session = Depends(get_db),
+    mode: Optional[str] = Form(None),
+    profile: bool = Form(False),
     current_user: User = Depends(get_current_user)
 ):
-    """Upload → Evaluate → Store results."""
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    # Save dataset in DB
-    dataset = Dataset(
-        user_id=current_user.id,
-        filename=file.filename,
-        file_path=file_path
-    )
-    db.add(dataset)
-    db.commit()
-    db.refresh(dataset)
+    """Upload → queue evaluation job → return its id.
+
+    ``mode`` is "full" (train every model on all rows), "tournament"
+    (successive halving; only the best model trains on the full split),
+    "incremental" (stream the whole file through partial_fit models) or
+    "learning_curve" (train on growing subsets until the scores level off,
+    and report how many rows are worth training on).
+    ``profile`` (admins only) runs the evaluation under the sampling
+    profiler; the finished result links to the profile download.
 
-    # Run model evaluations (validate target column errors)
+    Progress is available from ``GET /model/jobs/{job_id}`` and, model by
+    model, from the ``GET /model/jobs/{job_id}/events`` SSE stream.
+    """
+    if mode is not None and mode not in SELECTION_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {SELECTION_MODES}")
+    if profile and not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Profiling is restricted to admins")
+
+    file_path, upload = await ingest_upload(file, UPLOAD_DIR, source="evaluate")
+
+    # The Dataset row is written with the results, once the job finishes
+    job = job_store.create(current_user.id, dataset_id=None, target_col=target_col)
     try:
-        result = run_models_parallel(file_path, target_col)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-    # Save each model's result to DB
-    for r in result["results"]:
-        db_result = ModelResult(
-            user_id=current_user.id,
-            dataset_id=dataset.id,
-            model_name=r["model"],
-            r2_score=r.get("r2_test") or r.get("r2_train") or 0.0,
-            mse=r.get("mse") or 0.0,
-            created_at=datetime.utcnow()
-        )
-        db.add(db_result)
-    db.commit()
+        get_pool().submit(_run_evaluation_job, job, file_path, file.filename, target_col,
+                          current_user.id, current_user.email, mode=mode, profile=profile, upload=upload)
+    except PoolSaturated as e:
+        job.fail(str(e))
+        raise HTTPException(status_code=503, detail=str(e))
 
     return {
-        "status": "success",
-        "message": "Model evaluation complete ✅",
-        "dataset_id": dataset.id,
-        "data": result
+        "status": "accepted",
+        "message": "Model evaluation queued",
+        "job_id": job.id,
+        "status_url": f"/model/jobs/{job.id}",
+        "events_url": f"/model/jobs/{job.id}/events"
     }
 
 
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str, current_user: User = Depends(get_current_user)):
+    """Current status, progress and any per-model results of a job."""
+    return _get_user_job(job_id, current_user).to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, current_user: User = Depends(get_current_user)):
+    """Server-sent events: ``started``, one ``result`` per model, then ``completed`` or ``failed``."""
+    job = _get_user_job(job_id, current_user)
+
+    async def event_stream():
+        queue = job.subscribe()
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+                if event["event"] in ("completed", "failed"):
+                    break
+        finally:
+            job.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/cache/stats")
+def get_cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit/miss/eviction counters of the evaluation result cache.
+
+    ``fits`` has the same counters for the cache of single-model fits.
+    """
+    return {**result_cache.stats(), "fits": fit_result_cache.stats()}
+
+
+@router.get("/profiles/{history_id}")
+def download_profile(history_id: int, db: Session = Depends(get_db),
+                     current_user: User = Depends(get_current_admin)):
+    """Folded-stack profile of a profiled evaluation (flamegraph.pl / speedscope input)."""
+    history = db.query(AnalysisHistory).filter_by(id=history_id).first()
+    if not history or not history.profile_path or not os.path.exists(history.profile_path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(history.profile_path, media_type="text/plain",
+                        filename=f"evaluation-{history_id}.folded")
+
+
+def _admin_from_header(authorization: Optional[str], db: Session) -> User:
+    email = None
+    if authorization and authorization.lower().startswith("bearer "):
+        email = decode_token(authorization.split(" ", 1)[1])
+    user = db.query(User).filter_by(email=email).first() if email else None
+    if not user or not user.is_admin:
+        raise HTTPException(status_code=403, detail="Profiling is restricted to admins")
+    return user
+
+
 @router.get("/run_test")
-def run_models_test():
+def run_models_test(profile: bool = False, authorization: Optional[str] = Header(None),
+                    db: Session = Depends(get_db)):
     """Unauthenticated helper endpoint used for quick server-side testing.
     It will look for a CSV in common upload locations, pick a target column,
     run `run_models_parallel`, and return the evaluation JSON.
+
+    ``profile=true`` (admin bearer token required) samples the run and
+    stores the profile with an AnalysisHistory row.
     """
+    admin = _admin_from_header(authorization, db) if profile else None
     # Locate a sample CSV (mirrors scripts/test_run_models.py)
     cwd = Path.cwd()
     candidates = [cwd / "uploads", cwd / "server" / "uploads", cwd / "data", cwd]
@@ -107,7 +277,18 @@ def run_models_test():
         target = df.columns[-1]
 
     try:
-        result = run_models_parallel(str(sample), target)
+        if admin is not None:
+            result, profiler = get_pool().submit(_run_profiled, str(sample), target).result()
+            result["profile"] = profiler.summary()
+            history = add_history(
+                db, history_payload(result, sample.name, target, admin.email), admin.id,
+                profile_path=profiler.save(f"run_test-{uuid.uuid4().hex}")
+            )
+            history_id = history.id
+            db.commit()
+            result["profile"] = _profile_summary(profiler, history_id)
+        else:
+            result = get_pool().submit(run_models_parallel, str(sample), target).result()
         # Optionally cache last successful result for quick retrieval
         try:
             cache_path = Path(__file__).resolve().parents[2] / "server" / "scripts" / "last_model_result.json"
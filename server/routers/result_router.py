@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Header, Depends, HTTPException
+from fastapi import APIRouter, Header, Depends, HTTPException, Query
 from datetime import datetime
 from typing import Optional
 from sqlalchemy.orm import Session
@@ -7,54 +7,71 @@ from core.security import decode_token
 from core.database import get_db
 from models.data_models import AnalysisHistory, Dataset
 from models.user_model import User
+from services.evaluation_service import add_history
+from services.history_service import HISTORY_PAGE_DEFAULT, HISTORY_PAGE_MAX, analysis_page
 
 router = APIRouter()
 
 
-@router.get("/latest")
-def get_latest_result(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    user_email = None
+def _user_from_header(authorization: Optional[str], db: Session) -> Optional[User]:
     if authorization and authorization.lower().startswith("bearer "):
         token = authorization.split(" ", 1)[1]
-        user_email = decode_token(token)
-
-    if user_email:
-        user = db.query(User).filter_by(email=user_email).first()
-        if not user:
-            return {"message": "No analyses yet"}
-        item = (
-            db.query(AnalysisHistory)
-            .filter_by(user_id=user.id)
-            .order_by(AnalysisHistory.created_at.desc())
-            .first()
-        )
-        return item.payload if item else {"message": "No analyses yet"}
-
-    item = db.query(AnalysisHistory).order_by(AnalysisHistory.created_at.desc()).first()
+        if user_email := decode_token(token):
+            return db.query(User).filter_by(email=user_email).first()
+    return None
+
+
+@router.get("/latest")
+def get_latest_result(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Full payload of the caller's most recent analysis (served by the (user_id, created_at) index)."""
+    user = _user_from_header(authorization, db)
+    if not user:
+        return {"message": "No analyses yet"}
+    item = (
+        db.query(AnalysisHistory.payload)
+        .filter_by(user_id=user.id)
+        .order_by(AnalysisHistory.created_at.desc(), AnalysisHistory.id.desc())
+        .first()
+    )
     return item.payload if item else {"message": "No analyses yet"}
 
 
 @router.get("/history")
-def get_history(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
-    user_email = None
-    if authorization and authorization.lower().startswith("bearer "):
-        token = authorization.split(" ", 1)[1]
-        user_email = decode_token(token)
+def get_history(
+    limit: int = Query(HISTORY_PAGE_DEFAULT, ge=1, le=HISTORY_PAGE_MAX),
+    cursor: Optional[str] = None,
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """One page of the caller's analyses as summaries, newest first.
+
+    Each entry has the id, timestamp, file, goal, task, best model and its
+    score; ``GET /results/history/{id}`` returns the full payload. Pass the
+    returned ``next_cursor`` as ``cursor`` for the next page. Callers
+    without a valid token get an empty list.
+    """
+    user = _user_from_header(authorization, db)
+    if not user:
+        return {"total_runs": 0, "history": [], "next_cursor": None, "limit": limit}
+    try:
+        page = analysis_page(db, user.id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total_runs = db.query(AnalysisHistory.id).filter_by(user_id=user.id).count()
+    return {"total_runs": total_runs, **page}
 
-    if user_email:
-        user = db.query(User).filter_by(email=user_email).first()
-        if not user:
-            return {"total_runs": 0, "history": []}
-        items = (
-            db.query(AnalysisHistory)
-            .filter_by(user_id=user.id)
-            .order_by(AnalysisHistory.created_at.desc())
-            .all()
-        )
-        return {"total_runs": len(items), "history": [i.payload for i in items]}
 
-    items = db.query(AnalysisHistory).order_by(AnalysisHistory.created_at.desc()).all()
-    return {"total_runs": len(items), "history": [i.payload for i in items]}
+@router.get("/history/{history_id}")
+def get_history_entry(history_id: int, authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Full payload of one of the caller's analyses."""
+    user = _user_from_header(authorization, db)
+    item = (
+        db.query(AnalysisHistory.payload).filter_by(id=history_id, user_id=user.id).first()
+        if user else None
+    )
+    if not item:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return item.payload
 
 
 @router.post("/save")
@@ -62,15 +79,9 @@ def save_result(result: dict, authorization: Optional[str] = Header(None), db: S
     # Attach timestamp
     result["timestamp"] = datetime.now().isoformat()
 
-    user_email = None
-    user = None
-    if authorization and authorization.lower().startswith("bearer "):
-        token = authorization.split(" ", 1)[1]
-        user_email = decode_token(token)
-        if user_email:
-            user = db.query(User).filter_by(email=user_email).first()
-            if user:
-                result["user"] = user_email
+    user = _user_from_header(authorization, db)
+    if user:
+        result["user"] = user.email
 
     # If a filename is provided, try to associate with a Dataset
     dataset_obj = None
@@ -84,10 +95,8 @@ def save_result(result: dict, authorization: Optional[str] = Header(None), db: S
 
     # Persist the full payload to AnalysisHistory (including any image memory present)
     try:
-        history = AnalysisHistory(user_id=(user.id if user else None), dataset_id=(dataset_obj.id if dataset_obj else None), payload=result)
-        db.add(history)
+        add_history(db, result, user.id if user else None, dataset_obj.id if dataset_obj else None)
         db.commit()
-        db.refresh(history)
         return {"status": "success", "message": "Result saved to history"}
     except Exception as e:
         db.rollback()
@@ -13,6 +13,7 @@ class UserLogin(UserBase):
 class UserResponse(BaseModel):
     id: int
     email: str
+    is_admin: bool = False
 
     class Config:
         from_attributes = True
@@ -0,0 +1,86 @@
+"""Benchmark the model-fit executor backends in `run_models_parallel`.
+
+Run from the `server` directory:
+
+    python scripts/bench_executor_backends.py --rows 20000 --cols 30
+
+Generates a synthetic regression dataset, then times `fit_models` for the
+sequential, thread and process backends at increasing worker counts and
+prints the speedup relative to the sequential run.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    from ml_engine.model_runner import fit_models, evaluate_model, regression_models
+    from ml_engine.prepared import prepare_matrices
+except Exception:
+    repo_root = Path(__file__).resolve().parents[2]
+    sys.path.insert(0, str(repo_root / "server"))
+    from ml_engine.model_runner import fit_models, evaluate_model, regression_models
+    from ml_engine.prepared import prepare_matrices
+
+import numpy as np
+from sklearn.model_selection import train_test_split
+
+
+def make_data(rows: int, cols: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, cols))
+    coef = rng.normal(size=cols)
+    y = X @ coef + rng.normal(scale=0.5, size=rows)
+    return prepare_matrices(*train_test_split(X, y, test_size=0.2, random_state=42))
+
+
+def time_backend(backend: str, workers: int, data, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fit_models(evaluate_model, regression_models(), data, backend=backend, max_workers=workers)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare model-fit executor backends.")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--cols", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--out", help="Write JSON results to file")
+    args = parser.parse_args()
+
+    data = make_data(args.rows, args.cols)
+    n_models = len(regression_models())
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({w for w in (1, 2, 4, n_models, cores) if w <= min(cores, n_models)})
+
+    baseline = time_backend("sequential", 1, data, args.repeats)
+    rows = [{"backend": "sequential", "workers": 1, "seconds": round(baseline, 3), "speedup": 1.0}]
+    for backend in ("thread", "process"):
+        for workers in worker_counts:
+            seconds = time_backend(backend, workers, data, args.repeats)
+            rows.append({
+                "backend": backend,
+                "workers": workers,
+                "seconds": round(seconds, 3),
+                "speedup": round(baseline / seconds, 2),
+            })
+    data.close()
+
+    print(f"{args.rows} rows x {args.cols} cols, {cores} cores")
+    print(f"{'backend':<12}{'workers':>8}{'seconds':>10}{'speedup':>9}")
+    for r in rows:
+        print(f"{r['backend']:<12}{r['workers']:>8}{r['seconds']:>10}{r['speedup']:>9}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump({"rows": args.rows, "cols": args.cols, "cores": cores, "results": rows}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+"""Benchmark the history listing: legacy N+1 queries vs keyset pages.
+
+Run from the `server` directory:
+
+    python scripts/bench_history.py --datasets 10000 --models 5
+    DATABASE_URL=postgresql://... python scripts/bench_history.py
+
+Without DATABASE_URL a temporary SQLite file is used. The tables and
+indexes are created if they are missing. One user is seeded with
+--datasets datasets of --models results each, and the script times:
+
+- `legacy`: the previous `get_user_history`, which runs one query for the
+  datasets and one more per dataset for its results, and returns them all;
+- `first_page`: `history_service.history_page` with --limit;
+- `all_pages`: walking every page with the cursor;
+- `filtered_page`: a first page filtered on one model and min_r2.
+
+For each it reports wall time and the number of SQL statements.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVER_DIR))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from sqlalchemy import event, insert
+
+from core.database import Base, SessionLocal, engine
+from models.data_models import Dataset, ModelResult
+from models.user_model import User
+from services.history_service import history_page
+
+statements = 0
+
+
+def _count(*args):
+    global statements
+    statements += 1
+
+
+def seed(db, datasets: int, models: int) -> int:
+    email = f"bench-history-{datasets}x{models}@example.com"
+    user = db.query(User).filter_by(email=email).first()
+    if user is not None:
+        return user.id
+    user = User(email=email, hashed_password="-")
+    db.add(user)
+    db.flush()
+    start = datetime(2025, 1, 1)
+    db.execute(insert(Dataset), [
+        {"user_id": user.id, "filename": f"data_{i}.csv", "file_path": f"uploads/data_{i}.csv",
+         "uploaded_at": start + timedelta(minutes=i)}
+        for i in range(datasets)
+    ])
+    ids = [row.id for row in db.query(Dataset.id).filter_by(user_id=user.id)]
+    for chunk in range(0, len(ids), 1000):
+        db.execute(insert(ModelResult), [
+            {"user_id": user.id, "dataset_id": ds_id, "model_name": f"Model {m}", "task": "regression",
+             "r2_score": (ds_id * 7 + m) % 100 / 100, "mse": m + 0.5, "training_time": 0.1 * m,
+             "metrics": {"mae": 0.1}, "created_at": start}
+            for ds_id in ids[chunk:chunk + 1000] for m in range(models)
+        ])
+    db.commit()
+    return user.id
+
+
+def legacy_history(db, user_id: int):
+    history = []
+    for ds in db.query(Dataset).filter_by(user_id=user_id).all():
+        results = db.query(ModelResult).filter_by(dataset_id=ds.id).all()
+        history.append({
+            "dataset": {"id": ds.id, "filename": ds.filename, "uploaded_at": ds.uploaded_at},
+            "results": [{"model": r.model_name, "r2_score": r.r2_score, "mse": r.mse,
+                         "created_at": r.created_at} for r in results],
+        })
+    return history
+
+
+def all_pages(db, user_id: int, limit: int):
+    cursor, rows = None, 0
+    while True:
+        page = history_page(db, user_id, limit=limit, cursor=cursor)
+        rows += len(page["history"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return rows
+
+
+def measure(fn) -> dict:
+    global statements
+    db = SessionLocal()
+    try:
+        statements = 0
+        start = time.perf_counter()
+        fn(db)
+        return {"seconds": round(time.perf_counter() - start, 4), "statements": statements}
+    finally:
+        db.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the history listing.")
+    parser.add_argument("--datasets", type=int, default=10000)
+    parser.add_argument("--models", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--out", help="Write JSON results to file")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user_id = seed(db, args.datasets, args.models)
+    db.close()
+    event.listen(engine, "before_cursor_execute", _count)
+
+    timings = {
+        "legacy": measure(lambda db: legacy_history(db, user_id)),
+        "first_page": measure(lambda db: history_page(db, user_id, limit=args.limit)),
+        "all_pages": measure(lambda db: all_pages(db, user_id, args.limit)),
+        "filtered_page": measure(lambda db: history_page(db, user_id, limit=args.limit,
+                                                         model="Model 1", min_r2=0.5)),
+    }
+
+    print(f"{engine.url.get_backend_name()}: {args.datasets} datasets x {args.models} results, "
+          f"pages of {args.limit}")
+    for name, t in timings.items():
+        print(f"{name:<15}{t['seconds']:>9.3f}s{t['statements']:>8} statements")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump({"backend": engine.url.get_backend_name(), **vars(args), "results": timings}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+"""Benchmark peak memory and wall time of dataset sampling.
+
+Run from the `server` directory:
+
+    python scripts/bench_ingest.py --rows 1000000 10000000 50000000
+
+For each row count a synthetic CSV (10 numeric columns plus a label) is
+written to a temp directory, then two strategies are measured, each in a
+fresh subprocess so peak RSS is not polluted by earlier runs:
+
+- `full`: `pd.read_csv` on the whole file, then `df.sample` (the old path)
+- `stream`: `count_csv_rows` + `reservoir_sample_csv` (the current path)
+
+Both keep 1% of the rows. Files are reused between runs unless --fresh.
+A strategy whose subprocess dies (e.g. killed for running out of memory)
+is reported as failed and the other runs go on.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVER_DIR))
+
+import numpy as np
+import pandas as pd
+
+
+def write_csv(path: Path, rows: int, cols: int = 10, chunk: int = 1_000_000):
+    rng = np.random.default_rng(0)
+    header = True
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        df = pd.DataFrame(rng.normal(size=(n, cols)).round(4), columns=[f"f{i}" for i in range(cols)])
+        df["label"] = rng.integers(0, 3, size=n)
+        df.to_csv(path, mode="w" if header else "a", header=header, index=False)
+        header = False
+
+
+def peak_rss_mb() -> float:
+    # VmHWM is reset by exec; ru_maxrss can carry over the parent's peak
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker(strategy: str, path: str, sample_size: int):
+    from ml_engine.data_handler import count_csv_rows, reservoir_sample_csv
+
+    start = time.perf_counter()
+    if strategy == "full":
+        df = pd.read_csv(path).sample(n=sample_size, random_state=0)
+    else:
+        count_csv_rows(path)
+        df = reservoir_sample_csv(path, sample_size, rng=np.random.default_rng(0))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_rss_mb(), "rows_sampled": len(df)}))
+
+
+def measure(strategy: str, path: Path, sample_size: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--worker", strategy, str(path), str(sample_size)],
+        capture_output=True, text=True,
+    )
+    if out.returncode != 0:
+        return {"seconds": None, "peak_rss_mb": None, "error": f"exit code {out.returncode}"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark CSV sampling memory and time.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000, 50_000_000])
+    parser.add_argument("--dir", default=os.path.join(tempfile.gettempdir(), "mv_bench_ingest"))
+    parser.add_argument("--strategies", nargs="+", default=["full", "stream"])
+    parser.add_argument("--fresh", action="store_true", help="Regenerate synthetic files")
+    parser.add_argument("--out", help="Write JSON results to file")
+    parser.add_argument("--worker", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        strategy, path, sample_size = args.worker
+        worker(strategy, path, int(sample_size))
+        return 0
+
+    os.makedirs(args.dir, exist_ok=True)
+    results = []
+    print(f"{'rows':>12}{'size_mb':>10}{'strategy':>10}{'seconds':>10}{'peak_rss_mb':>13}")
+    for rows in args.rows:
+        path = Path(args.dir) / f"synthetic_{rows}.csv"
+        if args.fresh or not path.exists():
+            write_csv(path, rows)
+        size_mb = path.stat().st_size / 1024 ** 2
+        for strategy in args.strategies:
+            r = measure(strategy, path, max(1, rows // 100))
+            r.update({"rows": rows, "size_mb": round(size_mb, 1), "strategy": strategy})
+            results.append(r)
+            if r["seconds"] is None:
+                print(f"{rows:>12}{size_mb:>10.1f}{strategy:>10}   failed ({r['error']})")
+                continue
+            print(f"{rows:>12}{size_mb:>10.1f}{strategy:>10}{r['seconds']:>10.2f}{r['peak_rss_mb']:>13.1f}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
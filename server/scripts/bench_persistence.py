@@ -0,0 +1,172 @@
+"""Benchmark how an evaluation's results are stored: round trips and throughput.
+
+Run from the `server` directory:
+
+    python scripts/bench_persistence.py --evaluations 200 --threads 8 --models 5
+    DATABASE_URL=postgresql://... python scripts/bench_persistence.py
+
+Without DATABASE_URL a temporary SQLite file is used. The tables are
+created if they are missing. Two ways of storing the same synthetic
+results are compared:
+
+- `legacy`: the previous flow. The Dataset is committed on upload. After
+  the run, its columnar_path is updated and one ModelResult is added per
+  model, followed by a second commit. The client's ``/results/save`` then
+  writes the history entry in a third transaction.
+- `bulk`: `evaluation_service.persist_evaluation`, which uses one
+  transaction and a multi-row INSERT for the results.
+
+It reports statements, commits and wall time per evaluation.
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVER_DIR))
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from sqlalchemy import event
+
+from core.database import Base, SessionLocal, engine
+from models.data_models import AnalysisHistory, Dataset, ModelResult
+from models.user_model import User
+from services.evaluation_service import history_payload, persist_evaluation
+
+
+class RoundTrips:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._statement)
+        event.listen(engine, "commit", self._commit)
+
+    def _statement(self, *args):
+        with self._lock:
+            self.statements += 1
+
+    def _commit(self, *args):
+        with self._lock:
+            self.commits += 1
+
+    def reset(self):
+        with self._lock:
+            self.statements = self.commits = 0
+
+
+def make_result(models: int) -> dict:
+    return {
+        "rows_used": 5000,
+        "task": "regression",
+        "results": [
+            {"model": f"Model {i}", "r2_test": 0.9 - i / 100, "r2_train": 0.95, "mse": 0.1 + i,
+             "mae": 0.2, "rmse": 0.3, "mape": 4.5, "training_time": 0.5 * i, "predict_time": 0.01}
+            for i in range(models)
+        ],
+    }
+
+
+def store_legacy(user_id: int, email: str, result: dict):
+    db = SessionLocal()
+    try:
+        dataset = Dataset(user_id=user_id, filename="bench.csv", file_path="uploads/bench.csv")
+        db.add(dataset)
+        db.commit()
+        db.refresh(dataset)
+
+        db.query(Dataset).filter_by(id=dataset.id).update({"columnar_path": "uploads/bench.csv.parquet"})
+        for r in result["results"]:
+            db.add(ModelResult(
+                user_id=user_id, dataset_id=dataset.id, model_name=r["model"],
+                r2_score=r.get("r2_test") or r.get("r2_train") or 0.0, mse=r.get("mse") or 0.0,
+                created_at=datetime.utcnow()
+            ))
+        db.commit()
+
+        # /results/save, called by the client afterwards
+        user = db.query(User).filter_by(email=email).first()
+        found = db.query(Dataset).filter_by(user_id=user.id, filename="bench.csv").first()
+        history = AnalysisHistory(user_id=user.id, dataset_id=found.id,
+                                  payload=history_payload(result, "bench.csv", "target", email))
+        db.add(history)
+        db.commit()
+        db.refresh(history)
+    finally:
+        db.close()
+
+
+def store_bulk(user_id: int, email: str, result: dict):
+    db = SessionLocal()
+    try:
+        persist_evaluation(db, user_id, "bench.csv", "uploads/bench.csv", "target", result,
+                           columnar_path="uploads/bench.csv.parquet", user_email=email)
+    finally:
+        db.close()
+
+
+def run(store, user_id: int, email: str, result: dict, evaluations: int, threads: int,
+        counter: RoundTrips) -> dict:
+    counter.reset()
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: store(user_id, email, result), range(evaluations)))
+    seconds = time.perf_counter() - start
+    return {
+        "statements_per_evaluation": round(counter.statements / evaluations, 2),
+        "commits_per_evaluation": round(counter.commits / evaluations, 2),
+        "ms_per_evaluation": round(seconds / evaluations * 1000, 3),
+        "evaluations_per_second": round(evaluations / seconds, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark persistence of evaluation results.")
+    parser.add_argument("--evaluations", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--models", type=int, default=5)
+    parser.add_argument("--out", help="Write JSON results to file")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    email = "bench-persistence@example.com"
+    user = db.query(User).filter_by(email=email).first()
+    if user is None:
+        user = User(email=email, hashed_password="-")
+        db.add(user)
+        db.commit()
+    user_id = user.id
+    db.close()
+
+    counter = RoundTrips()
+    result = make_result(args.models)
+    timings = {
+        name: run(store, user_id, email, result, args.evaluations, args.threads, counter)
+        for name, store in (("legacy", store_legacy), ("bulk", store_bulk))
+    }
+
+    print(f"{engine.url.get_backend_name()}: {args.evaluations} evaluations x {args.models} models, "
+          f"{args.threads} threads")
+    print(f"{'':<8}{'statements':>12}{'commits':>9}{'ms/eval':>10}{'eval/s':>9}")
+    for name, t in timings.items():
+        print(f"{name:<8}{t['statements_per_evaluation']:>12}{t['commits_per_evaluation']:>9}"
+              f"{t['ms_per_evaluation']:>10}{t['evaluations_per_second']:>9}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump({"backend": engine.url.get_backend_name(), **vars(args), "results": timings}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+"""Benchmark peak memory of the prepared-matrix stage in `run_models_parallel`.
+
+Run from the `server` directory:
+
+    python scripts/bench_prepared_matrices.py --rows 200000 --cols 50
+
+Three strategies fit the same models concurrently on threads, each in a
+fresh subprocess so peak RSS (VmHWM) is measured independently:
+
+- `pandas`: estimators get the pandas splits and convert them themselves
+  (the previous behaviour)
+- `prepared`: one shared in-RAM conversion via `prepare_matrices`
+- `mmap`: the same, forced onto memory-mapped temp files
+
+Linear SVR is left out: on inputs large enough to matter it dominates the
+runtime without changing the memory picture.
+"""
+import argparse
+import concurrent.futures
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVER_DIR))
+
+
+def peak_rss_mb() -> float:
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def worker(strategy: str, rows: int, cols: int):
+    import numpy as np
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    from sklearn.model_selection import train_test_split
+    from sklearn.tree import DecisionTreeRegressor
+    from ml_engine.model_runner import evaluate_model, fit_models
+    from ml_engine.prepared import prepare_matrices
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(rows, cols)), columns=[f"f{i}" for i in range(cols)])
+    y = pd.Series(X.to_numpy() @ rng.normal(size=cols))
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    del X, y
+    models = {
+        "Linear Regression": LinearRegression(),
+        "Decision Tree": DecisionTreeRegressor(max_depth=12, random_state=42),
+        "Random Forest": RandomForestRegressor(n_estimators=8, max_depth=12, random_state=42),
+    }
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if strategy == "pandas":
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            futures = [
+                executor.submit(evaluate_model, name, model, X_train, X_test, y_train, y_test)
+                for name, model in models.items()
+            ]
+            results = [f.result() for f in futures]
+    else:
+        threshold = 0 if strategy == "mmap" else 1 << 62
+        data = prepare_matrices(X_train, X_test, y_train, y_test, mmap_threshold=threshold)
+        del X_train, X_test, y_train, y_test
+        with data:
+            results = fit_models(evaluate_model, models, data, backend="thread")
+    elapsed = time.perf_counter() - start
+
+    errors = [r["error"] for r in results if "error" in r]
+    print(json.dumps({
+        "seconds": round(elapsed, 2),
+        "data_mb": round(rows * cols * 8 / 1024 ** 2, 1),
+        "baseline_rss_mb": round(baseline, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "errors": errors,
+    }))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark prepared-matrix peak memory.")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--cols", type=int, default=50)
+    parser.add_argument("--strategies", nargs="+", default=["pandas", "prepared", "mmap"])
+    parser.add_argument("--out", help="Write JSON results to file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.rows, args.cols)
+        return 0
+
+    results = []
+    print(f"{'strategy':<10}{'seconds':>9}{'data_mb':>9}{'peak_rss_mb':>13}{'over_data':>11}")
+    for strategy in args.strategies:
+        out = subprocess.run(
+            [sys.executable, __file__, "--worker", strategy, "--rows", str(args.rows), "--cols", str(args.cols)],
+            capture_output=True, text=True, check=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        r["strategy"] = strategy
+        results.append(r)
+        over = r["peak_rss_mb"] - r["baseline_rss_mb"]
+        print(f"{strategy:<10}{r['seconds']:>9}{r['data_mb']:>9}{r['peak_rss_mb']:>13}{over:>11.1f}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
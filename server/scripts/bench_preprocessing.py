@@ -0,0 +1,87 @@
+"""Benchmark the fitted `Preprocessor` against the old column_stack loop.
+
+Run from the `server` directory:
+
+    python scripts/bench_preprocessing.py --rows 20000 --cols 500
+
+Builds a frame with half numeric and half categorical columns and times:
+
+- `legacy`: the previous `preprocess_data` (StandardScaler, then one
+  `np.column_stack` per categorical feature)
+- `fit_transform`: `Preprocessor().fit_transform`
+- `transform`: re-applying an already fitted `Preprocessor` to new rows
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVER_DIR))
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler, LabelEncoder
+
+from ml_engine.preprocessing import Preprocessor
+
+
+def legacy_preprocess(df: pd.DataFrame) -> np.ndarray:
+    numeric_features = df.select_dtypes(include=[np.number]).columns
+    categorical_features = df.select_dtypes(include=['object']).columns
+    X_numeric = StandardScaler().fit_transform(df[numeric_features])
+    X_categorical = np.zeros((len(df), 0))
+    for feature in categorical_features:
+        encoded = LabelEncoder().fit_transform(df[feature])
+        X_categorical = np.column_stack((X_categorical, encoded))
+    return np.column_stack((X_numeric, X_categorical))
+
+
+def make_frame(rows: int, cols: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_num = cols // 2
+    data = {f"num_{i}": rng.normal(size=rows) for i in range(n_num)}
+    labels = np.array([f"level_{i}" for i in range(12)], dtype=object)
+    for i in range(cols - n_num):
+        data[f"cat_{i}"] = labels[rng.integers(0, len(labels), size=rows)]
+    return pd.DataFrame(data).astype({f"cat_{i}": object for i in range(cols - n_num)})
+
+
+def best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark feature preprocessing.")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--cols", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--out", help="Write JSON results to file")
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.cols)
+    fitted = Preprocessor().fit(df)
+    timings = {
+        "legacy": best_of(lambda: legacy_preprocess(df), args.repeats),
+        "fit_transform": best_of(lambda: Preprocessor().fit_transform(df), args.repeats),
+        "transform": best_of(lambda: fitted.transform(df), args.repeats),
+    }
+
+    print(f"{args.rows} rows x {args.cols} cols")
+    for name, seconds in timings.items():
+        print(f"{name:<14}{seconds:>9.3f}s{timings['legacy'] / seconds:>8.1f}x")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump({"rows": args.rows, "cols": args.cols, "seconds": timings}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,249 @@
+"""Reproducible end-to-end benchmark of the model_runner hot path.
+
+Run from the `server` directory:
+
+    python scripts/bench_suite.py                       # run, compare to baseline
+    python scripts/bench_suite.py --save-baseline       # record a new baseline
+    python scripts/bench_suite.py --shapes 200000x50 --tasks regression --modes full tournament
+
+For every (task, shape, mode) scenario a synthetic CSV is generated once
+(fixed seed, cached in --data-dir) and a fresh subprocess times, in order:
+
+- `load_random_dataset` on its own (the sampling stage), and
+- `run_models_parallel` end to end, with the result cache disabled.
+
+Each scenario records:
+- wall time for both stages;
+- per-model fit and predict time;
+- peak RSS of the worker and of any fit processes it started;
+- CPU utilisation, as CPU seconds per wall second divided by available
+  cores.
+
+The results are written as JSON (--out) and compared metric by metric
+against the stored baseline (--baseline, default
+scripts/bench_baseline.json). Any metric worse than the baseline by more
+than its tolerance is printed, and the script exits with status 1.
+Baselines are machine-specific. The baseline records the machine it was
+taken on, and the script warns when the current one differs.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVER_DIR))
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "bench_baseline.json"
+
+# Relative slack before a metric counts as a regression
+TOLERANCES = {
+    "load_seconds": 0.5,
+    "run_seconds": 0.3,
+    "peak_rss_mb": 0.2,
+    "model_fit_seconds": 0.5,
+}
+# Differences below these absolute amounts are noise, whatever the ratio
+# (sub-second fits vary by ~0.1s run to run on a busy machine)
+NOISE_FLOOR = {
+    "load_seconds": 0.25,
+    "run_seconds": 0.5,
+    "peak_rss_mb": 16.0,
+    "model_fit_seconds": 0.25,
+}
+
+
+def peak_rss_mb() -> float:
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def machine() -> dict:
+    import numpy
+    import sklearn
+    from ml_engine.cpu_budget import available_cores
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "sklearn": sklearn.__version__,
+        "cores": available_cores(),
+    }
+
+
+def write_dataset(path: Path, task: str, rows: int, cols: int, seed: int = 0, chunk: int = 200_000):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    coef = rng.normal(size=cols)
+    tmp = path.with_suffix(".tmp")
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        X = rng.normal(size=(n, cols))
+        df = pd.DataFrame(X.round(5), columns=[f"f{i}" for i in range(cols)])
+        signal = X @ coef
+        if task == "regression":
+            df["target"] = (signal + rng.normal(scale=0.5, size=n)).round(5)
+        else:
+            df["target"] = np.digitize(signal, [-1.0, 1.0])
+        df.to_csv(tmp, mode="w" if start == 0 else "a", header=start == 0, index=False)
+    os.replace(tmp, path)
+
+
+def worker(spec: dict):
+    from ml_engine.data_handler import load_random_dataset
+    from ml_engine.model_runner import run_models_parallel
+
+    cores = machine()["cores"]
+    start, cpu_start = time.perf_counter(), cpu_seconds()
+    df = load_random_dataset(spec["path"], "target")
+    load_seconds = time.perf_counter() - start
+    del df
+
+    start = time.perf_counter()
+    payload = run_models_parallel(spec["path"], "target", use_cache=False, mode=spec["mode"])
+    run_seconds = time.perf_counter() - start
+    wall = load_seconds + run_seconds
+
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(json.dumps({
+        "load_seconds": round(load_seconds, 4),
+        "run_seconds": round(run_seconds, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "children_peak_rss_mb": round(children, 1),
+        "cpu_utilization": round((cpu_seconds() - cpu_start) / wall / cores, 3) if wall else None,
+        "rows_used": payload["rows_used"],
+        "models": {
+            r["model"]: {
+                "fit_seconds": r.get("training_time"),
+                "predict_seconds": r.get("predict_time"),
+                "error": r.get("error"),
+            }
+            for r in payload["results"]
+        },
+    }))
+
+
+def run_scenario(spec: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, __file__, "--worker", json.dumps(spec)],
+        capture_output=True, text=True, cwd=SERVER_DIR,
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f"Scenario {spec['name']} failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def compare(current: dict, baseline: dict) -> list:
+    """Return one line per metric that regressed past its tolerance."""
+    failures = []
+
+    def check(scenario, metric, kind, now, before):
+        if now is None or before is None:
+            return
+        if now - before > NOISE_FLOOR[kind] and now > before * (1 + TOLERANCES[kind]):
+            change = f"+{(now / before - 1) * 100:.0f}%" if before else "new cost"
+            failures.append(f"{scenario}: {metric} {before} -> {now} ({change})")
+
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        for metric in ("load_seconds", "run_seconds", "peak_rss_mb"):
+            check(name, metric, metric, result.get(metric), before.get(metric))
+        for model, timings in result["models"].items():
+            if timings.get("error") and not before["models"].get(model, {}).get("error"):
+                failures.append(f"{name}: {model} now fails: {timings['error']}")
+            check(name, f"{model} fit_seconds", "model_fit_seconds",
+                  timings.get("fit_seconds"), before["models"].get(model, {}).get("fit_seconds"))
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark run_models_parallel end to end.")
+    parser.add_argument("--shapes", nargs="+", default=["2000x20", "20000x20"],
+                        help="Dataset shapes as ROWSxCOLS")
+    parser.add_argument("--tasks", nargs="+", default=["regression", "classification"])
+    parser.add_argument("--modes", nargs="+", default=["full"])
+    parser.add_argument("--repeats", type=int, default=1, help="Keep the fastest of N runs")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "model-bench"))
+    parser.add_argument("--out", help="Write JSON results to file")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(json.loads(args.worker))
+        return 0
+
+    data_dir = Path(args.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    results = {"machine": machine(), "scenarios": {}}
+
+    print(f"{'scenario':<36}{'load_s':>9}{'run_s':>9}{'rss_mb':>9}{'cpu':>7}")
+    for task in args.tasks:
+        for shape in args.shapes:
+            rows, cols = (int(v) for v in shape.lower().split("x"))
+            path = data_dir / f"{task}_{rows}x{cols}.csv"
+            if not path.exists():
+                write_dataset(path, task, rows, cols)
+            for mode in args.modes:
+                name = f"{task}/{rows}x{cols}/{mode}"
+                runs = [run_scenario({"name": name, "path": str(path), "mode": mode}) for _ in range(args.repeats)]
+                r = min(runs, key=lambda run: run["load_seconds"] + run["run_seconds"])
+                results["scenarios"][name] = r
+                print(f"{name:<36}{r['load_seconds']:>9.2f}{r['run_seconds']:>9.2f}"
+                      f"{r['peak_rss_mb']:>9.1f}{r['cpu_utilization']:>7.2f}")
+                for model, t in r["models"].items():
+                    status = t["error"] or f"fit {t['fit_seconds']}s, predict {t['predict_seconds']}s"
+                    print(f"    {model:<32}{status}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    if baseline.get("machine") != results["machine"]:
+        print("Warning: baseline was recorded on a different machine or library versions:")
+        print(f"    baseline {baseline.get('machine')}")
+        print(f"    current  {results['machine']}")
+
+    failures = compare(results, baseline)
+    if failures:
+        print(f"\nREGRESSIONS against {args.baseline}:")
+        for line in failures:
+            print(f"    {line}")
+        return 1
+    print(f"\nNo regressions against {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,64 @@
+"""Checks that fit budgets count the fit, not the child process's start-up.
+
+Run from any directory:
+
+    python server/scripts/test_budget.py
+
+Starting a budgeted child (the fork server, importing scikit-learn) takes
+longer than a small budget; a fast model must still fit within it, and a
+slow one must still be stopped.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+
+from ml_engine import budget
+from ml_engine.model_runner import run_models_parallel
+
+
+def check(name: str, ok: bool, detail: str) -> int:
+    print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}")
+    return not ok
+
+
+def main():
+    failures = 0
+
+    start = time.monotonic()
+    preloaded = budget.warm_up()
+    failures += check(
+        "fork server preloads", preloaded or budget.BUDGET_START_METHOD != "forkserver",
+        f"{budget.FORKSERVER_PRELOAD} loaded={preloaded} in {time.monotonic() - start:.1f}s",
+    )
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"x1": rng.random(3000), "x2": rng.random(3000)})
+    df["y"] = df.x1 * 3 + rng.normal(0, 0.1, len(df))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "data.csv")
+        df.to_csv(path, index=False)
+        out = run_models_parallel(path, "y", mode="full", use_cache=False, time_budget=0.5)
+    results = {r["model"]: r for r in (out["results"] if isinstance(out, dict) else out)}
+    linear = results.get("Linear Regression", {})
+    failures += check(
+        "fast model under a small budget", "error" not in linear and linear.get("r2_test") is not None,
+        f"Linear Regression with time_budget=0.5: {linear.get('error') or linear.get('r2_test')}",
+    )
+
+    result = budget.run_isolated("sleeper", time.sleep, (5,), time_budget=0.5)
+    failures += check(
+        "slow fit is stopped", result.get("budget", {}).get("kind") == "time",
+        f"time.sleep(5) with time_budget=0.5: {result}",
+    )
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
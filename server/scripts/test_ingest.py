@@ -0,0 +1,70 @@
+"""Checks `UploadWriter`'s streaming profile against pandas on awkward CSVs.
+
+Run from the `server` directory:
+
+    python scripts/test_ingest.py
+
+Every file is fed in small chunks, so records and quotes straddle chunk
+boundaries. Files pandas reads must always be stored; their row and
+missing-value counts must match pandas' unless the profiler gave up.
+"""
+import io
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+
+from ml_engine import ingest
+from ml_engine.ingest import UploadWriter
+
+CASES = {
+    "plain": "name,age\nann,3\nbob,\ncid,7\n",
+    "quoted newline": 'name,note\nann,"line one\nline two"\nbob,"say ""hi"""\ncid,NA\n',
+    "unbalanced quote": 'name,size\nann,4\nbob,5"\ncid,6\ndee,7\n',
+    "two stray quotes": 'name,size\nbob,5"\ncid,6\ndee,7"\neve,8\n',
+    "unterminated quote": 'name,note\nann,"never closed\nbob,1\n',
+}
+
+
+def profile_of(text: str, chunk_bytes: int = 7):
+    data = text.encode()
+    with tempfile.TemporaryDirectory() as upload_dir:
+        writer = UploadWriter(upload_dir, "data.csv")
+        for start in range(0, len(data), chunk_bytes):
+            writer.write(data[start:start + chunk_bytes])
+        path, profile = writer.finish()
+        assert Path(path).read_bytes() == data, "stored bytes differ from the upload"
+    return profile
+
+
+def main():
+    failures = 0
+    for name, text in CASES.items():
+        profile = profile_of(text)
+        try:
+            expected = pd.read_csv(io.StringIO(text))
+        except Exception:
+            expected = None
+        ok = True
+        if expected is not None and profile.rows is not None:
+            ok = profile.rows == len(expected) and profile.null_counts == {
+                str(c): int(n) for c, n in expected.isna().sum().items()
+            }
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: rows={profile.rows} nulls={profile.null_counts}")
+        failures += not ok
+
+    # A quote that never closes must not hold the rest of the file in memory
+    ingest.MAX_OPEN_RECORD_CHARS = 1000
+    profile = profile_of('a,b\n1,"open\n' + "2,3\n" * 10000, chunk_bytes=4096)
+    ok = profile.rows is None and profile.columns == ["a", "b"]
+    print(f"{'ok  ' if ok else 'FAIL'} long unterminated quote: rows={profile.rows}")
+    failures += not ok
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
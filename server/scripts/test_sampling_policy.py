@@ -0,0 +1,54 @@
+"""Checks the heuristic sample size of numeric targets against their spread.
+
+Run from any directory:
+
+    python server/scripts/test_sampling_policy.py
+
+The stats are gathered the way `load_random_dataset` gathers them (moments
+plus t-digest quantiles). Targets with different shapes must get different
+sizes, and rescaling or shifting a target must not change its size.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+
+from ml_engine.data_handler import _finish_stats, target_stats
+from ml_engine.sampling_policy import HeuristicSampleSizePolicy
+
+ROWS = 20000
+
+
+def size_of(values: np.ndarray) -> int:
+    stats = target_stats(pd.Series(values))
+    stats = _finish_stats(stats)
+    stats.rows, stats.cols = len(values), 2
+    return HeuristicSampleSizePolicy().sample_size(stats)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    normal = rng.normal(size=ROWS)
+    sizes = {
+        "uniform": size_of(rng.random(ROWS)),
+        "normal": size_of(normal),
+        "normal x1000 + 5000": size_of(normal * 1000 + 5000),
+        "lognormal": size_of(rng.lognormal(size=ROWS)),
+    }
+    for name, size in sizes.items():
+        print(f"     {name}: {size} rows")
+
+    checks = {
+        "spread changes the size": sizes["uniform"] < sizes["normal"] < sizes["lognormal"],
+        "scale and shift do not": abs(sizes["normal"] - sizes["normal x1000 + 5000"]) <= 1,
+    }
+    for name, ok in checks.items():
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
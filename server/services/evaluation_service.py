@@ -0,0 +1,130 @@
+"""Persistence of finished evaluations.
+
+`persist_evaluation` stores everything an evaluation produced in one
+transaction:
+
+- the Dataset row (with its Parquet copy's path),
+- one ModelResult per model, written as a single multi-row INSERT that
+  carries the full metric dict, the fit time and the task type, and
+- the AnalysisHistory entry the history and results pages read.
+
+That is one INSERT per table and one COMMIT. The dataset was previously
+committed on upload and the results and history in later transactions of
+their own. A failure leaves nothing behind.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from core.metrics import span
+from models.data_models import AnalysisHistory, Dataset, ModelResult
+
+# Keys of a model's result that describe the run, not the model: not
+# stored in ModelResult.metrics ("cached" is set by the fit cache)
+RESULT_ANNOTATIONS = ("model", "cached")
+
+
+def model_result_rows(result: Dict[str, Any], user_id: Optional[int], dataset_id: int,
+                      created_at: datetime) -> List[Dict[str, Any]]:
+    """One ModelResult row (as a dict for a bulk INSERT) per entry of ``result["results"]``."""
+    rows = []
+    for r in result["results"]:
+        rows.append({
+            "user_id": user_id,
+            "dataset_id": dataset_id,
+            "model_name": r["model"],
+            "task": result.get("task"),
+            "r2_score": r.get("r2_test") or r.get("r2_train") or 0.0,
+            "mse": r.get("mse") or 0.0,
+            "training_time": r.get("training_time"),
+            "metrics": {k: v for k, v in r.items() if k not in RESULT_ANNOTATIONS},
+            "created_at": created_at,
+        })
+    return rows
+
+
+def history_payload(result: Dict[str, Any], filename: Optional[str], target_col: str,
+                    user_email: Optional[str] = None, **extra) -> Dict[str, Any]:
+    """The AnalysisHistory payload, shaped like the entries ``/results/save`` stores."""
+    payload = {
+        "file": filename,
+        "goal": target_col,
+        "status": "success",
+        "timestamp": datetime.now().isoformat(),
+        "data": result,
+        **extra,
+    }
+    if user_email:
+        payload["user"] = user_email
+    return payload
+
+
+def summarize_history(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """The AnalysisHistory summary columns for ``payload``.
+
+    Handles both the entries written here (results under ``data``) and the
+    ones clients post to ``/results/save`` (a job status, results at the
+    top level or under ``data``).
+    """
+    data = payload.get("data") if isinstance(payload.get("data"), dict) else {}
+    results = data.get("results") or payload.get("results") or []
+    task = data.get("task") or payload.get("task")
+    score_key = "accuracy" if task == "classification" else "r2_test"
+    scored = [r for r in results if isinstance(r, dict) and isinstance(r.get(score_key), (int, float))]
+    best = max(scored, key=lambda r: r[score_key]) if scored else None
+    return {
+        "file": payload.get("file"),
+        "goal": payload.get("goal") or payload.get("target_col"),
+        "task": task,
+        "best_model": best.get("model") if best else None,
+        "best_score": best[score_key] if best else None,
+        "model_count": len(results),
+    }
+
+
+def add_history(db: Session, payload: Dict[str, Any], user_id: Optional[int],
+                dataset_id: Optional[int] = None, profile_path: Optional[str] = None) -> AnalysisHistory:
+    """Add an AnalysisHistory row with its summary and flush it for its id (not committed)."""
+    history = AnalysisHistory(
+        user_id=user_id, dataset_id=dataset_id, payload=payload, profile_path=profile_path,
+        **summarize_history(payload)
+    )
+    db.add(history)
+    db.flush()
+    return history
+
+
+def persist_evaluation(db: Session, user_id: int, filename: str, file_path: str, target_col: str,
+                       result: Dict[str, Any], columnar_path: Optional[str] = None,
+                       user_email: Optional[str] = None, profile_path: Optional[str] = None,
+                       dataset_fields: Optional[Dict[str, Any]] = None, **history_extra) -> Tuple[Dataset, AnalysisHistory]:
+    """Write the dataset, its model results and the history entry, then commit.
+
+    ``dataset_fields`` are extra Dataset columns, such as the upload profile
+    from ``upload_service.dataset_fields``. Rolls back and re-raises if any statement fails.
+    """
+    now = datetime.utcnow()
+    try:
+        dataset = Dataset(
+            user_id=user_id, filename=filename, file_path=file_path,
+            columnar_path=columnar_path, uploaded_at=now, **(dataset_fields or {})
+        )
+        db.add(dataset)
+        db.flush()
+
+        rows = model_result_rows(result, user_id, dataset.id, now)
+        if rows:
+            db.execute(insert(ModelResult), rows)
+
+        payload = history_payload(
+            result, filename, target_col, user_email, dataset_id=dataset.id, **history_extra
+        )
+        history = add_history(db, payload, user_id, dataset.id, profile_path)
+        with span("db_commit"):
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return dataset, history
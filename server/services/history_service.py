@@ -0,0 +1,174 @@
+"""Paginated reads of a user's history.
+
+`history_page` lists datasets and their model results. It answers one
+page with two queries, whatever the page size:
+- the datasets, keyset-paginated on (uploaded_at, id) and backed by the
+  (user_id, uploaded_at) index;
+- all of their results, loaded with a single ``IN`` (selectinload) that
+  uses the model_results.dataset_id index.
+
+`analysis_page` lists saved analyses (AnalysisHistory) by their summary
+columns only, without loading the payload JSON, keyset-paginated on
+(created_at, id) over the (user_id, created_at) index.
+
+Both cursors encode the last row of the previous page. Unlike OFFSET, a
+deep page costs no more than the first, and rows inserted in the meantime
+do not shift later pages.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session, selectinload
+
+from models.data_models import AnalysisHistory, Dataset, ModelResult
+
+HISTORY_PAGE_DEFAULT = 50
+HISTORY_PAGE_MAX = 500
+# Fields results can be sorted by, and whether higher is better
+RESULT_SORT_FIELDS = {"r2_score": True, "mse": False, "training_time": False, "created_at": True}
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not produced by `encode_cursor`."""
+
+
+def encode_cursor(moment: datetime, row_id: int) -> str:
+    raw = json.dumps({"t": moment.isoformat(), "id": row_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["t"]), int(data["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def _keyset(query, time_col, id_col, cursor: Optional[str], newest_first: bool):
+    """Order ``query`` by (time_col, id_col) and start it after ``cursor``."""
+    if cursor is not None:
+        after_time, after_id = decode_cursor(cursor)
+        if newest_first:
+            query = query.where(or_(time_col < after_time, and_(time_col == after_time, id_col < after_id)))
+        else:
+            query = query.where(or_(time_col > after_time, and_(time_col == after_time, id_col > after_id)))
+    if newest_first:
+        return query.order_by(time_col.desc(), id_col.desc())
+    return query.order_by(time_col.asc(), id_col.asc())
+
+
+def _result_dict(r: ModelResult) -> Dict[str, Any]:
+    return {
+        "model": r.model_name,
+        "task": r.task,
+        "r2_score": r.r2_score,
+        "mse": r.mse,
+        "training_time": r.training_time,
+        "metrics": r.metrics,
+        "created_at": r.created_at,
+    }
+
+
+def history_page(db: Session, user_id: int, limit: int = HISTORY_PAGE_DEFAULT, cursor: Optional[str] = None,
+                 newest_first: bool = True, model: Optional[str] = None, task: Optional[str] = None,
+                 min_r2: Optional[float] = None, max_mse: Optional[float] = None,
+                 sort: Optional[str] = None) -> Dict[str, Any]:
+    """One page of ``user_id``'s datasets with their results.
+
+    ``model``, ``task``, ``min_r2`` and ``max_mse`` filter the results.
+    Only datasets with at least one matching result are listed, and each
+    lists only its matching results. ``sort`` orders each dataset's results
+    by one of ``RESULT_SORT_FIELDS``, best first. ``next_cursor`` is None
+    on the last page.
+    """
+    if sort is not None and sort not in RESULT_SORT_FIELDS:
+        raise ValueError(f"sort must be one of {tuple(RESULT_SORT_FIELDS)}")
+    limit = max(1, min(limit, HISTORY_PAGE_MAX))
+
+    criteria = []
+    if model is not None:
+        criteria.append(ModelResult.model_name == model)
+    if task is not None:
+        criteria.append(ModelResult.task == task)
+    if min_r2 is not None:
+        criteria.append(ModelResult.r2_score >= min_r2)
+    if max_mse is not None:
+        criteria.append(ModelResult.mse <= max_mse)
+
+    query = select(Dataset).where(Dataset.user_id == user_id)
+    if criteria:
+        matching = select(ModelResult.dataset_id).where(and_(*criteria))
+        query = query.where(Dataset.id.in_(matching))
+        query = query.options(selectinload(Dataset.results.and_(*criteria)))
+    else:
+        query = query.options(selectinload(Dataset.results))
+
+    query = _keyset(query, Dataset.uploaded_at, Dataset.id, cursor, newest_first)
+
+    datasets = db.execute(query.limit(limit + 1)).scalars().all()
+    has_more = len(datasets) > limit
+    datasets = datasets[:limit]
+
+    history: List[Dict[str, Any]] = []
+    for ds in datasets:
+        results = list(ds.results)
+        if sort is not None:
+            higher_is_better = RESULT_SORT_FIELDS[sort]
+            present = [r for r in results if getattr(r, sort) is not None]
+            missing = [r for r in results if getattr(r, sort) is None]
+            results = sorted(present, key=lambda r: getattr(r, sort), reverse=higher_is_better) + missing
+        history.append({
+            "dataset": {"id": ds.id, "filename": ds.filename, "uploaded_at": ds.uploaded_at},
+            "results": [_result_dict(r) for r in results],
+        })
+
+    return {
+        "history": history,
+        "next_cursor": encode_cursor(datasets[-1].uploaded_at, datasets[-1].id) if has_more else None,
+        "limit": limit,
+    }
+
+
+# Summary columns returned by `analysis_page`; the payload is never loaded
+ANALYSIS_SUMMARY_COLUMNS = (
+    AnalysisHistory.id, AnalysisHistory.created_at, AnalysisHistory.file, AnalysisHistory.goal,
+    AnalysisHistory.task, AnalysisHistory.best_model, AnalysisHistory.best_score,
+    AnalysisHistory.model_count, AnalysisHistory.profile_path,
+)
+
+
+def analysis_page(db: Session, user_id: int, limit: int = HISTORY_PAGE_DEFAULT,
+                  cursor: Optional[str] = None) -> Dict[str, Any]:
+    """One page of ``user_id``'s saved analyses, newest first, as summaries."""
+    limit = max(1, min(limit, HISTORY_PAGE_MAX))
+    query = select(*ANALYSIS_SUMMARY_COLUMNS).where(AnalysisHistory.user_id == user_id)
+    query = _keyset(query, AnalysisHistory.created_at, AnalysisHistory.id, cursor, newest_first=True)
+    rows = db.execute(query.limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    history = [
+        {
+            "id": row.id,
+            "timestamp": row.created_at.isoformat() if row.created_at else None,
+            "file": row.file,
+            "goal": row.goal,
+            "task": row.task,
+            "best_model": row.best_model,
+            "best_score": row.best_score,
+            "model_count": row.model_count,
+            "has_profile": row.profile_path is not None,
+        }
+        for row in rows
+    ]
+    return {
+        "history": history,
+        "next_cursor": encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None,
+        "limit": limit,
+    }